@@ -1,9 +1,10 @@
 import pygame
-import math
 import time
+from bisect import bisect_left
 from config import *
 from rsi import RSIPage
 from hold import HoldPage
+from data_link import EXPECTED_ROWS, HIST_EDGES
 
 # --- Tab IDs (Order: PERF, APPR, NAV, NOTAM, PROG) ---
 TAB_PERF    = 0
@@ -13,6 +14,7 @@ TAB_NOTAM   = 3
 TAB_PROG    = 4
 TAB_RSI     = 5 
 TAB_HOLD    = 6
+TAB_DIAG    = 7 # link diagnostics, opened by tapping the top status bar
 
 class AdvDisplay:
     def __init__(self, shared_fms, data_link):
@@ -36,10 +38,17 @@ class AdvDisplay:
         # [NEW] Rects for NAV1 Click & Hold Button
         self.rect_nav1_click = pygame.Rect(10, 80, 200, 80) 
         self.rect_hold_btn = pygame.Rect(380, 80, 40, 20)
+        self.rect_fuel_used = pygame.Rect(0, 0, SCREEN_W, 30) # PROG: tap to reset, y set when drawn
+        cx = SCREEN_W // 2
+        self.rect_confirm_yes = pygame.Rect(cx-80, 150, 70, 40)
+        self.rect_confirm_no  = pygame.Rect(cx+10, 150, 70, 40)
         
         # --- State ---
         self.current_tab = TAB_PROG 
+        self.diag_return_tab = TAB_PROG
+        self.diag_view = "LINK" # DIAG page: "LINK" row health or "EVENTS" latched events (tap to switch)
         self.airport_toggle = "AUTO" 
+        self.confirm_fuel_reset = False # PROG: YES/NO popup before the fuel-used totals are cleared
 
         # --- Layout Constants ---
         NAV_W = SCREEN_W
@@ -83,22 +92,39 @@ class AdvDisplay:
         
         if self.current_tab == TAB_PROG: self._draw_page_prog(screen)
         elif self.current_tab == TAB_AIRPORT: self._draw_page_airport(screen)
-        elif self.current_tab == TAB_NAVRAD: self._draw_page_navrad(screen)
+        elif self.current_tab == TAB_NAVRAD: self._draw_page_navrad(screen, link_data)
         elif self.current_tab == TAB_RSI:
-            self.rsi_page.update(screen)
+            self.rsi_page.update(screen, link_data)
         elif self.current_tab == TAB_HOLD: 
-            self.hold_page.update(screen)
-        elif self.current_tab == TAB_PERF: self._draw_page_perf(screen)
-        elif self.current_tab == TAB_NOTAM: self._draw_page_notam(screen)
+            self.hold_page.update(screen, link_data)
         elif self.current_tab == TAB_PERF: self._draw_page_perf(screen)
         elif self.current_tab == TAB_NOTAM: self._draw_page_notam(screen)
+        elif self.current_tab == TAB_DIAG: self._draw_page_diag(screen, link_data)
         
         if self.current_tab in [TAB_PERF, TAB_NOTAM]:
             self._draw_scroll_bar(screen)
 
+        if self.confirm_fuel_reset:
+            self._draw_popup_fuel_reset(screen)
+
     # --- Interaction Logic ---
     def handle_click(self, pos):
         
+        # Fuel-used reset popup: YES clears the totals, any other tap cancels
+        if self.confirm_fuel_reset:
+            if self.rect_confirm_yes.collidepoint(pos): self.fms.fuel_used.reset()
+            self.confirm_fuel_reset = False
+            return
+
+        # Status bar -> link diagnostics (and back)
+        if pos[1] < 35:
+            if self.current_tab == TAB_DIAG:
+                self.current_tab = self.diag_return_tab
+            else:
+                self.diag_return_tab = self.current_tab
+                self.current_tab = TAB_DIAG
+            return
+
         if pos[1] < 70:
             if self.rect_tab_prog.collidepoint(pos): 
                 self.current_tab = TAB_PROG
@@ -126,6 +152,10 @@ class AdvDisplay:
         if self.current_tab == TAB_HOLD:
             self.hold_page.handle_click(pos)
             return
+
+        if self.current_tab == TAB_DIAG:
+            self.diag_view = "EVENTS" if self.diag_view == "LINK" else "LINK"
+            return
             
         elif self.current_tab == TAB_NAVRAD:
             # Check NAV 1 Click -> Enter RSI
@@ -137,6 +167,10 @@ class AdvDisplay:
             elif self.rect_hold_btn.collidepoint(pos):
                 self.current_tab = TAB_HOLD
 
+        elif self.current_tab == TAB_PROG:
+            if self.rect_fuel_used.y and self.rect_fuel_used.collidepoint(pos):
+                self.confirm_fuel_reset = True
+
         elif self.current_tab == TAB_AIRPORT:
             if 80 < pos[1] < self.BOTTOM_LIMIT:
                 modes = ["AUTO", "DEP", "ARR"]
@@ -174,10 +208,16 @@ class AdvDisplay:
 
     def _draw_top_bar(self, screen):
         status_color, status_txt, txt_color = (20, 20, 20), "SYSTEM NORMAL", C_GREEN_NAV
-        if hasattr(self.fms, 'vnav_deviation') and abs(self.fms.vnav_deviation) > 1000:
+        st = self.fms.state
+        if abs(st.vnav_deviation) > 1000:
             status_color, status_txt, txt_color = (50, 40, 0), "CHECK VNAV PATH", C_AMBER
-        if hasattr(self.fms, 'baro_alert') and self.fms.baro_alert:
-            status_color, status_txt, txt_color = (50, 40, 0), f"ALERT: {self.fms.baro_alert}", C_AMBER
+        if st.baro_alert:
+            status_color, status_txt, txt_color = (50, 40, 0), f"ALERT: {st.baro_alert}", C_AMBER
+        health = getattr(self.data_link, 'health', None)
+        if health is not None and self.data_link.frame['connected']:
+            missing = health.missing(time.time(), EXPECTED_ROWS)
+            if missing:
+                status_color, status_txt, txt_color = (50, 0, 0), "UDP ROW MISSING: " + " ".join(map(str, missing[:4])), C_RED
 
         pygame.draw.rect(screen, status_color, (0, 0, SCREEN_W, 35))
         pygame.draw.line(screen, (80,80,80), (0, 35), (SCREEN_W, 35), 1)
@@ -348,7 +388,7 @@ class AdvDisplay:
     def _draw_page_airport(self, screen):
         mode = "DEP"
         if self.airport_toggle == "AUTO":
-            if self.fms.phase in ["CRZ", "DES"]: mode = "ARR"
+            if self.fms.state.phase in ["CRZ", "DES"]: mode = "ARR"
         else: mode = self.airport_toggle
 
         if mode == "DEP":
@@ -432,49 +472,127 @@ class AdvDisplay:
             s = font.render(line, True, color)
             screen.blit(s, (x, y + i * 16))
 
-    def _draw_page_prog(self, screen):
-        # ---------------------------------------------------------
-        # 1. Basic Calculation (Fuel, Flow, Endurance)
-        # ---------------------------------------------------------
-        fuel_kg = getattr(self.fms, 'cached_fuel', 0.0)
-        ff_kg_hr = getattr(self.fms, 'cached_flow', 0.0)
-        if ff_kg_hr > 0.5:  # Calculate only if flow > 0.5kg/h
-            endurance_hr = fuel_kg / ff_kg_hr
-            hrs = int(endurance_hr)
-            mins = int((endurance_hr - hrs) * 60)
-            endurance_str = f"{min(hrs,99):02d}:{mins:02d}"
-
+    def _draw_page_diag(self, screen, link_data):
+        if self.diag_view == "EVENTS":
+            self._draw_page_events(screen, link_data)
+            return
+        health = getattr(self.data_link, 'health', None)
+        if health is None:
+            # Process ingest: row health lives in the ingest process, only the counters cross over
+            screen.blit(self.font_m.render("ROW DIAGNOSTICS NOT SUPPORTED", True, C_AMBER), (10, 80))
+            screen.blit(self.font_s.render(f"IN {type(self.data_link).__name__.upper()} MODE", True, C_GRAY_LIGHT), (10, 108))
+            stats = (f"PKTS {getattr(self.data_link, 'packets_received', 0)}  "
+                     f"BATCHES {getattr(self.data_link, 'batches_decoded', 0)}")
+            screen.blit(self.font_xs.render(stats, True, C_WHITE), (10, 136))
+            return
+        now = time.time()
+        report = health.report(now, EXPECTED_ROWS)
+
+        # Header: link state and ingest cost
+        link_col = C_GREEN_NAV if link_data['connected'] else C_RED
+        screen.blit(self.font_s.render("LINK UP" if link_data['connected'] else "LINK DOWN", True, link_col), (10, 40))
+        stats = (f"PKTS {health.packets}  INGEST {health.ingest_avg * 1000:.2f}/{health.ingest_max * 1000:.1f} MS"
+                 f"  LAYOUTS {len(health.layouts)}")
+        screen.blit(self.font_xs.render(stats, True, C_WHITE), (110, 43))
+
+        # Two columns of rows: ROW, rate, mean interval, jitter, age
+        line_h, col_w, rows_per_col = 15, SCREEN_W // 2, 10
+        fields_x = (0, 35, 85, 135, 185)
+        for col in range(2):
+            for fx, label in zip(fields_x, ("ROW", "HZ", "INT MS", "JIT MS", "AGE")):
+                screen.blit(self.font_xs.render(label, True, C_GRAY_LIGHT), (10 + col * col_w + fx, 65))
+        worst = None
+        for i, (idx, count, rate, interval_ms, jitter_ms, stale) in enumerate(report[:rows_per_col * 2]):
+            x, y = 10 + (i // rows_per_col) * col_w, 82 + (i % rows_per_col) * line_h
+            if stale is None or stale > 2.0:
+                color, age = C_RED, "----" if stale is None else f"{min(stale, 999):.0f}S"
+            elif interval_ms > 0 and jitter_ms > interval_ms * 0.5:
+                color, age = C_AMBER, f"{stale:.1f}"
+            else:
+                color, age = C_GREEN_NAV, f"{stale:.1f}"
+            if idx not in EXPECTED_ROWS: color = C_GRAY_LIGHT
+            if stale is not None and (worst is None or jitter_ms > worst[1]): worst = (idx, jitter_ms)
+            for fx, val in zip(fields_x, (str(idx), f"{rate:.1f}", f"{interval_ms:.0f}", f"{jitter_ms:.1f}", age)):
+                screen.blit(self.font_xs.render(val, True, color), (x + fx, y))
+
+        # Inter-arrival histogram (ms bins) of the row with the worst jitter
+        if worst is not None:
+            hist = health.histogram(worst[0])
+            peak = max(max(hist), 1)
+            y0, bar_w = self.BOTTOM_LIMIT - 16, 40
+            labels = [f"<{int(e * 1000)}" for e in HIST_EDGES] + [">"]
+            screen.blit(self.font_xs.render(f"ROW {worst[0]}", True, C_CYAN), (10, y0 - 16))
+            for b, n in enumerate(hist):
+                x = 60 + b * bar_w
+                h = int(20 * n / peak)
+                pygame.draw.rect(screen, C_CYAN, (x, y0 - h, bar_w - 6, h))
+                screen.blit(self.font_xs.render(labels[b], True, C_GRAY_LIGHT), (x, y0 + 1))
+
+    def _draw_page_events(self, screen, link_data):
+        # Events latched at packet rate by events.EventDetectors (travel in the frame)
+        def utc(ts): return time.strftime("%H:%M:%SZ", time.gmtime(ts)) if ts else "--:--:--"
+        screen.blit(self.font_s.render("EVENTS", True, C_CYAN), (10, 40))
+        screen.blit(self.font_xs.render("TAP FOR LINK", True, C_GRAY_LIGHT), (110, 43))
+
+        y, line_h, col1, col2 = 70, 22, 10, 130
+        vs = link_data['ldg_vs_fpm']
+        vs_col = C_RED if vs < -600 else (C_AMBER if vs < -360 else C_GREEN_NAV)
+        screen.blit(self.font_s.render("TOUCHDOWN", True, C_GRAY_LIGHT), (col1, y))
+        if link_data['ldg_time']:
+            screen.blit(self.font_s.render(f"{vs:.0f} FPM   {utc(link_data['ldg_time'])}", True, vs_col), (col2, y))
         else:
-        # No flow, endurance unknown
-            endurance_str = "--:--" 
-            endurance_hr = 0.0
-        
-        rng = endurance_hr * self.fms.current_gs
-        
+            screen.blit(self.font_s.render("---", True, C_WHITE), (col2, y))
+        y += line_h + 4
+
+        for i in range(3):
+            t_start, peak = link_data['start_time'][i], link_data['start_egt_peak'][i]
+            txt = f"PK EGT {peak:.0f}   {utc(t_start)}" if t_start else "---"
+            screen.blit(self.font_s.render(f"START ENG {i+1}", True, C_GRAY_LIGHT), (col1, y))
+            screen.blit(self.font_s.render(txt, True, C_AMBER if peak > LIMIT_EGT_MAX else C_WHITE), (col2, y))
+            y += line_h
+        y += 4
+
+        for i in range(3):
+            t_exc = link_data['n1_exc_time'][i]
+            txt = (f"{link_data['n1_exc_peak'][i]:.1f}%  {link_data['n1_exc_sec'][i]:.1f}S   {utc(t_exc)}"
+                   if t_exc else "---")
+            screen.blit(self.font_s.render(f"N1 EXCD {i+1}", True, C_GRAY_LIGHT), (col1, y))
+            screen.blit(self.font_s.render(txt, True, C_AMBER if t_exc else C_WHITE), (col2, y))
+            y += line_h
+        y += 4
+
+        for label, t_key, d_key, ext, ret in (("GEAR", 'gear_move_time', 'gear_move_dir', "DN", "UP"),
+                                              ("FLAPS", 'flap_move_time', 'flap_move_dir', "EXT", "RET")):
+            t_move = link_data[t_key]
+            txt = f"{ext if link_data[d_key] > 0 else ret} START   {utc(t_move)}" if t_move else "---"
+            screen.blit(self.font_s.render(label, True, C_GRAY_LIGHT), (col1, y))
+            screen.blit(self.font_s.render(txt, True, C_WHITE), (col2, y))
+            y += line_h
+
+    def _draw_page_prog(self, screen):
         # ---------------------------------------------------------
-        # 2. Trip Calculation (Trip, EFOB)
+        # 1. Fuel State (cached in fms.derived, recomputed only when an input changes)
         # ---------------------------------------------------------
-        trip_time_hr = self.fms.time_to_dest / 3600.0
-        trip_burn = trip_time_hr * ff_kg_hr
-        efob = fuel_kg - trip_burn
-        
-        fin_reserve = getattr(self.fms, 'fin_reserve', 0.0)
-        abv_rsv = efob - fin_reserve
+        derived = self.fms.derived
+        st = self.fms.state
+        fuel_kg, ff_kg_hr = derived['fuel_kg'], derived['ff_kg_hr']
+        endurance_str, rng = derived['endurance_str'], derived['range_nm']
+        efob, abv_rsv = derived['efob_kg'], derived['abv_rsv_kg']
         
         rsv_color = C_GREEN_NAV if abv_rsv >= 0 else C_RED
         prefix = "+" if abv_rsv >= 0 else ""
         
         # ETA Calculation
         eta_dest = "--:--"
-        if self.fms.is_loaded and self.fms.time_to_dest > 0:
-            arr_time = time.time() + self.fms.time_to_dest
+        if self.fms.is_loaded and st.time_to_dest > 0:
+            arr_time = time.time() + st.time_to_dest
             t = time.gmtime(arr_time)
             eta_dest = f"{t.tm_hour:02d}:{t.tm_min:02d}Z"
 
         # ---------------------------------------------------------
         # 3. Draw UI (Lines 1-3)
         # ---------------------------------------------------------
-        y = 80; col1 = 10; col2 = 250; label_w = 110; line_h = 35
+        y = 80; col1 = 10; col2 = 250; label_w = 110; line_h = 32
         
         # Line 1: Fuel & Flow
         self._kv_aligned(screen, "FUEL OB", f"{int(fuel_kg):,} KG", col1, y, label_w, C_WHITE)
@@ -498,7 +616,7 @@ class AdvDisplay:
         self._kv_aligned(screen, "ETA DEST", eta_dest, col1, y, label_w, C_WHITE)
         
         # Right: Check Ground State (GS < 30kts)
-        is_on_ground = self.fms.current_gs < 30
+        is_on_ground = st.gs_kt < 30
         
         if is_on_ground:
             # [Ground Mode] Show TOBT
@@ -506,7 +624,7 @@ class AdvDisplay:
             self._kv_aligned(screen, "TOBT", tobt_val, col2, y, 50, C_CYAN, size="M") 
         else:
             # [Flight Mode] Show ETE
-            rem_m = int(self.fms.time_to_dest / 60)
+            rem_m = int(st.time_to_dest / 60)
             hh = rem_m // 60; mm = rem_m % 60
             ete_str = f"(IN {hh:02d}:{mm:02d})"
             self._kv_aligned(screen, "ETE", ete_str, col2, y, 50, C_GRAY_LIGHT, size="S") 
@@ -519,44 +637,49 @@ class AdvDisplay:
         pygame.draw.line(screen, C_GRAY_DARK, (10, y), (SCREEN_W-10, y), 1)
         y += 10
         
-        td_dist = self.fms.dist_to_td
+        td_dist = st.dist_to_td
         td_str = "---" if td_dist > 9000 else ("PASSED" if td_dist < 0 else f"{int(td_dist)} NM")
         self._kv_aligned(screen, "> T/D", td_str, col1, y, 60, C_WHITE)
         
-        vdev = self.fms.vnav_deviation
+        vdev = st.vnav_deviation
         vdev_str = "OK" if abs(vdev) < 100 else f"{int(vdev)} FT"
         vdev_col = C_GREEN_NAV if abs(vdev) < 500 else C_AMBER
         self._kv_aligned(screen, "VDEV", vdev_str, col2, y, 60, vdev_col)
+        y += line_h
 
-    def _draw_page_navrad(self, screen):
-        # ---------------------------------------------------------
-        # 1. Helper Calculations
-        # ---------------------------------------------------------
-        def haversine_calc(lat1, lon1, lat2, lon2):
-            R = 3440.065 
-            try:
-                phi1, phi2 = math.radians(lat1), math.radians(lat2)
-                dphi = math.radians(lat2 - lat1); dlam = math.radians(lon2 - lon1)
-                a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlam/2)**2
-                return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1-a)))
-            except: return 999.0
-
-        def bearing_calc(lat1, lon1, lat2, lon2):
-            try:
-                lat1, lon1 = math.radians(lat1), math.radians(lon1)
-                lat2, lon2 = math.radians(lat2), math.radians(lon2)
-                y = math.sin(lon2 - lon1) * math.cos(lat2)
-                x = math.cos(lat1)*math.sin(lat2) - math.sin(lat1)*math.cos(lat2)*math.cos(lon2 - lon1)
-                return (math.degrees(math.atan2(y, x)) + 360) % 360
-            except: return 0
+        # Fuel used since last reset (packet-rate totalizer, tap to reset after a YES/NO confirm)
+        used = self.fms.fuel_used.used()
+        self.rect_fuel_used.y = y - 4
+        self._kv_aligned(screen, "FUEL USED", f"{int(sum(used)):,} KG", col1, y, label_w, C_WHITE)
+        self._kv_aligned(screen, "ENG", " / ".join(f"{int(u)}" for u in used), col2, y, 40, C_GRAY_LIGHT, size="S")
+
+    def _draw_popup_fuel_reset(self, screen):
+        s = pygame.Surface((SCREEN_W, SCREEN_H))
+        s.set_alpha(200)
+        s.fill((0,0,0))
+        screen.blit(s, (0,0))
+
+        title = self.font_m.render("RESET FUEL USED", True, C_AMBER)
+        screen.blit(title, (SCREEN_W//2 - title.get_width()//2, 60))
+        msg1 = self.font_s.render(f"CLEAR {int(self.fms.fuel_used.total()):,} KG?", True, C_WHITE)
+        screen.blit(msg1, (SCREEN_W//2 - msg1.get_width()//2, 105))
+
+        pygame.draw.rect(screen, C_GREEN, self.rect_confirm_yes)
+        pygame.draw.rect(screen, C_RED, self.rect_confirm_no)
 
+        t_y = self.font_m.render("YES", True, C_BLACK)
+        t_n = self.font_m.render("NO", True, C_WHITE)
+        screen.blit(t_y, t_y.get_rect(center=self.rect_confirm_yes.center))
+        screen.blit(t_n, t_n.get_rect(center=self.rect_confirm_no.center))
+
+    def _draw_page_navrad(self, screen, link_data):
         # ---------------------------------------------------------
-        # 2. Fetch Data
+        # 1. Fetch Data
         # ---------------------------------------------------------
-        row97 = self.data_link.get_row(97)
-        row98 = self.data_link.get_row(98)
-        row99  = self.data_link.get_row(99)   # NAV 1 Deflection
-        row100 = self.data_link.get_row(100)  # NAV 2 Deflection
+        row97 = link_data.get_row(97)
+        row98 = link_data.get_row(98)
+        row99  = link_data.get_row(99)   # NAV 1 Deflection
+        row100 = link_data.get_row(100)  # NAV 2 Deflection
 
         curr_nav1_freq = f"{row97[0]/100:.2f}"
         curr_nav2_freq = f"{row97[4]/100:.2f}"
@@ -571,9 +694,9 @@ class AdvDisplay:
         curr_nav2_dme = f"{d2:.1f}" if d2 > 0.1 else "---.-"
 
         # ---------------------------------------------------------
-        # 3. List Matching Logic
+        # 2. List Matching Logic
         # ---------------------------------------------------------
-        pos_row = self.data_link.get_row(20)
+        pos_row = link_data.get_row(20)
         ac_lat = pos_row[0]
         ac_lon = pos_row[1]
         
@@ -584,18 +707,18 @@ class AdvDisplay:
              ac_lon = getattr(self.fms, 'last_lon', 0.0)
         display_items = []
         
-        start_idx = max(0, self.fms.active_idx - 1)
-        scan_count = 0
-        
-        # Scan more rows
-        for i in range(start_idx, len(self.fms.legs)):
-            if scan_count >= 10: break 
-            leg = self.fms.legs[i]
-            freq = getattr(leg, 'frequency', '')
-            if not freq: continue
-            
-            dist = haversine_calc(ac_lat, ac_lon, leg.lat, leg.lon)
-            brg_to = bearing_calc(ac_lat, ac_lon, leg.lat, leg.lon)
+        # Next 10 navaid legs from the previous fix on; distances and bearings in one batch
+        st = self.fms.state
+        plan, active_idx = st.plan, st.active_idx # same tick: the index belongs to this OFP
+        start_idx = max(0, active_idx - 1)
+        navaids = plan.navaid_idx
+        scan = navaids[bisect_left(navaids, start_idx):][:10]
+        dists = plan.fixes.distances_nm(ac_lat, ac_lon, scan)
+        brgs = plan.fixes.bearings_deg(ac_lat, ac_lon, scan)
+
+        for i, dist, brg_to in zip(scan, dists, brgs):
+            leg = plan.legs[i]
+            freq = leg.frequency
             radial = (brg_to + 180) % 360 
             
             is_tuned = False
@@ -604,12 +727,11 @@ class AdvDisplay:
             
             display_items.append({
                 'id': leg.ident, 'freq': freq, 'dist': dist, 'radial': radial,
-                'is_active': (i == self.fms.active_idx), 'is_tuned': is_tuned
+                'is_active': (i == active_idx), 'is_tuned': is_tuned
             })
-            scan_count += 1
 
         # ---------------------------------------------------------
-        # 4. Draw UI
+        # 3. Draw UI
         # ---------------------------------------------------------
         SPLIT_X = 210 # Split Panels
         
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from config import *
+from data_link import TelemetrySource, BATCH_MAX_PACKETS, PACKET_MAX, LINK_TIMEOUT_SEC
+
+class TelemetryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, link):
+        self.link = link
+
+    def datagram_received(self, data, addr):
+        self.link._on_datagram(data)
+
+    def error_received(self, exc):
+        print(f"AsyncDataLink: {exc}")
+
+class AsyncDataLink(TelemetrySource):
+    """
+    asyncio telemetry source with the DataLink surface (data, snapshot(),
+    get_row(), stop()), so network fetches and local servers can share its loop.
+
+    Two ways to drive it:
+    - Inside a running loop: await link.open(); datagrams are decoded as they arrive.
+    - From the pygame main loop: link.start() once, then link.pump() every frame.
+      pump() runs one non-blocking loop iteration on the calling thread, so ingest
+      happens at a fixed point in the frame and no second thread holds the GIL.
+    Datagrams arriving in the same loop iteration are coalesced into one decode.
+    """
+    def __init__(self, ip=UDP_IP, port=UDP_PORT, loop=None):
+        super().__init__()
+        self.addr = (ip, port)
+        self.loop = loop
+        self.transport = None
+        self.running = False
+        self._pending = 0
+        self._received = 0
+        self._pumping = False
+        self._flush_handle = None
+        self._timeout_handle = None
+        self._own_loop = False
+
+    # --- LIFECYCLE ---
+    async def open(self):
+        if self.loop is None: self.loop = asyncio.get_running_loop()
+        self.transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: TelemetryProtocol(self), local_addr=self.addr)
+        self.running = True
+        print(f"AsyncDataLink: LISTENING TO PORT {self.transport.get_extra_info('sockname')[1]}...")
+
+    def start(self):
+        """Opens the link on a private loop driven by pump() (drop-in for DataLink.start())."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self._own_loop = True
+        self.loop.run_until_complete(self.open())
+
+    def pump(self):
+        """Processes every datagram queued since the last call, without blocking."""
+        if not self.running or self.loop.is_running(): return
+        # The selector transport reads one datagram per loop iteration, so iterate
+        # until the socket is empty (or the batch is full), then decode once
+        self._pumping = True
+        try:
+            while self._pending < BATCH_MAX_PACKETS:
+                before = self._received
+                self.loop.call_soon(self.loop.stop)
+                self.loop.run_forever()
+                if self._received == before: break
+        finally:
+            self._pumping = False
+        if self._pending: self._flush()
+
+    def stop(self):
+        self.running = False
+        for h in (self._flush_handle, self._timeout_handle):
+            if h is not None: h.cancel()
+        if self.transport is not None: self.transport.close()
+        if self._own_loop and not self.loop.is_running():
+            self.loop.run_until_complete(asyncio.sleep(0)) # let the transport finish closing
+            self.loop.close()
+
+    def join(self, timeout=None):
+        """DataLink compatibility: nothing runs in the background."""
+
+    # --- INGEST ---
+    def _on_datagram(self, data):
+        self._received += 1
+        n = len(data)
+        if n > PACKET_MAX: return
+        i = self._pending
+        self.batch_buf[i * PACKET_MAX : i * PACKET_MAX + n] = data
+        self.batch_lens[i] = n
+        self._pending = i + 1
+        if self._pending == BATCH_MAX_PACKETS:
+            self._flush()
+        elif self._flush_handle is None and not self._pumping:
+            # Decode once the rest of this loop iteration's datagrams are in
+            self._flush_handle = self.loop.call_soon(self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        count, self._pending = self._pending, 0
+        if not count: return
+        now = time.time()
+        if not self.ingest_batch(count, now): return
+        if self._timeout_handle is not None: self._timeout_handle.cancel()
+        self._timeout_handle = self.loop.call_later(LINK_TIMEOUT_SEC, self._link_lost)
+
+    def _link_lost(self):
+        self._timeout_handle = None
+        self.data['connected'] = False
+        self._publish(time.time())
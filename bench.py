@@ -0,0 +1,971 @@
+"""
+Offline micro-benchmarks for the MFD data path.
+
+Usage: python bench.py <name> [args]   (run without arguments to list benchmarks)
+"""
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+from config import *
+from channels import STORE_SIZE, TelemetryFrame
+from data_link import DataLink, PacketDecoder, PACKET_MAX, COALESCE_EXEMPT_ROWS
+from derived import DerivedParams
+import geodesy
+import xplane_sim
+from xplane_sim import SIM_ROWS, MARKER_ROW, MARKER_COL
+
+# Rows listed in main.show_udp_instructions()
+BENCH_ROWS = [3, 4, 13, 14, 17, 20, 27, 33, 41, 45, 47, 49, 63, 74, 97, 98, 99, 100, 152]
+
+def make_packet(rows, seed=0.0):
+    """Builds a DATA packet with plausible non-zero values for the given rows."""
+    body = b''.join(struct.pack('<i8f', idx, *[seed + idx + c * 0.5 for c in range(8)]) for idx in rows)
+    return b'DATA\x00' + body
+
+def legacy_decode(packet, data, raw_rows):
+    """The pre-table decoder (struct.unpack per row + if/elif chain), kept as a baseline."""
+    if packet[0:4] != b'DATA': return
+    body = packet[5:]
+    num_rows = len(body) // 36
+    for i in range(num_rows):
+        row = body[i*36 : (i+1)*36]
+        vals = struct.unpack('<iffffffff', row)
+        idx = int(vals[0])
+        raw_rows[idx] = [vals[1], vals[2], vals[3], vals[4], vals[5], vals[6], vals[7], vals[8]]
+        if idx == 41: data['n1'] = [vals[1], vals[2], vals[3]]
+        elif idx == 42: data['n2'] = [vals[1], vals[2], vals[3]]
+        elif idx == 45:
+            ff_list = [vals[1] * 3.02, vals[2] * 3.02, vals[3] * 3.02]
+            data['ff'] = ff_list
+            data['total_ff_kg_hr'] = sum(ff_list)
+        elif idx == 47: data['egt'] = [vals[1], vals[2], vals[3]]
+        elif idx == 49: data['oil_p'] = [vals[1], vals[2], vals[3]]
+        elif idx == 27: data['reverse_state'] = [vals[1], vals[2], vals[3]]
+        elif idx == 33:
+            current_vals = [vals[1], vals[2], vals[3]]
+            data['starter_time'] = current_vals
+            for eng_i in range(3):
+                data['starter_active'][eng_i] = current_vals[eng_i] > 0.0
+        elif idx == 14:
+            data['gear_pos'] = vals[1]
+            data['park_brake'] = vals[2]
+        elif idx == 13:
+            data['stab_raw'] = vals[1]
+            data['stab_pos'] = vals[1] * 5.488
+            data['flaps'] = vals[4]
+            data['slats'] = vals[6]
+            data['sbrk'] = vals[7]
+        elif idx == 74: data['elev_pos'] = vals[1]
+        elif idx == 63:
+            data['fuel_weight'] = vals[3] * 0.453592
+            data['total_fuel_kg'] = data['fuel_weight']
+            data['total_weight'] = vals[6] * 0.453592
+            data['cg_raw'] = vals[8]
+            data['cg_mac'] = data['cg_raw'] * CG_SLOPE + CG_INTERCEPT
+        elif idx == 3:
+            data['ias_kt'] = vals[1]
+            data['tas_kt'] = vals[3]
+            data['gs_kt'] = vals[4]
+        elif idx == 4: data['vvi'] = vals[3]
+        elif idx == 152:
+            data['wind_spd'] = vals[6]
+            data['wind_dir'] = vals[7]
+        elif idx == 20:
+            data['lat'] = vals[1]
+            data['lon'] = vals[2]
+            data['alt_msl_ft'] = vals[6]
+        elif idx == 17:
+            data['pitch'] = vals[1]
+            data['roll'] = vals[2]
+            data['hdg'] = vals[5]
+
+def _rate(fn, n, repeat=5):
+    """Best-of-repeat calls per second."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        best = min(best, time.perf_counter() - t0)
+    return n / best
+
+def bench_decode(n=20000, batch=16):
+    """
+    Packets/sec decoded: legacy per-row path vs. table-driven PacketDecoder,
+    then the cost of one drain-and-coalesce batch of queued packets.
+    """
+    packet = make_packet(BENCH_ROWS)
+    dec = PacketDecoder()
+    legacy_data, legacy_rows = {'starter_active': [False] * 3}, {}
+    now = time.time()
+
+    # Sanity check: both paths agree on every key the legacy path writes
+    legacy_decode(packet, legacy_data, legacy_rows); dec.decode(packet, now)
+    for k, v in legacy_data.items():
+        if k == 'starter_active': continue
+        got = dec.data[k]
+        assert (list(got) if isinstance(v, list) else got) == (v if isinstance(v, list) else float(v)), k
+    for idx in BENCH_ROWS:
+        assert list(dec.data.get_row(idx)) == legacy_rows[idx], idx
+
+    r_old = _rate(lambda: legacy_decode(packet, legacy_data, legacy_rows), n)
+    r_new = _rate(lambda: dec.decode(packet, now), n)
+    print(f"decode ({len(BENCH_ROWS)} rows, {len(packet)} bytes/packet)")
+    print(f"  legacy  : {r_old:10.0f} pkt/s  {1e6/r_old:6.1f} us/pkt")
+    print(f"  decoder : {r_new:10.0f} pkt/s  {1e6/r_new:6.1f} us/pkt  (x{r_new/r_old:.2f})")
+
+    # Older packets of a batch only decode their every_sample rows: this stays near one packet's cost
+    batch = int(batch)
+    buf, lens = bytearray(batch * PACKET_MAX), [len(packet)] * batch
+    for i in range(batch): buf[i * PACKET_MAX : i * PACKET_MAX + len(packet)] = packet
+    r_batch = _rate(lambda: dec.decode_batch(buf, lens, batch, now), max(1, n // batch))
+    exempt = sorted(COALESCE_EXEMPT_ROWS & set(BENCH_ROWS))
+    print(f"  batch   : {1e6/r_batch:10.1f} us per {batch}-packet batch  (every_sample rows {exempt})")
+
+# Engine 1 start, then idle and the spool-up to takeoff: (t, starter engaged, N1 %, N2 %, EGT C)
+START_PROFILE = ((0, 0, 0.0, 0.0, 20.0), (2, 1, 0.0, 0.0, 20.0), (12, 1, 5.0, 20.0, 80.0), (18, 1, 10.0, 30.0, 640.0),
+                 (28, 1, 17.0, 50.0, 560.0), (32, 0, 20.0, 58.0, 520.0), (60, 0, 21.0, 60.0, 480.0),
+                 (70, 0, 95.0, 98.0, 880.0), (100, 0, 95.0, 98.0, 870.0))
+
+def bench_events(rate=20):
+    """
+    Start-EGT detector on a realistic engine start fed through the decoder:
+    with the documented rows (no N2) the start ends at starter cut-out, and
+    its peak is the light-off peak, not the later spool-up to takeoff.
+    """
+    from events import START_CUTOUT_SEC, START_N2_DONE
+    rate, t0 = int(rate), 1e6
+    cut = next(p[0] for p in START_PROFILE[1:] if not p[1])
+    for rows in ((33, 41, 47), (33, 41, 42, 47)):
+        dec, timer, ended, k = PacketDecoder(), 0.0, None, 0
+        for tick in range(START_PROFILE[-1][0] * rate):
+            t = tick / rate
+            while START_PROFILE[k + 1][0] <= t: k += 1
+            (ta, on, *a), (tb, _, *b) = START_PROFILE[k], START_PROFILE[k + 1]
+            n1, n2, egt = (va + (vb - va) * (t - ta) / (tb - ta) for va, vb in zip(a, b))
+            if on: timer += 1.0 / rate # X-Plane's starter timer runs while the starter is engaged
+            vals = {33: timer, 41: n1, 42: n2, 47: egt}
+            packet = b'DATA\x00' + b''.join(struct.pack('<i8f', idx, vals[idx], *[0.0] * 7) for idx in rows)
+            dec.decode(packet, t0 + t)
+            if ended is None and dec.data['start_time'][0] and dec.events._start_ts[0] <= 0.0: ended = t
+        peak = dec.data['start_egt_peak'][0]
+        print(f"start egt (rows {rows}): started {dec.data['start_time'][0] - t0:.2f} s  ended {ended:.2f} s  "
+              f"peak {peak:.0f} C")
+        assert abs(dec.data['start_time'][0] - t0 - START_PROFILE[1][0]) < 1e-6
+        if 42 in rows:
+            assert ended < cut and dec.data['n2'][0] >= START_N2_DONE
+        else:
+            assert cut <= ended <= cut + START_CUTOUT_SEC + 0.25 + 1.0 / rate, ended
+        assert peak == max(p[4] for p in START_PROFILE[:4]), peak
+
+class PollingDataLink(DataLink):
+    """The pre-selector receive loop (non-blocking recv + 20 ms sleep), kept as a baseline."""
+    def run(self):
+        last_time = time.time()
+        while self.running:
+            try:
+                packet, _ = self.sock.recvfrom(2048)
+                now = time.time()
+                if not self.decoder.decode(packet, now): continue
+                last_time = now
+                self.data['connected'] = True
+            except (BlockingIOError, OSError):
+                time.sleep(0.02)
+            if time.time() - last_time > 1.0:
+                self.data['connected'] = False
+
+def _measure_latency(link_cls, samples, gap):
+    """Sends row 20 packets with a unique latitude and times arrival -> link.data update."""
+    link = link_cls(ip="127.0.0.1", port=0)
+    addr = link.sock.getsockname()
+    link.start()
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rng = random.Random(1)
+    lat_ms = []
+    try:
+        for k in range(samples):
+            marker = float(k + 1)
+            pkt = b'DATA\x00' + struct.pack('<i8f', 20, marker, 0, 0, 0, 0, 0, 0, 0)
+            time.sleep(gap * rng.uniform(0.5, 1.5))
+            t0 = time.perf_counter()
+            tx.sendto(pkt, addr)
+            while link.data['lat'] != marker:
+                if time.perf_counter() - t0 > 1.0: break
+                time.sleep(0.0001)
+            lat_ms.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        tx.close()
+        t_stop = time.perf_counter()
+        link.stop(); link.join(2.0)
+        stop_ms = (time.perf_counter() - t_stop) * 1000.0
+    lat_ms.sort()
+    return lat_ms, stop_ms
+
+def bench_latency(samples=200, gap=0.02):
+    """Packet arrival -> link.data update latency: 20 ms polling vs. selector receive."""
+    print(f"latency ({samples} packets, ~{gap*1000:.0f} ms apart)")
+    for name, cls in (("polling", PollingDataLink), ("selector", DataLink)):
+        lat, stop_ms = _measure_latency(cls, samples, gap)
+        p50, p95 = lat[len(lat) // 2], lat[int(len(lat) * 0.95)]
+        print(f"  {name:9s}: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  max {lat[-1]:6.2f} ms  stop() {stop_ms:6.1f} ms")
+
+def bench_coalesce(rates=(100, 500, 2000), seconds=2.0):
+    """Ingest CPU per second of traffic vs. send rate, with and without drain-and-coalesce."""
+    packet = make_packet(BENCH_ROWS)
+    print(f"coalesce ({len(BENCH_ROWS)} rows/packet, {seconds:.0f} s per run)")
+    for interval, name in ((0.0, "per-packet"), (None, "coalesced")):
+        for rate in rates:
+            link = DataLink(ip="127.0.0.1", port=0)
+            if interval is not None: link.batch_interval = interval
+            link.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            addr = link.sock.getsockname()
+            link.start()
+            tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            cpu0, t0, sent = time.process_time(), time.perf_counter(), 0
+            while time.perf_counter() - t0 < seconds:
+                due = int((time.perf_counter() - t0) * rate)
+                while sent < due:
+                    tx.sendto(packet, addr); sent += 1
+                time.sleep(0.001)
+            time.sleep(0.05)
+            cpu = time.process_time() - cpu0
+            link.stop(); link.join(2.0); tx.close()
+            print(f"  {name:10s} {rate:5d} pkt/s: {link.packets_received:6d} rx  "
+                  f"{link.batches_decoded:6d} decodes  process CPU {cpu / seconds * 100:5.1f} %")
+
+def bench_alloc(warmup=500, n=5000, burst=4):
+    """
+    tracemalloc check on the real receive path (recv_into + ingest_batch): nothing
+    is retained per packet. Publishing allocates one TelemetryFrame per batch (a
+    copy of the channel array), freed when the next frame replaces it; that
+    per-batch cost is reported and bounded, not claimed to be zero.
+    """
+    packet = make_packet(BENCH_ROWS)
+    link = DataLink(ip="127.0.0.1", port=0)
+    addr = link.sock.getsockname()
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    frame_bytes = STORE_SIZE * 8
+
+    def ingest(packets):
+        for _ in range(packets):
+            tx.sendto(packet, addr)
+        count = link._drain()
+        link.ingest_batch(count, time.time())
+
+    tracemalloc.start()
+    try:
+        for size in (1, burst):
+            for _ in range(warmup): ingest(size)
+            before = tracemalloc.take_snapshot()
+            for _ in range(n): ingest(size)
+            after = tracemalloc.take_snapshot()
+            only_link = [tracemalloc.Filter(True, "*data_link.py"), tracemalloc.Filter(True, "*channels.py")]
+            diff = after.filter_traces(only_link).compare_to(before.filter_traces(only_link), 'lineno')
+            net = sum(d.size_diff for d in diff)
+            blocks = sum(d.count_diff for d in diff)
+
+            # Transient allocation of one batch: peak above the steady state while it is ingested
+            for _ in range(size): tx.sendto(packet, addr)
+            count = link._drain()
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            link.ingest_batch(count, time.time())
+            per_batch = tracemalloc.get_traced_memory()[1] - base
+
+            print(f"alloc ({'single packet' if size == 1 else f'{size}-packet bursts'}, {n * size} packets after warm-up): "
+                  f"net {net} bytes / {blocks} blocks -> {net / (n * size):.3f} bytes/packet retained")
+            print(f"  publish: {per_batch} bytes allocated per batch (one TelemetryFrame, {frame_bytes} bytes of channels)")
+            # A single object retained per packet would be >= 24 bytes/packet
+            assert net / (n * size) < 1.0, [str(d) for d in diff if d.size_diff > 0]
+            # Nothing but the published frame (array + object header) is allocated per batch
+            assert per_batch < frame_bytes + 1024, per_batch
+    finally:
+        tracemalloc.stop()
+        tx.close(); link.stop()
+
+def bench_snapshot(n=20000):
+    """Cost of publishing one frame: per-key dict copy vs. single ChannelStore buffer copy."""
+    dec = PacketDecoder()
+    dec.decode(make_packet(BENCH_ROWS), time.time())
+    as_dict = {k: list(v) if k in ('n1', 'n2', 'egt', 'ff', 'oil_p', 'reverse_state', 'starter_time', 'starter_active')
+               else v for k, v in dec.data.items()}
+    rows = {idx: tuple(dec.data.get_row(idx)) for idx in BENCH_ROWS}
+
+    def dict_capture():
+        values = {k: tuple(v) if type(v) is list else v for k, v in as_dict.items()}
+        return values, dict(rows)
+
+    r_old = _rate(dict_capture, n)
+    r_new = _rate(lambda: TelemetryFrame.capture(dec.data, 1, 0.0), n)
+    print(f"snapshot ({STORE_SIZE * 8} byte buffer)")
+    print(f"  dict copy   : {1e6/r_old:6.2f} us/frame")
+    print(f"  buffer copy : {1e6/r_new:6.2f} us/frame")
+
+class StressLink(DataLink):
+    """DataLink that timestamps each publish and measures its own thread CPU time."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.published = [] # (perf_counter at publish, newest packet marker in the frame)
+        self.thread_cpu = 0.0
+
+    def _publish(self, now):
+        super()._publish(now)
+        self.published.append((time.perf_counter(), self.data.get_row(MARKER_ROW)[MARKER_COL]))
+
+    def run(self):
+        cpu0 = time.thread_time()
+        try: super().run()
+        finally: self.thread_cpu = time.thread_time() - cpu0
+
+def bench_stress(*rates, seconds=5.0):
+    """
+    Drives DataLink with xplane_sim (separate process, all 19 rows) and reports
+    per rate: received/decoded packets, drop rate, ingest thread CPU and
+    send -> frame published latency. Default rates 20, 100, 1000 pkt/s.
+    """
+    rates = [float(r) for r in rates] or [20.0, 100.0, 1000.0]
+    print(f"stress ({len(SIM_ROWS)} rows/packet, {seconds:.0f} s per rate, profile 'flight')")
+    for rate in rates:
+        total = int(rate * seconds)
+        send_times = multiprocessing.Array('d', total, lock=False)
+        link = StressLink(ip="127.0.0.1", port=0)
+        addr = link.sock.getsockname()
+        link.start()
+        tx = multiprocessing.Process(target=xplane_sim.send, args=(addr, rate, seconds, 'flight', SIM_ROWS, send_times))
+        t0 = time.perf_counter()
+        tx.start(); tx.join()
+        time.sleep(0.1) # let the link drain
+        wall = time.perf_counter() - t0
+        link.stop(); link.join(2.0)
+
+        lat = sorted((t_pub - send_times[int(m)]) * 1000.0 for t_pub, m in link.published
+                     if 0 <= m < total and send_times[int(m)] > 0)
+        rx = link.packets_received
+        drop = 1.0 - rx / total if total else 0.0
+        p = lambda q: lat[min(len(lat) - 1, int(len(lat) * q))] if lat else float('nan')
+        print(f"  {rate:6.0f} pkt/s: {rx:6d}/{total:<6d} rx  drop {drop * 100:5.2f} %  "
+              f"{rx / wall:7.0f} pkt/s ingested  {len(link.published):5d} frames  "
+              f"ingest CPU {link.thread_cpu / wall * 100:5.1f} % ({link.thread_cpu / max(rx, 1) * 1e6:5.1f} us/pkt)  "
+              f"latency p50 {p(0.5):5.2f} ms  p95 {p(0.95):5.2f} ms  max {p(1.0):6.2f} ms  "
+              f"decode+publish avg {link.health.ingest_avg * 1000:4.2f} ms  max {link.health.ingest_max * 1000:5.2f} ms")
+
+def bench_pacing(rate=1000, seconds=5.0, frame_work=200000):
+    """
+    Render-loop frame times at FPS while xplane_sim sends at rate pkt/s: DataLink
+    (ingest thread) vs. AsyncDataLink pumped once per frame on the render thread
+    vs. ProcessDataLink (ingest process + shared-memory ring).
+    Each frame runs a fixed amount of pure-Python work standing in for pygame
+    drawing; the time reported excludes the sleep to the next frame.
+    """
+    from async_link import AsyncDataLink
+    from process_link import ProcessDataLink
+    rate = float(rate)
+
+    def render_work(data):
+        acc = 0.0
+        for k in range(frame_work): acc += k * 0.5
+        return acc + data['lat']
+
+    print(f"pacing ({rate:.0f} pkt/s, {seconds:.0f} s, {FPS} FPS, fixed work per frame)")
+    for name, cls in (("thread", DataLink), ("asyncio", AsyncDataLink), ("process", ProcessDataLink)):
+        link = cls(ip="127.0.0.1", port=0)
+        link.start()
+        if isinstance(link, DataLink): addr = link.sock.getsockname()
+        elif isinstance(link, AsyncDataLink): addr = link.transport.get_extra_info('sockname')
+        else: addr = ("127.0.0.1", link.port)
+        tx = multiprocessing.Process(target=xplane_sim.send, args=(addr, rate, seconds))
+        tx.start()
+        frames, cpu0 = [], time.process_time()
+        t_end = time.perf_counter() + seconds
+        next_frame = time.perf_counter()
+        while time.perf_counter() < t_end:
+            t0 = time.perf_counter()
+            link.pump()
+            render_work(link.snapshot())
+            frames.append((time.perf_counter() - t0) * 1000.0)
+            next_frame += 1.0 / FPS
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+        tx.join()
+        cpu = time.process_time() - cpu0
+        link.stop(); link.join(2.0)
+        frames.sort()
+        p = lambda q: frames[min(len(frames) - 1, int(len(frames) * q))]
+        print(f"  {name:8s}: {len(frames):5d} frames  p50 {p(0.5):6.2f} ms  p95 {p(0.95):6.2f} ms  "
+              f"p99 {p(0.99):6.2f} ms  max {frames[-1]:6.2f} ms  {link.packets_received:5d} rx  "
+              f"{link.batches_decoded:5d} decodes  CPU {cpu / seconds * 100:5.1f} %")
+
+def bench_derived(n=20000):
+    """Per-frame PROG + HOLD derived values: recomputed every frame vs. DerivedParams (paused / live)."""
+    import math
+    fms = dict(fuel_kg=24000.0, ff_kg_hr=5400.0, gs_kt=450.0, time_to_dest=5400.0, fin_reserve=3000.0)
+    hold = dict(hold_inbound_course=270.0, hold_leg_time_min=1.0, hold_tas=250.0)
+    frame = TelemetryFrame.capture(PacketDecoder().data, 1, 0.0)
+
+    def every_frame():
+        fuel, ff = fms['fuel_kg'], fms['ff_kg_hr']
+        end_hr = fuel / ff if ff > 0.5 else 0.0
+        f"{min(int(end_hr), 99):02d}:{int((end_hr - int(end_hr)) * 60):02d}"
+        end_hr * fms['gs_kt']
+        efob = fuel - fms['time_to_dest'] / 3600.0 * ff
+        efob - fms['fin_reserve']
+        rad = math.radians(frame.get('wind_dir', 0.0) - hold['hold_inbound_course'])
+        math.degrees(math.asin(min(1.0, max(-1.0, frame.get('wind_spd', 0.0) * math.sin(rad) / hold['hold_tas']))))
+
+    derived = DerivedParams()
+    names = ('endurance_str', 'range_nm', 'efob_kg', 'abv_rsv_kg', 'hold_wind_corr')
+    def graph_frame():
+        derived.set_frame(frame)
+        derived.update(**fms); derived.update(**hold)
+        for name in names: derived[name]
+
+    r_old = _rate(every_frame, n)
+    r_paused = _rate(graph_frame, n)
+    c0 = derived.computes
+    def graph_live():
+        fms['fuel_kg'] -= 0.01
+        graph_frame()
+    r_live = _rate(graph_live, n)
+    print(f"derived ({len(names)} values read per frame)")
+    print(f"  recompute every frame : {1e6/r_old:6.2f} us/frame")
+    print(f"  graph, inputs steady  : {1e6/r_paused:6.2f} us/frame")
+    print(f"  graph, fuel changing  : {1e6/r_live:6.2f} us/frame  "
+          f"({(derived.computes - c0) / (5 * n):.1f} recomputes/frame)")
+
+def legacy_haversine_nm(lat1, lon1, lat2, lon2):
+    """The per-module haversine/bearing copies before geodesy.py, kept as a baseline."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlam = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlam/2)**2
+    return 3440.065 * (2 * math.atan2(math.sqrt(a), math.sqrt(1-a)))
+
+def legacy_bearing(lat1, lon1, lat2, lon2):
+    lat1, lon1 = math.radians(lat1), math.radians(lon1)
+    lat2, lon2 = math.radians(lat2), math.radians(lon2)
+    y = math.sin(lon2 - lon1) * math.cos(lat2)
+    x = math.cos(lat1)*math.sin(lat2) - math.sin(lat1)*math.cos(lat2)*math.cos(lon2 - lon1)
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+def bench_geodesy(fixes=200, n=2000):
+    """One aircraft position to N flight-plan fixes: per-call haversine vs. geodesy scalar vs. PointSet batch."""
+    rng = random.Random(1)
+    lats = [rng.uniform(30.0, 60.0) for _ in range(int(fixes))]
+    lons = [rng.uniform(-20.0, 40.0) for _ in range(int(fixes))]
+    pts = geodesy.PointSet(lats, lons)
+    lat, lon = 45.0, 10.0
+    idx10 = list(range(0, len(lats), max(1, len(lats) // 10)))[:10]
+    n = int(n)
+
+    d_ref = [legacy_haversine_nm(lat, lon, a, b) for a, b in zip(lats, lons)]
+    b_ref = [legacy_bearing(lat, lon, a, b) for a, b in zip(lats, lons)]
+    err_d = max(abs(x - y) for x, y in zip(d_ref, pts.distances_nm(lat, lon)))
+    err_b = max(min(abs(x - y), 360 - abs(x - y)) for x, y in zip(b_ref, pts.bearings_deg(lat, lon)))
+    print(f"geodesy ({len(lats)} fixes)  max |err| vs legacy: {err_d:.2e} NM, {err_b:.2e} deg")
+
+    cases = (
+        ("distance to all", lambda: [legacy_haversine_nm(lat, lon, a, b) for a, b in zip(lats, lons)],
+                            lambda: [geodesy.haversine_nm(lat, lon, a, b) for a, b in zip(lats, lons)],
+                            lambda: pts.distances_nm(lat, lon)),
+        ("bearing to all",  lambda: [legacy_bearing(lat, lon, a, b) for a, b in zip(lats, lons)],
+                            lambda: [geodesy.bearing_deg(lat, lon, a, b) for a, b in zip(lats, lons)],
+                            lambda: pts.bearings_deg(lat, lon)),
+        ("nearest fix",     lambda: min(range(len(lats)), key=lambda i: legacy_haversine_nm(lat, lon, lats[i], lons[i])),
+                            lambda: min(range(len(lats)), key=lambda i: geodesy.haversine_nm(lat, lon, lats[i], lons[i])),
+                            lambda: pts.nearest(lat, lon)),
+        ("NAV RAD 10 dist+brg", lambda: [(legacy_haversine_nm(lat, lon, lats[i], lons[i]), legacy_bearing(lat, lon, lats[i], lons[i])) for i in idx10],
+                            lambda: [(geodesy.haversine_nm(lat, lon, lats[i], lons[i]), geodesy.bearing_deg(lat, lon, lats[i], lons[i])) for i in idx10],
+                            lambda: (pts.distances_nm(lat, lon, idx10), pts.bearings_deg(lat, lon, idx10))),
+    )
+    print(f"  {'':20s} {'legacy':>10s} {'scalar':>10s} {'PointSet':>10s}   us/call")
+    for name, *fns in cases:
+        us = [1e6 / _rate(fn, n) for fn in fns]
+        print(f"  {name:20s} {us[0]:10.1f} {us[1]:10.1f} {us[2]:10.1f}   (x{us[0] / us[2]:.1f})")
+
+    # k-d tree vs. PointSet scan, over random query positions
+    kd = geodesy.KDTree(pts)
+    qs = [(rng.uniform(30.0, 60.0), rng.uniform(-20.0, 40.0)) for _ in range(64)]
+    assert all(kd.nearest(a, b) == pts.nearest(a, b) for a, b in qs)
+    it = itertools.cycle(qs)
+    kd_cases = (
+        ("nearest fix",       lambda: pts.nearest(*next(it)), lambda: kd.nearest(*next(it))),
+        ("within 200 NM",     lambda: [i for i, d in enumerate(pts.distances_nm(*next(it))) if d <= 200.0],
+                              lambda: kd.within(*next(it), 200.0)),
+    )
+    print(f"  {'':20s} {'PointSet':>10s} {'KDTree':>10s}   us/call")
+    for name, *fns in kd_cases:
+        us = [1e6 / _rate(fn, n // 2) for fn in fns]
+        print(f"  {name:20s} {us[0]:10.1f} {us[1]:10.1f}   (x{us[0] / us[1]:.1f})")
+
+class LegacyFlightLeg:
+    """FlightLeg before FlightPlan (one __dict__ object per leg), kept as a baseline."""
+    def __init__(self, fix_data):
+        self.ident = fix_data.get('ident', 'WPT')
+        self.type = fix_data.get('type', 'wpt')
+        self.lat = float(fix_data.get('pos_lat'))
+        self.lon = float(fix_data.get('pos_long'))
+        self.plan_alt = float(fix_data.get('altitude_feet'))
+        self.msa = float(fix_data.get('mora'))
+        self.stage = fix_data.get('stage', '')
+        self.frequency = fix_data.get('frequency', '')
+        raw_ias = float(fix_data.get('ind_airspeed'))
+        self.plan_spd_kmh = int(raw_ias * 1.852) if raw_ias > 0 else 0
+        self.plan_mach = float(fix_data.get('mach'))
+        self.leg_course = 0
+        self.leg_dist_static = 0.0
+        self.dist_to_go = 0.0
+        self.bearing = 0
+        self.target_alt = 0
+        self.target_vs_fpm = 0
+
+def bench_flightplan(legs=1000, n=200):
+    """Flight-plan storage: list of per-leg objects vs. FlightPlan columns (memory, build, full-route scan)."""
+    from fms_core import FlightPlan
+    rng = random.Random(2)
+    navlog = [{'ident': f"W{i:04d}", 'pos_lat': str(rng.uniform(30.0, 60.0)), 'pos_long': str(rng.uniform(-20.0, 40.0)),
+               'altitude_feet': str(rng.choice((5000, 12000, 35000))), 'mora': "45", 'stage': "CRZ",
+               'ind_airspeed': "280", 'mach': "0.78", 'frequency': "" if i % 4 else "114.30"} for i in range(int(legs))]
+
+    def legacy_build():
+        out, prev = [], None
+        for f in navlog:
+            leg = LegacyFlightLeg(f)
+            if prev:
+                leg.leg_course = int(geodesy.bearing_deg(prev.lat, prev.lon, leg.lat, leg.lon))
+                leg.leg_dist_static = leg.dist_to_go = geodesy.haversine_nm(prev.lat, prev.lon, leg.lat, leg.lon)
+            out.append(leg); prev = leg
+        return out
+
+    def footprint(build):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        obj = build()
+        size = sum(st.size_diff for st in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+        tracemalloc.stop()
+        return obj, size
+
+    old, old_bytes = footprint(legacy_build)
+    new, new_bytes = footprint(lambda: FlightPlan(navlog))
+    assert [l.leg_dist_static for l in old] == list(new.leg_dist_static)
+    n = int(n)
+    print(f"flightplan ({len(navlog)} legs)  bytes/leg excl. shared strings")
+    print(f"  list of FlightLeg : {old_bytes / len(navlog):7.0f} B/leg  build {1e3 / _rate(legacy_build, n // 10):6.2f} ms"
+          f"  scan {1e6 / _rate(lambda: sum(l.leg_dist_static for l in old), n):7.1f} us")
+    print(f"  FlightPlan        : {new_bytes / len(navlog):7.0f} B/leg  build {1e3 / _rate(lambda: FlightPlan(navlog), n // 10):6.2f} ms"
+          f"  scan {1e6 / _rate(lambda: sum(new.leg_dist_static), n):7.1f} us")
+
+def bench_fmsrate(seconds=2.0, legs=200, rate=FMS_RATE_HZ):
+    """
+    Render-loop cost of the FMS: inline FMSCore.update every frame vs. feed() +
+    FMSState read with the fixed-rate FMS thread, plus the thread's achieved rate.
+    """
+    from fms_core import FMSCore
+    from channels import ChannelStore
+    rng = random.Random(3)
+    navlog, lat, lon = [], 50.0, 10.0
+    for i in range(int(legs)):
+        lat += rng.uniform(-0.3, 0.5); lon += rng.uniform(0.2, 0.6)
+        navlog.append({'ident': f"W{i}", 'pos_lat': lat, 'pos_long': lon, 'altitude_feet': 35000})
+    ofp = {'general': {'initial_altitude': 35000}, 'navlog': {'fix': navlog}}
+    store = ChannelStore()
+    for k, v in (('lat', navlog[5]['pos_lat']), ('lon', navlog[5]['pos_long']), ('alt_msl_ft', 35000.0),
+                 ('gs_kt', 450.0), ('total_fuel_kg', 20000.0), ('total_ff_kg_hr', 5000.0)): store[k] = v
+    frame = TelemetryFrame.capture(store, 1, time.time())
+
+    def render_reads(st):
+        st.phase, st.dist_to_go, st.target_alt, st.leg_ete_str(st.active_idx), st.leg_ete_str(len(st.legs) - 1)
+
+    fms = FMSCore(); fms._parse_ofp(ofp)
+    def inline():
+        fms.tick(frame)
+        fms.derived.set_state(fms.state); render_reads(fms.state)
+    r_inline = _rate(inline, 2000)
+
+    fms = FMSCore(); fms._parse_ofp(ofp)
+    fms.start(float(rate))
+    def threaded():
+        fms.feed(frame)
+        fms.derived.set_state(fms.state); render_reads(fms.state)
+    seq0, t0 = fms.state.seq, time.perf_counter()
+    worst, frames = 0.0, 0
+    while time.perf_counter() - t0 < float(seconds):
+        f0 = time.perf_counter(); threaded(); worst = max(worst, time.perf_counter() - f0)
+        frames += 1
+        time.sleep(1.0 / FPS)
+    ticks = (fms.state.seq - seq0) / (time.perf_counter() - t0)
+    fms.stop()
+    print(f"fmsrate ({len(navlog)} legs, FMS thread at {float(rate):.0f} Hz, render at {FPS} fps for {float(seconds):.0f} s)")
+    print(f"  inline update per frame : {1e6 / r_inline:7.1f} us/frame on the render thread")
+    print(f"  feed + state read       : {1e6 / _rate(threaded, 2000):7.1f} us/frame (worst {worst * 1e6:.0f} us over {frames} frames)")
+    print(f"  FMS thread              : {ticks:5.1f} ticks/s, last tick {fms.tick_sec * 1e6:.0f} us, worst {fms.tick_max_sec * 1e6:.0f} us")
+
+def make_ofp(legs=1500, notams=300, seed=4):
+    """Synthetic SimBrief-shaped OFP: long navlog with the usual per-fix fields, NOTAMs at both ends."""
+    rng, legs = random.Random(seed), int(legs)
+    fixes, lat, lon = [], 40.0, -10.0
+    for i in range(legs):
+        lat += rng.uniform(-0.05, 0.08); lon += rng.uniform(0.05, 0.12)
+        fixes.append({'ident': f"W{i:04d}", 'name': f"WAYPOINT {i}", 'type': 'wpt' if i % 5 else 'vor',
+                      'frequency': '' if i % 5 else f"{108 + i % 10}.{i % 100:02d}", 'pos_lat': f"{lat:.6f}",
+                      'pos_long': f"{lon:.6f}", 'stage': 'CRZ', 'via_airway': f"UL{i % 900}",
+                      'altitude_feet': str(35000 if 30 < i < legs - 40 else 8000), 'ind_airspeed': "280",
+                      'true_airspeed': "470", 'mach': "0.78", 'wind_dir': "270", 'wind_spd': "45",
+                      'oat': "-52", 'mora': "45", 'fuel_flow': "5400", 'fuel_leg': "120", 'fuel_totalused': str(i * 120),
+                      'time_leg': "60", 'time_total': str(i * 60), 'distance': "8"})
+    notam = lambda side, k: {'notam_id': f"{side}{k:04d}/26", 'notam_text': "RWY 09L/27R CLSD DUE TO WIP. " * 6}
+    # sections the MFD never reads, at roughly SimBrief's sizes
+    runways = [{'identifier': f"{r:02d}L", 'length': "3500", 'flap_setting': "5", 'speeds_v1': "140",
+                'speeds_vr': "145", 'speeds_v2': "150", 'limit_code': "F", 'max_weight': "79000"} for r in range(1, 37)]
+    return {'params': {'request_id': str(rng.randrange(10 ** 8)), 'time_generated': "1790000000"},
+            'origin': {'icao_code': 'AAAA', 'elevation': '100', 'notam': [notam('A', k) for k in range(int(notams))]},
+            'destination': {'icao_code': 'BBBB', 'elevation': '200', 'notam': [notam('B', k) for k in range(int(notams))]},
+            'alternate': {'icao_code': 'CCCC', 'notam': [notam('C', k) for k in range(int(notams))]},
+            'general': {'initial_altitude': '35000'}, 'navlog': {'fix': fixes},
+            'fuel': {'reserve': '3000', 'plan_ramp': '24000'}, 'weights': {'est_tow': '90000'},
+            'weather': {'orig_metar': "AAAA 181200Z 27010KT 9999 FEW030 12/05 Q1015", 'dest_metar': "BBBB 181200Z 24012KT CAVOK 15/07 Q1012"},
+            'text': {'plan_html': "<pre>" + "EXAMPLE OFP LINE   N40123W010456  FL350  M078  270/045  -52 \n" * 3000 + "</pre>"},
+            'tlr': {'takeoff': {'runway': runways}, 'landing': {'runway': runways}},
+            'images': {'map': [{'name': f"Map {k}", 'link': f"route_{k}.gif"} for k in range(12)]},
+            'files': {'pdf': {'name': "PDF", 'link': "ofp.pdf"}, 'file': [{'name': f"FMS {k}", 'link': f"fms_{k}.zip"} for k in range(40)]},
+            'prefile': {k: {'name': k.upper(), 'site': "https://example.invalid", 'form': "x" * 2000} for k in ('vatsim', 'ivao', 'pilotedge', 'poscon')}}
+
+def bench_refresh(legs=1500, refreshes=5):
+    """
+    Longest render-loop iteration (the stall) while the OFP is re-parsed in the
+    background: legacy (parse under FMSCore.lock, FMS update inline on the
+    render thread) vs. off-lock OFPPlan + swap with the fixed-rate FMS thread.
+    """
+    from fms_core import FMSCore, OFPPlan
+    from channels import ChannelStore
+    data = make_ofp(legs)
+    t0 = time.perf_counter(); OFPPlan(data); t_parse = time.perf_counter() - t0
+    store = ChannelStore()
+    fix = data['navlog']['fix'][100]
+    for k, v in (('lat', float(fix['pos_lat'])), ('lon', float(fix['pos_long'])), ('alt_msl_ft', 35000.0),
+                 ('gs_kt', 450.0), ('total_fuel_kg', 20000.0), ('total_ff_kg_hr', 5000.0)): store[k] = v
+    frame = TelemetryFrame.capture(store, 1, time.time())
+
+    def legacy_parse(fms):
+        with fms.lock: plan = OFPPlan(data) # the whole parse under the lock, as before
+        fms._install(plan)
+
+    def run(parse, frame_work, threaded):
+        fms = FMSCore(); fms._parse_ofp(data)
+        if threaded: fms.start()
+        stalls = []
+        for _ in range(int(refreshes)):
+            worker = threading.Thread(target=parse, args=(fms,))
+            worker.start()
+            worst = 0.0
+            while worker.is_alive():
+                f0 = time.perf_counter()
+                frame_work(fms)
+                worst = max(worst, time.perf_counter() - f0)
+                time.sleep(0.001) # the rest of the frame (rendering) would run here
+            stalls.append(worst)
+            time.sleep(0.2)
+        fms.stop()
+        return max(stalls), sum(stalls) / len(stalls)
+
+    def inline_frame(fms):
+        fms.tick(frame)
+        fms.derived.set_state(fms.state); fms.state.leg_ete_str(fms.state.active_idx)
+    def fed_frame(fms):
+        fms.feed(frame)
+        fms.derived.set_state(fms.state); fms.state.leg_ete_str(fms.state.active_idx)
+
+    print(f"refresh ({len(data['navlog']['fix'])} legs, {2 * len(data['origin']['notam'])} NOTAMs, "
+          f"parse {t_parse * 1e3:.1f} ms, {refreshes} refreshes)")
+    for name, parse, work, threaded in (("legacy: parse under lock", legacy_parse, inline_frame, False),
+                                        ("off-lock parse + swap", lambda fms: fms._parse_ofp(data), fed_frame, True)):
+        worst, mean = run(parse, work, threaded)
+        print(f"  {name:26s}: max render-loop stall {worst * 1e3:6.2f} ms (mean of per-refresh max {mean * 1e3:5.2f} ms)")
+
+def bench_startup(legs=1500, n=5):
+    """OFP at startup: selective load + OFPPlan parse (no cache) vs. OFPCache hit (mtime match / re-hashed after a touch)."""
+    import tempfile
+    from fms_core import OFPPlan
+    from ofp_cache import OFPCache
+    from ofp_loader import load_ofp_file
+    data = make_ofp(legs)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "fpl.json")
+        with open(src, 'w', encoding='utf-8') as f: json.dump(data, f, separators=(',', ':')) # compact, as served
+        cache = OFPCache(os.path.join(tmp, "fpl.cache"))
+
+        def cold(): return OFPPlan(load_ofp_file(src))
+        cache.save(cold(), src)
+        def touched():
+            os.utime(src)
+            return cache.load(src)
+        plan = cache.load(src)
+        assert plan is not None and list(plan.legs.leg_dist_static) == list(cold().legs.leg_dist_static)
+        n = int(n)
+        print(f"startup ({len(data['navlog']['fix'])} legs, fpl.json {os.path.getsize(src) / 1e6:.1f} MB, "
+              f"fpl.cache {os.path.getsize(cache.path) / 1e6:.2f} MB)")
+        print(f"  load + parse           : {1e3 / _rate(cold, n):7.1f} ms")
+        print(f"  cache, mtime unchanged : {1e3 / _rate(lambda: cache.load(src), n):7.1f} ms")
+        print(f"  cache, touched (rehash): {1e3 / _rate(touched, n):7.1f} ms")
+
+def bench_ofpload(legs=1500, notams=300, n=5):
+    """
+    Loading the saved OFP: json.load of the whole indent=4 copy (as written
+    before) vs. ofp_loader on the compact copy, which builds only the sections
+    OFPPlan reads and keeps NOTAMs as text until first read. Time and peak
+    allocation of load + OFPPlan, then the first NOTAM read.
+    """
+    import tempfile
+    from fms_core import OFPPlan, clean_notams
+    from ofp_loader import load_ofp_file
+    data = make_ofp(legs, notams)
+    n = int(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        old_src, new_src = os.path.join(tmp, "old.json"), os.path.join(tmp, "new.json")
+        with open(old_src, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
+        with open(new_src, 'w', encoding='utf-8') as f: json.dump(data, f, separators=(',', ':'))
+
+        def old():
+            with open(old_src, 'r', encoding='utf-8') as f: d = json.load(f)
+            return OFPPlan(d), d # the dict stays referenced until the parse is done, as in _fetch_logic
+        def new():
+            d = load_ofp_file(new_src)
+            return OFPPlan(d), d
+
+        a, b = old()[0], new()[0]
+        assert a.origin_notams == b.origin_notams == clean_notams(data['origin']['notam'])
+        assert a.dest_notams == b.dest_notams and list(a.legs.lat) == list(b.legs.lat)
+        assert (a.weights, a.fuel_plan, a.dest_metar, a.cum_dist) == (b.weights, b.fuel_plan, b.dest_metar, b.cum_dist)
+
+        def peak(fn):
+            tracemalloc.start(); fn(); p = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+            return p
+        def first_notams():
+            plan = new()[0]; t0 = time.perf_counter(); plan.origin_notams; plan.dest_notams
+            return time.perf_counter() - t0
+
+        print(f"ofpload ({legs} legs, {notams} NOTAMs per airport; saved copy indent=4 "
+              f"{os.path.getsize(old_src) / 1e6:.2f} MB, compact {os.path.getsize(new_src) / 1e6:.2f} MB)")
+        print(f"  json.load + parse   : {1e3 / _rate(old, n):7.1f} ms  peak {peak(old) / 1e6:5.1f} MB")
+        print(f"  ofp_loader + parse  : {1e3 / _rate(new, n):7.1f} ms  peak {peak(new) / 1e6:5.1f} MB")
+        print(f"  first NOTAM tab open: {1e3 * min(first_notams() for _ in range(n)):7.1f} ms")
+
+def _simbrief_stand_in(ofp):
+    """
+    Local HTTP stand-in for xml.fetcher.php serving ofp (gzip, ETag / 304).
+    Returns (server, url, knobs): set knobs 'slow' / 'fail' to make the next
+    requests time out / answer 503, 'delay' to slow every answer, 'etag' to
+    turn validators off; 'hits', 'conns' and 'wire' count requests,
+    connections and bytes sent.
+    """
+    import gzip
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    body = json.dumps(ofp, separators=(',', ':')).encode()
+    packed = gzip.compress(body)
+    knobs = {'slow': 0, 'fail': 0, 'delay': 0.0, 'etag': True, 'hits': 0, 'conns': 0, 'wire': 0,
+             'size': len(body), 'gzip_size': len(packed)}
+    etag = f'"{hash(body) & 0xffffffff:08x}"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # keep-alive, as SimBrief
+        def setup(self):
+            knobs['conns'] += 1
+            super().setup()
+        def log_message(self, *args): pass
+        def do_GET(self):
+            knobs['hits'] += 1
+            if knobs['slow'] > 0:
+                knobs['slow'] -= 1; time.sleep(0.5) # past the client's read timeout
+            if knobs['fail'] > 0:
+                knobs['fail'] -= 1; return self._send(503, b'')
+            if knobs['etag'] and self.headers.get('If-None-Match') == etag: return self._send(304, b'')
+            time.sleep(knobs['delay'])
+            gz = 'gzip' in self.headers.get('Accept-Encoding', '')
+            self._send(200, packed if gz else body, gz)
+        def _send(self, code, payload, gz=False):
+            self.send_response(code)
+            if knobs['etag'] and code in (200, 304): self.send_header('ETag', etag)
+            if gz: self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            knobs['wire'] += len(payload)
+            try: self.wfile.write(payload)
+            except OSError: pass # client gave up (timeout)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/xml.fetcher.php", knobs
+
+def bench_simbrief(legs=1500):
+    """
+    SimBriefClient and FMSCore refresh against a local HTTP stand-in for
+    xml.fetcher.php (gzip, ETag / 304), with slow, failing and unchanged
+    responses. Shows status, attempts, time, bytes on the wire and how many
+    connections the session opened.
+    """
+    import tempfile
+    from fms_core import FMSCore
+    from simbrief import SimBriefClient
+    server, url, stand_in = _simbrief_stand_in(make_ofp(legs))
+    client = SimBriefClient(username="bench", url=url, timeout=(1.0, 0.25), retries=4, backoff=0.05)
+
+    def run(name, slow=0, fail=0, conditional=True):
+        stand_in.update(slow=slow, fail=fail, wire=0)
+        t0 = time.perf_counter()
+        status, raw, validators = client.fetch(conditional)
+        if validators: client.commit(validators) # as _fetch_logic does once the OFP is installed
+        dt = time.perf_counter() - t0
+        print(f"  {name:<24}: {status:<10} {client.attempts} attempt(s) {dt * 1e3:7.1f} ms  "
+              f"wire {stand_in['wire'] / 1e3:7.1f} kB  body {len(raw or b'') / 1e3:7.1f} kB")
+
+    print(f"simbrief (stand-in at {url}; OFP {stand_in['size'] / 1e6:.2f} MB, gzip {stand_in['gzip_size'] / 1e6:.2f} MB)")
+    run("cold fetch")
+    run("refresh (304)")
+    run("refresh, unconditional", conditional=False)
+    run("slow x2, then ok", slow=2, conditional=False)
+    run("503 x2, then ok", fail=2, conditional=False)
+    run("503 always", fail=99)
+    stand_in['fail'] = 0
+    print(f"  connections opened      : {stand_in['conns']} (keep-alive session; timeouts drop theirs)")
+
+    # FMSCore refresh: validators gone (e.g. restart), same request_id -> nothing written or re-parsed
+    stand_in['etag'] = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # _fetch_logic writes LOCAL_FILE_PATH relative to the working directory
+        try:
+            fms = FMSCore()
+            fms.simbrief = SimBriefClient(username="bench", url=url, on_status=fms._set_status)
+            for label in ("FMSCore first load", "FMSCore same OFP"):
+                t0 = time.perf_counter(); fms._fetch_logic(True)
+                print(f"  {label:<24}: {fms.status_msg:<10} {(time.perf_counter() - t0) * 1e3:7.1f} ms")
+        finally: os.chdir(cwd)
+    server.shutdown()
+
+def bench_jobs(taps=8, legs=1500):
+    """
+    Rapid NAV "refresh" taps (every 20 ms) against the local SimBrief stand-in
+    answering in 200 ms: a thread per tap (fetch_simbrief before) vs. the FMS
+    job worker. Downloads, OFP installs, time until all work has settled, and
+    the render-thread cost of one tap.
+    """
+    import tempfile
+    from fms_core import FMSCore
+    from simbrief import SimBriefClient
+    server, url, stand_in = _simbrief_stand_in(make_ofp(legs))
+    stand_in.update(etag=False, delay=0.2) # no 304s: every request is a full download
+
+    def thread_per_tap(fms):
+        t = threading.Thread(target=fms._fetch_logic, args=(True,), daemon=True)
+        t.start()
+        return t.join
+    def job_worker(fms):
+        return fms.fetch_simbrief(force_download=True).wait
+
+    print(f"jobs ({int(taps)} refresh taps, 20 ms apart; stand-in answers in 200 ms)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # _fetch_logic writes LOCAL_FILE_PATH relative to the working directory
+        try:
+            for name, tap in (("thread per tap", thread_per_tap), ("job worker", job_worker)):
+                fms = FMSCore()
+                fms.simbrief = SimBriefClient(username="bench", url=url, on_status=fms._set_status)
+                installs, install = [], fms._install
+                fms._install = lambda plan: (installs.append(plan), install(plan))
+                stand_in['hits'] = 0
+                waits, worst = [], 0.0
+                t0 = time.perf_counter()
+                for _ in range(int(taps)):
+                    c0 = time.perf_counter()
+                    waits.append(tap(fms))
+                    worst = max(worst, time.perf_counter() - c0)
+                    time.sleep(0.02)
+                for wait in waits: wait()
+                settled = time.perf_counter() - t0
+                print(f"  {name:<15}: {stand_in['hits']} downloads, {len(installs)} installs, "
+                      f"settled in {settled * 1e3:6.0f} ms, tap costs {worst * 1e6:5.0f} us (worst)")
+                fms.stop()
+        finally: os.chdir(cwd)
+    server.shutdown()
+
+def bench_pipeline(recording, ofp=LOCAL_FILE_PATH):
+    """
+    Whole pipeline from a recorder.py file, as fast as possible and headless:
+    replay ingest -> FMSCore.update -> page rendering, one render per packet.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from fms_core import FMSCore
+    from eicas import EICAS
+    from isfd_display import ISFDDisplay
+    from nav_display import NavDisplay
+    from adv_display import AdvDisplay
+    from recorder import ReplayLink
+    from ofp_loader import load_ofp_file
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    link = ReplayLink(recording, speed=0)
+    fms = FMSCore()
+    if os.path.exists(ofp): fms._parse_ofp(load_ofp_file(ofp))
+    eicas, isfd, nav, adv = EICAS(fms), ISFDDisplay(fms), NavDisplay(fms), AdvDisplay(fms, link)
+    pages = {'ENG': lambda d: eicas.update(d), 'ISIS': lambda d: isfd.update(d),
+             'NAV': lambda d: nav.update(d, screen), 'ADV': lambda d: adv.update(d, screen)}
+
+    n = len(link.reader)
+    print(f"pipeline ({n} packets, {link.reader.duration:.1f} s recorded, plan {'loaded' if fms.is_loaded else 'none'})")
+    try:
+        for name, render in pages.items():
+            t_ingest = t_fms = t_render = 0.0
+            for i in range(n):
+                t0 = time.perf_counter()
+                ts = link.feed(i)
+                data = link.snapshot()
+                t1 = time.perf_counter()
+                if abs(data['lat']) > 0.1:
+                    fms.update(data['lat'], data['lon'], data['alt_msl_ft'], data['gs_kt'],
+                               data['total_fuel_kg'], data['total_ff_kg_hr'], data.get('baro', 29.92), ts)
+                    fms.derived.set_state(fms.state)
+                t2 = time.perf_counter()
+                render(data)
+                t3 = time.perf_counter()
+                t_ingest += t1 - t0; t_fms += t2 - t1; t_render += t3 - t2
+            total = t_ingest + t_fms + t_render
+            print(f"  {name:4s}: {n / total:8.0f} frames/s  ingest {t_ingest / n * 1e6:7.1f} us  "
+                  f"fms {t_fms / n * 1e6:7.1f} us  render {t_render / n * 1e6:8.1f} us")
+    finally:
+        link.reader.close()
+        pygame.quit()
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'events': bench_events,
+    'latency': bench_latency,
+    'coalesce': bench_coalesce,
+    'alloc': bench_alloc,
+    'snapshot': bench_snapshot,
+    'stress': bench_stress,
+    'pacing': bench_pacing,
+    'derived': bench_derived,
+    'geodesy': bench_geodesy,
+    'flightplan': bench_flightplan,
+    'fmsrate': bench_fmsrate,
+    'refresh': bench_refresh,
+    'startup': bench_startup,
+    'ofpload': bench_ofpload,
+    'simbrief': bench_simbrief,
+    'jobs': bench_jobs,
+    'pipeline': bench_pipeline,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Benchmarks: " + ", ".join(BENCHMARKS))
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
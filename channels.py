@@ -0,0 +1,148 @@
+import struct
+from array import array
+from collections.abc import Mapping
+from schema import SCHEMA
+
+# --- CHANNEL LAYOUT ---
+# (name, width): width 1 = scalar, 3 = one value per engine
+CHANNELS = (
+    ('connected', 1),
+    # BASIC DATA
+    ('lat', 1), ('lon', 1), ('alt_msl_ft', 1), ('alt_agl_ft', 1),
+    ('ias_kt', 1), ('gs_kt', 1), ('tas_kt', 1),
+    ('pitch', 1), ('roll', 1), ('hdg', 1),
+    ('vvi', 1),
+    # ENG
+    ('n1', 3), ('n2', 3), ('egt', 3), ('ff', 3),
+    ('total_ff_kg_hr', 1), ('fuel_used_kg', 3), # fuel used since link start (totalizer.py)
+    ('oil_p', 3), ('reverse_state', 3),
+    ('starter_time', 3), ('starter_active', 3),
+    # BALANCE
+    ('cg_raw', 1), ('cg_mac', 1), ('elev_pos', 1), ('stab_raw', 1), ('stab_pos', 1),
+    # CONFIG
+    ('gear_pos', 1), ('park_brake', 1), ('flaps', 1), ('slats', 1), ('sbrk', 1), ('trim', 1),
+    ('fuel_weight', 1),     # EICAS FOB
+    ('total_fuel_kg', 1),   # FMS CALCULATION
+    ('total_weight', 1),
+    # WIND DATA
+    ('wind_spd', 1), ('wind_dir', 1),
+    # EVENTS (latched at packet rate by events.EventDetectors; times are receive timestamps)
+    ('ldg_vs_fpm', 1), ('ldg_time', 1),
+    ('start_egt_peak', 3), ('start_time', 3),
+    ('n1_exc_peak', 3), ('n1_exc_time', 3), ('n1_exc_sec', 3),
+    ('gear_move_time', 1), ('gear_move_dir', 1), ('flap_move_time', 1), ('flap_move_dir', 1),
+)
+# Channels introduced by telemetry_schema.json (other aircraft variants)
+CHANNELS += SCHEMA.extra_channels({name for name, _ in CHANNELS})
+
+# Channels read back as booleans
+BOOL_CHANNELS = {'connected'}
+
+# Raw X-Plane rows (8 columns each) live after the channels in the same buffer
+MAX_ROW_INDEX = 256
+ROW_COLUMNS = 8
+
+def _build_layout():
+    slots, offset = {}, 0
+    for name, width in CHANNELS:
+        slots[name] = (offset, width)
+        offset += width
+    return slots, offset
+
+SLOTS, CHANNELS_SIZE = _build_layout()
+ROWS_BASE = CHANNELS_SIZE
+STORE_SIZE = ROWS_BASE + MAX_ROW_INDEX * ROW_COLUMNS
+ROW_F64 = struct.Struct(f'={ROW_COLUMNS}d')
+
+def slot(name):
+    """Buffer offset of a channel (first engine for per-engine channels)."""
+    return SLOTS[name][0]
+
+class ChannelStore(Mapping):
+    """
+    Telemetry channels and raw rows in one preallocated array('d').
+    Dict-compatible: scalar channels read as floats, per-engine channels as
+    3-item memoryviews into the buffer, so pages keep using data['n1'][i].
+    """
+    def __init__(self, buf=None, readonly=False):
+        self.buf = buf if buf is not None else array('d', bytes(8 * STORE_SIZE))
+        self.extras = {}
+        self._view = memoryview(self.buf)
+        if readonly: self._view = self._view.toreadonly()
+        self._bytes = None
+        self._vectors = {} # per-engine views, cut on first access
+
+    # --- MAPPING INTERFACE ---
+    def __getitem__(self, key):
+        s = SLOTS.get(key)
+        if s is None: return self.extras[key]
+        off, width = s
+        if width == 1:
+            val = self.buf[off]
+            return val != 0.0 if key in BOOL_CHANNELS else val
+        vec = self._vectors.get(key)
+        if vec is None:
+            vec = self._vectors[key] = self._view[off:off + width]
+        return vec
+
+    def get(self, key, default=None):
+        try: return self[key]
+        except KeyError: return default
+
+    def __contains__(self, key):
+        return key in SLOTS or key in self.extras
+
+    def __iter__(self):
+        yield from SLOTS
+        yield from self.extras
+
+    def __len__(self):
+        return len(SLOTS) + len(self.extras)
+
+    def __setitem__(self, key, value):
+        s = SLOTS.get(key)
+        if s is None:
+            self.extras[key] = value
+            return
+        off, width = s
+        if width == 1:
+            self.buf[off] = float(value)
+        else:
+            for i in range(width): self.buf[off + i] = float(value[i])
+
+    # --- RAW ROWS ---
+    def set_row(self, row_idx, row):
+        if 0 <= row_idx < MAX_ROW_INDEX:
+            if self._bytes is None: self._bytes = self._view.cast('B')
+            ROW_F64.pack_into(self._bytes, (ROWS_BASE + row_idx * ROW_COLUMNS) * 8, *row)
+
+    def get_row(self, row_idx):
+        if not 0 <= row_idx < MAX_ROW_INDEX: return (0.0,) * ROW_COLUMNS
+        off = ROWS_BASE + row_idx * ROW_COLUMNS
+        return self._view[off:off + ROW_COLUMNS]
+
+    def copy_buffer(self):
+        """Single copy of the whole buffer (channels + rows), for frames, recording or IPC."""
+        return array('d', self.buf)
+
+class TelemetryFrame(ChannelStore):
+    """
+    Immutable snapshot of the telemetry after one decoded packet batch.
+    Read-only dict interface plus get_row(); safe to hold across a whole frame
+    or hand to another thread.
+    """
+    def __init__(self, buf, seq=0, timestamp=0.0, extras=None):
+        super().__init__(buf, readonly=True)
+        if extras: self.extras = dict(extras)
+        self.seq = seq
+        self.timestamp = timestamp
+
+    @classmethod
+    def capture(cls, store, seq, timestamp):
+        return cls(store.copy_buffer(), seq, timestamp, store.extras)
+
+    def __setitem__(self, key, value):
+        raise TypeError("TelemetryFrame is read-only")
+
+    def set_row(self, row_idx, row):
+        raise TypeError("TelemetryFrame is read-only")
@@ -53,6 +53,13 @@ def load_simbrief_username():
 # --- UDP CONFIG ---
 UDP_IP = "0.0.0.0"
 UDP_PORT = 49071
+# Telemetry source: "thread" (DataLink ingest thread), "async" (AsyncDataLink, pumped by the render loop)
+# or "process" (ProcessDataLink: ingest process + shared-memory ring, for multi-core boards like the Pi)
+DATA_LINK_MODE = "thread"
+# Row -> channel mapping for the decoder (X-Plane Data Output rows)
+TELEMETRY_SCHEMA = "telemetry_schema.json"
+# Per-engine fuel used, kept across restarts (ADV > PROG, tap and confirm to reset)
+FUEL_USED_FILE = "fuel_used.json"
 FPS = 30 
 
 # --- DISPLAY LAYOUT ---
@@ -106,6 +113,7 @@ SIMBRIEF_API_URL = "https://www.simbrief.com/api/xml.fetcher.php"
 # --- VNAV & FMS CONSTANTS ---
 # Tu-154 DESCEND GRAD
 DESCENT_GRADIENT_FT_NM = 318.0  # -3 DEG FPA
+FMS_RATE_HZ = 8.0  # LNAV/VNAV update rate (own thread, independent of FPS)
 
 # --- UNIT BOOLEAN ---
 SHOW_METRIC_ALT = True   
@@ -113,4 +121,5 @@ SHOW_METRIC_DIST = True
 
 # --- FPLN FETCH CONFIG ---
 USE_LOCAL_DATA = True  
-LOCAL_FILE_PATH = "fpl.json"
\ No newline at end of file
+LOCAL_FILE_PATH = "fpl.json"
+OFP_CACHE_PATH = "fpl.cache" # parsed copy of LOCAL_FILE_PATH (ofp_cache.py)
\ No newline at end of file
@@ -4,6 +4,13 @@ import os
 
 UDP_IP = "0.0.0.0"
 UDP_PORT = 49000 #For Raspberry Pi use 49000
+# Telemetry source: "thread" (DataLink ingest thread), "async" (AsyncDataLink, pumped by the render loop)
+# or "process" (ProcessDataLink: ingest process + shared-memory ring, for multi-core boards like the Pi)
+DATA_LINK_MODE = "thread"
+# Row -> channel mapping for the decoder (X-Plane Data Output rows)
+TELEMETRY_SCHEMA = "telemetry_schema.json"
+# Per-engine fuel used, kept across restarts (ADV > PROG, tap and confirm to reset)
+FUEL_USED_FILE = "fuel_used.json"
 FPS = 30 
 
 SCREEN_W = 480
@@ -54,6 +61,7 @@ SIMBRIEF_API_URL = "https://www.simbrief.com/api/xml.fetcher.php"
 
 
 DESCENT_GRADIENT_FT_NM = 318.0
+FMS_RATE_HZ = 8.0
 
 
 SHOW_METRIC_ALT = True 
@@ -62,3 +70,4 @@ SHOW_METRIC_DIST = True
 
 USE_LOCAL_DATA = True   
 LOCAL_FILE_PATH = "fpl.json"
+OFP_CACHE_PATH = "fpl.cache"
@@ -1,160 +1,495 @@
+import select
+import selectors
 import socket
 import struct
+import re
 import threading
 import time
+from array import array
+from bisect import bisect
 from config import *
+from schema import SCHEMA
+from channels import ChannelStore, TelemetryFrame, SLOTS, ROWS_BASE, ROW_COLUMNS, MAX_ROW_INDEX, slot
+from events import EventDetectors
+from totalizer import FuelIntegrator
+
+# --- X-PLANE DATA PACKET LAYOUT ---
+# b'DATA' + 1 pad byte, then N rows of <int index, 8 x float>
+HEADER_SIZE = 5
+ROW_SIZE = 36
+PACKET_MAX = 2048
+ROW_STRUCT = struct.Struct('<i8f')
+ROW_INDEX = struct.Struct('<i')
+DATA_MAGIC = ROW_INDEX.unpack(b'DATA')[0] # header read as int: works on bytes, bytearray and mmap
+
+# --- LINK TIMING ---
+LINK_TIMEOUT_SEC = 1.0 # NO PACKET FOR THIS LONG -> DISCONNECTED
+BATCH_MAX_PACKETS = 64 # DATAGRAMS DRAINED PER WAKE-UP
+BATCH_INTERVAL_SEC = 0.01 # MIN TIME BETWEEN DECODES (CAPS DECODE RATE AT 100 HZ)
+
+# --- ROW SCHEMA ---
+# Row -> channel mapping, scales and offsets live in telemetry_schema.json (see schema.py)
+ROWS = SCHEMA.rows
+
+# Rows whose handlers need every sample (edge detection), never coalesced
+COALESCE_EXEMPT_ROWS = {idx for idx, spec in ROWS.items() if spec.every_sample}
+
+MAX_LAYOUTS = 32 # compiled packet layouts kept per decoder
+
+# Rows main.show_udp_instructions() asks the user to enable
+EXPECTED_ROWS = (3, 4, 13, 14, 17, 20, 27, 33, 41, 45, 47, 49, 63, 74, 97, 98, 99, 100, 152)
+
+# --- ROW HEALTH ---
+# Inter-arrival histogram bin edges (seconds): <5 ms, 5-10, ..., 1-2 s, >2 s
+HIST_EDGES = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+HIST_BINS = len(HIST_EDGES) + 1
+
+INTERVAL_GAIN = 0.125 # EWMA gain for the mean inter-arrival time
+JITTER_GAIN = 0.0625  # RFC 3550 style: J += (|D| - J) / 16
+RATE_WINDOW_SEC = 1.0 # report() recomputes rates at most this often
+STALE_SEC = 2.0       # an expected row not seen for this long is flagged
+
+_CHANNEL_REF = re.compile(r"\b([a-z_][a-z0-9_]*)(?:\[(\d)\])?")
+
+def _field_expr(src, f):
+    expr = src if f.scale == 1.0 else f"{src} * {f.scale!r}"
+    return expr if f.offset == 0.0 else f"{expr} + {f.offset!r}"
+
+def _buf_expr(expr):
+    def sub(m):
+        name, i = m.group(1), m.group(2)
+        if name not in SLOTS: return m.group(0)
+        return f"buf[{slot(name) + int(i or 0)}]"
+    return _CHANNEL_REF.sub(sub, expr)
+
+def _raw_lines(runs, namespace):
+    """
+    Statements keeping all 8 columns of every received row for get_row(), as the
+    pre-schema decoder did. runs holds (first row index, [column sources]) for rows
+    with consecutive indices; each run is one struct.pack_into into the buffer.
+    """
+    lines = []
+    for idx, srcs in runs:
+        name = f"RAW_{idx}_{len(srcs) // ROW_COLUMNS}"
+        namespace[name] = struct.Struct(f"={len(srcs)}d")
+        lines.append(f"    {name}.pack_into(buf, {(ROWS_BASE + idx * ROW_COLUMNS) * 8}, {', '.join(srcs)})")
+    return lines
+
+def _row_lines(spec, col):
+    """Statements storing one row's channels into the ChannelStore buffer; col(c) is the source of 1-based column c."""
+    lines = []
+    for f in spec.fields:
+        lines.append(f"    buf[{slot(f.channel) + f.index}] = {_field_expr(col(f.col), f)}")
+    if spec.handler:
+        lines.append(f"    {spec.handler}(buf, ({', '.join(col(c + 1) for c in range(ROW_COLUMNS))}), now)")
+    for name in spec.detect:
+        lines.append(f"    detect_{name}(buf, now)")
+    return lines
+
+def _derived_lines(specs):
+    return [f"    buf[{slot(d.channel)}] = {_buf_expr(d.expr)}" for spec in specs for d in spec.derived]
+
+def _compile(name, lines, namespace):
+    exec(compile("\n".join(lines), f"<{name}>", "exec"), namespace)
+    return namespace[name]
+
+def compile_row_handler(idx, namespace):
+    """Straight-line handler(buf, row, now) for one schema row; row holds columns 1-8."""
+    spec, ns = ROWS[idx], dict(namespace)
+    raw = [(idx, [f"row[{c}]" for c in range(ROW_COLUMNS)])] if 0 <= idx < MAX_ROW_INDEX else []
+    body = _raw_lines(raw, ns) + _row_lines(spec, lambda c: f"row[{c - 1}]") + _derived_lines([spec])
+    return _compile(f"handle_row_{idx}", [f"def handle_row_{idx}(buf, row, now):"] + (body or ["    pass"]), ns)
+
+def compile_layout_decoder(rows, namespace):
+    """
+    Decoder for a whole packet body with the given row order: decode(data, offset, buf, now).
+    One struct call unpacks the packet; the row indices (and rows past MAX_ROW_INDEX)
+    are skipped as pad bytes. Every row is kept for get_row(), one pack_into per
+    run of consecutive row indices; schema rows also fill their channels.
+    """
+    fmt, pad, k = ['<'], 0, 0
+    lines, specs, runs = [], [], []
+    for idx in rows:
+        spec, kept = ROWS.get(idx), 0 <= idx < MAX_ROW_INDEX
+        if spec is None and not kept:
+            pad += ROW_SIZE
+            continue
+        fmt.append(f"{pad + 4}x{ROW_COLUMNS}f"); pad = 0
+        srcs = [f"v[{k + c}]" for c in range(ROW_COLUMNS)]
+        k += ROW_COLUMNS
+        if kept:
+            if runs and runs[-1][0] + len(runs[-1][1]) // ROW_COLUMNS == idx: runs[-1][1].extend(srcs)
+            else: runs.append((idx, srcs))
+        if spec is None: continue
+        lines += _row_lines(spec, lambda c: srcs[c - 1])
+        specs.append(spec)
+    lines += _derived_lines(specs)
+
+    ns = dict(namespace)
+    head = ["def decode_layout(data, offset, buf, now):"]
+    if k: head.append("    v = LAYOUT.unpack_from(data, offset)")
+    ns['LAYOUT'] = struct.Struct(''.join(fmt))
+    decode = _compile("decode_layout", head + (_raw_lines(runs, ns) + lines or ["    pass"]), ns)
+    decode.exempt = tuple(pos for pos, idx in enumerate(rows) if idx in COALESCE_EXEMPT_ROWS)
+    return decode
+
+_INDEX_STRUCTS = {}
+
+def index_struct(num_rows):
+    """Struct reading just the row indices of a packet body (one C call per packet)."""
+    st = _INDEX_STRUCTS.get(num_rows)
+    if st is None:
+        st = _INDEX_STRUCTS[num_rows] = struct.Struct('<' + 'i32x' * num_rows)
+    return st
+
+class ArrivalStats:
+    """Arrival statistics of one packet layout (the tuple of row indices it carries)."""
+    __slots__ = ('rows', 'count', 'last_seen', 'interval', 'jitter', 'hist')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+        self.last_seen, self.interval, self.jitter = 0.0, 0.0, 0.0
+        self.hist = array('Q', bytes(8 * HIST_BINS))
+
+class RowHealth:
+    """
+    Per-row arrival statistics, updated by the ingest thread for every datagram
+    (before coalescing). X-Plane sends the same set of rows in every packet, so
+    the work is done once per packet layout and folded into per-row figures
+    only when report() is called. Arrival times are batch receive times, so
+    intervals shorter than the batching window land in the first bins.
+    """
+    MAX_LAYOUTS = 32 # junk traffic can't grow the table without bound
 
-class DataLink(threading.Thread):
     def __init__(self):
-        super().__init__()
-        self.running = True
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.bind((UDP_IP, UDP_PORT))
-        self.sock.setblocking(False)
-        self.raw_rows = {}
-        
+        self.layouts = {}
+        self.packets = 0
+
+        # Ingest cost: receive -> frame published, per batch
+        self.batches = 0
+        self.ingest_avg, self.ingest_max = 0.0, 0.0
+
+        # Reader-side rate window (touched only by report())
+        self._rate_counts, self._rates, self._rate_time = {}, {}, 0.0
+
+    def observe(self, buf, start, end, now):
+        """Records one datagram held in buf[start:end] that arrived at now."""
+        num_rows = (end - start - HEADER_SIZE) // ROW_SIZE
+        if num_rows <= 0: return
+        self.packets += 1
+        rows = index_struct(num_rows).unpack_from(buf, start + HEADER_SIZE)
+        st = self.layouts.get(rows)
+        if st is None:
+            if len(self.layouts) >= self.MAX_LAYOUTS: return
+            st = self.layouts[rows] = ArrivalStats(rows)
+        st.count += 1
+        last = st.last_seen
+        if last == now: return # same batch
+        st.last_seen = now
+        if last == 0.0: return
+        dt = now - last
+        mean = st.interval or dt
+        d = dt - mean
+        st.interval = mean + d * INTERVAL_GAIN
+        st.jitter += (abs(d) - st.jitter) * JITTER_GAIN
+        st.hist[bisect(HIST_EDGES, dt)] += 1
+
+    def observe_batch(self, buf, lengths, count, now):
+        """Same batch layout as PacketDecoder.decode_batch()."""
+        for i in range(count):
+            self.observe(buf, i * PACKET_MAX, i * PACKET_MAX + lengths[i], now)
+
+    def ingest_done(self, elapsed):
+        self.batches += 1
+        self.ingest_avg += (elapsed - self.ingest_avg) * INTERVAL_GAIN
+        if elapsed > self.ingest_max: self.ingest_max = elapsed
+
+    # --- READER SIDE ---
+    def _row_layouts(self, idx):
+        return [st for st in list(self.layouts.values()) if idx in st.rows]
+
+    def report(self, now, rows=()):
+        """
+        [(idx, packets, rate_hz, interval_ms, jitter_ms, stale_sec)] for every row
+        seen so far plus the given expected rows; stale_sec is None if never seen.
+        A row carried by several layouts gets the combined rate and worst jitter.
+        """
+        layouts = list(self.layouts.values())
+        if now - self._rate_time >= RATE_WINDOW_SEC:
+            dt = now - self._rate_time if self._rate_time else 0.0
+            for st in layouts:
+                prev = self._rate_counts.get(st.rows, st.count)
+                self._rates[st.rows] = (st.count - prev) / dt if dt else 0.0
+                self._rate_counts[st.rows] = st.count
+            self._rate_time = now
+
+        seen = {idx for st in layouts for idx in st.rows if 0 <= idx < MAX_ROW_INDEX}
+        out = []
+        for idx in sorted(seen | set(rows)):
+            mine = [st for st in layouts if idx in st.rows]
+            if not mine:
+                out.append((idx, 0, 0.0, 0.0, 0.0, None))
+                continue
+            count = sum(st.count for st in mine)
+            rate = sum(self._rates.get(st.rows, 0.0) for st in mine)
+            freq = sum(1.0 / st.interval for st in mine if st.interval > 0)
+            last = max(st.last_seen for st in mine)
+            out.append((idx, count, rate, 1000.0 / freq if freq else 0.0,
+                        max(st.jitter for st in mine) * 1000.0, now - last))
+        return out
+
+    def histogram(self, idx):
+        """Inter-arrival counts per HIST_EDGES bin for one row."""
+        hist = [0] * HIST_BINS
+        for st in self._row_layouts(idx):
+            for b in range(HIST_BINS): hist[b] += st.hist[b]
+        return hist
+
+    def missing(self, now, rows):
+        """Expected rows never seen, or not seen for STALE_SEC."""
+        layouts = list(self.layouts.values())
+        last = {}
+        for st in layouts:
+            for idx in st.rows:
+                if st.last_seen > last.get(idx, 0.0): last[idx] = st.last_seen
+        return [idx for idx in rows if now - last.get(idx, 0.0) > STALE_SEC]
+
+class PacketDecoder:
+    """Decodes X-Plane DATA packets into the telemetry dict shared with the pages."""
+    def __init__(self):
         # --- STARTER VALUE ---
         self._last_starter_val = [0.0, 0.0, 0.0]
-        self._starter_active_ts = [0.0, 0.0, 0.0] 
-        
-        self.data = {
-            'connected': False,
-            # BASIC DATA
-            'lat': 0.0, 'lon': 0.0, 'alt_msl_ft': 0.0,
-            'ias_kt': 0.0, 'gs_kt': 0.0, 'tas_kt': 0.0,
-            'pitch': 0.0, 'roll': 0.0, 'hdg': 0.0,
-            'vvi': 0.0,  
-            # ENG
-            'n1': [0.0, 0.0, 0.0], 
-            'n2': [0.0, 0.0, 0.0], 
-            'egt': [0.0, 0.0, 0.0],
-            'ff': [0.0, 0.0, 0.0],
-            'total_ff_kg_hr': 0.0, 
-            'oil_p': [0.0, 0.0, 0.0],
-            'reverse_state': [0.0, 0.0, 0.0],
-            'starter_time': [0.0, 0.0, 0.0],
-            'starter_active': [False, False, False],
-
-            # BALANCE
-            'cg_raw': 0.0,      
-            'cg_mac': 0.0,      
-            'elev_pos': 0.0,    
-            'stab_pos': 0.0,    
-
-            # CONFIG
-            'gear_pos': 0.0,    
-            'park_brake': 0.0,  
-            'flaps': 0.0,       
-            'slats': 0.0,       
-            'sbrk': 0.0,        
-            'trim': 0.0,        
-            'fuel_weight': 0.0, # EICAS FOB
-            'total_fuel_kg': 0.0, # FMS CALCULATION
-            'total_weight': 0.0,
-            
-            # WIND DATA
-            'wind_spd': 0.0,
-            'wind_dir': 0.0
-        }
+        self._starter_active_ts = [0.0, 0.0, 0.0]
+
+        self.data = ChannelStore()
+
+        # Packet-rate detectors: events (landing rate, start EGT, N1 exceedance, gear/flap transit)
+        # and the fuel-used integrator
+        self.events = EventDetectors()
+        self.fuel_used = FuelIntegrator()
+
+        # Names visible to generated code: schema handlers and detectors bound to this decoder
+        self._namespace = {}
+        for spec in ROWS.values():
+            if spec.handler:
+                method = getattr(self, f"_handle_{spec.handler}", None)
+                if method is None: raise ValueError(f"{SCHEMA.path}: row {spec.idx}: unknown handler '{spec.handler}'")
+                self._namespace[spec.handler] = method
+            for name in spec.detect:
+                method = getattr(self.events, f"detect_{name}", None) or getattr(self.fuel_used, f"detect_{name}", None)
+                if method is None: raise ValueError(f"{SCHEMA.path}: row {spec.idx}: unknown detector '{name}'")
+                self._namespace[f"detect_{name}"] = method
+
+        self.handlers = {idx: compile_row_handler(idx, self._namespace) for idx in ROWS}
+
+        # Row-index tuple -> compiled whole-packet decoder
+        self.layouts = {}
+
+        # Reused by decode_batch() so coalescing allocates nothing per batch
+        self._latest = {}
+
+    def _handle_starter(self, buf, row, now):
+        # --- DETECT ENGINE START ---
+        time_slot, active_slot = slot('starter_time'), slot('starter_active')
+        for eng_i in range(3):
+            val = row[eng_i]
+            buf[time_slot + eng_i] = val
+            if val > self._last_starter_val[eng_i]:
+                self._starter_active_ts[eng_i] = now
+            self._last_starter_val[eng_i] = val
+            buf[active_slot + eng_i] = 1.0 if now - self._starter_active_ts[eng_i] < 0.25 else 0.0
+
+    def layout_decoder(self, buf, start, num_rows):
+        """Compiled decoder for the packet at buf[start:], or None once MAX_LAYOUTS is reached."""
+        rows = index_struct(num_rows).unpack_from(buf, start + HEADER_SIZE)
+        decode = self.layouts.get(rows)
+        if decode is None and len(self.layouts) < MAX_LAYOUTS:
+            decode = self.layouts[rows] = compile_layout_decoder(rows, self._namespace)
+        return decode
+
+    def _decode_rows(self, buf, start, num_rows, now):
+        """Row-by-row fallback for packets beyond MAX_LAYOUTS."""
+        for k in range(num_rows):
+            self.decode_row(buf, start + HEADER_SIZE + k * ROW_SIZE, now)
+
+    def decode(self, buf, now, start=0, end=None):
+        """Decodes one packet held in buf[start:end]. Returns False if it is not a DATA packet."""
+        if end is None: end = len(buf)
+        if end - start < 4 or ROW_INDEX.unpack_from(buf, start)[0] != DATA_MAGIC: return False
+
+        num_rows = (end - start - HEADER_SIZE) // ROW_SIZE
+        if num_rows <= 0: return True
+        decode = self.layout_decoder(buf, start, num_rows)
+        if decode is None: self._decode_rows(buf, start, num_rows, now)
+        else: decode(buf, start + HEADER_SIZE, self.data.buf, now)
+        return True
+
+    def decode_row(self, buf, offset, now):
+        vals = ROW_STRUCT.unpack_from(buf, offset)
+        handler = self.handlers.get(vals[0])
+        if handler is not None:
+            handler(self.data.buf, vals[1:], now)
+        else:
+            self.data.set_row(vals[0], vals[1:])
+
+    def decode_batch(self, buf, lengths, count, now):
+        """
+        Decodes count queued packets, oldest first; packet i is lengths[i] bytes at buf[i * PACKET_MAX].
+        Only the newest packet of each layout is decoded in full; older ones contribute
+        just their COALESCE_EXEMPT_ROWS. Returns False if none of them is a DATA packet.
+        """
+        if count == 1:
+            return self.decode(buf, now, 0, lengths[0])
+
+        latest, found = self._latest, False
+        latest.clear()
+        for i in range(count):
+            start = i * PACKET_MAX
+            if lengths[i] < 4 or ROW_INDEX.unpack_from(buf, start)[0] != DATA_MAGIC: continue
+            found = True
+            num_rows = (lengths[i] - HEADER_SIZE) // ROW_SIZE
+            if num_rows <= 0: continue
+            decode = self.layout_decoder(buf, start, num_rows)
+            if decode is None:
+                self._decode_rows(buf, start, num_rows, now)
+                continue
+            prev = latest.pop(decode, None)
+            if prev is not None:
+                for pos in decode.exempt:
+                    self.decode_row(buf, prev + HEADER_SIZE + pos * ROW_SIZE, now)
+            latest[decode] = start # re-inserted: dict order stays oldest -> newest
+
+        data_buf = self.data.buf
+        for decode, start in latest.items():
+            decode(buf, start + HEADER_SIZE, data_buf, now)
+        return found
+
+class TelemetrySource:
+    """
+    Decode/publish state shared by the telemetry sources (thread, asyncio, replay):
+    drain buffer, decoder, row health, optional recorder and the published frame.
+    Pages use data / snapshot() / get_row(); main loops call pump() once per frame.
+    """
+    def __init__(self):
+        # Drain buffer: queued datagrams are received into fixed slots, then decoded once.
+        # The slot views are cut once here, so receiving allocates no buffers.
+        self.batch_buf = bytearray(BATCH_MAX_PACKETS * PACKET_MAX)
+        view = memoryview(self.batch_buf)
+        self.batch_slots = [view[i * PACKET_MAX : (i + 1) * PACKET_MAX] for i in range(BATCH_MAX_PACKETS)]
+        self.batch_lens = [0] * BATCH_MAX_PACKETS
+        self.batch_interval = BATCH_INTERVAL_SEC
+        self.packets_received, self.batches_decoded = 0, 0
+
+        # Optional recorder.TelemetryRecorder; gets every raw datagram before coalescing
+        self.recorder = None
+
+        # Per-row arrival stats (ADV > DIAG page)
+        self.health = RowHealth()
+
+        self.decoder = PacketDecoder()
+        self.data = self.decoder.data
+
+        # Latest published frame. Replaced (never mutated) by the ingest side,
+        # so readers need no lock: a reference read under the GIL is atomic.
+        self.frame = TelemetryFrame.capture(self.data, 0, 0.0)
+
+    def ingest_batch(self, count, now):
+        """
+        Records, observes and decodes the first count batch slots, then publishes.
+        Returns False if none of them was a DATA packet.
+        """
+        self.packets_received += count
+        self.batches_decoded += 1
+        if self.recorder is not None:
+            self.recorder.write_batch(self.batch_slots, self.batch_lens, count, now)
+        self.health.observe_batch(self.batch_buf, self.batch_lens, count, now)
+        if not self.decoder.decode_batch(self.batch_buf, self.batch_lens, count, now): return False
+
+        self.data['connected'] = True
+        self._publish(now)
+        self.health.ingest_done(time.time() - now)
+        return True
+
+    def _publish(self, now):
+        self.frame = TelemetryFrame.capture(self.data, self.frame.seq + 1, now)
+
+    def snapshot(self):
+        """Latest complete TelemetryFrame. Grab once per render frame."""
+        return self.frame
+
+    def get_row(self, row_idx):
+        return self.data.get_row(row_idx)
+
+    def pump(self):
+        """Called once per render frame. Thread-driven sources have nothing to do."""
+
+class DataLink(TelemetrySource, threading.Thread):
+    def __init__(self, ip=UDP_IP, port=UDP_PORT):
+        """port=None opens no UDP socket; a subclass feeds packets instead (see recorder.ReplayLink)."""
+        threading.Thread.__init__(self)
+        TelemetrySource.__init__(self)
+        self.running = True
+        self.sock = None
+        if port is not None:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind((ip, port))
+            self.sock.setblocking(False)
+
+        # Wake-up pair so stop() can interrupt a blocking select()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        if self.sock is not None:
+            self.selector.register(self.sock, selectors.EVENT_READ)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+
+    def _drain(self):
+        """Receives every queued datagram into the batch slots. Returns how many arrived."""
+        recv_into, slots, lens = self.sock.recv_into, self.batch_slots, self.batch_lens
+        count = 0
+        while count < BATCH_MAX_PACKETS:
+            try:
+                lens[count] = recv_into(slots[count])
+            except (BlockingIOError, OSError):
+                break
+            count += 1
+        return count
 
     def run(self):
         print("DataLink: LISTENING TO PORT (49000 (linux) /49071 (win))...")
         last_time = time.time()
 
-        while self.running:
-            try:
-                packet, _ = self.sock.recvfrom(2048)
-                if packet[0:4] != b'DATA': continue
-                
-                now = time.time()
-                last_time = now
-                self.data['connected'] = True
-                
-                body = packet[5:]
-                num_rows = len(body) // 36
-                
-                for i in range(num_rows):
-                    row = body[i*36 : (i+1)*36]
-                    vals = struct.unpack('<iffffffff', row)
-                    idx = int(vals[0])
-                    self.raw_rows[idx] = [vals[1], vals[2], vals[3], vals[4], vals[5], vals[6], vals[7], vals[8]]
-                    
-                    if idx == 41: self.data['n1'] = [vals[1], vals[2], vals[3]]
-                    elif idx == 42: self.data['n2'] = [vals[1], vals[2], vals[3]]
-                    
-                    elif idx == 45: 
-                        CONVERSION_FACTOR = 3.02 
-                        ff_list = [
-                            vals[1] * CONVERSION_FACTOR,
-                            vals[2] * CONVERSION_FACTOR,
-                            vals[3] * CONVERSION_FACTOR
-                        ]
-                        self.data['ff'] = ff_list
-                        self.data['total_ff_kg_hr'] = sum(ff_list)
-                        
-                    elif idx == 47: self.data['egt'] = [vals[1], vals[2], vals[3]]
-                    elif idx == 49: self.data['oil_p'] = [vals[1], vals[2], vals[3]]
-                    elif idx == 27: self.data['reverse_state'] = [vals[1], vals[2], vals[3]]
-                    
-                    elif idx == 33: 
-                        # --- DETECT ENGINE START ---
-                        current_vals = [vals[1], vals[2], vals[3]]
-                        self.data['starter_time'] = current_vals
-                        for eng_i in range(3):
-                            if current_vals[eng_i] > self._last_starter_val[eng_i]:
-                                self._starter_active_ts[eng_i] = now
-                            self._last_starter_val[eng_i] = current_vals[eng_i]
-                            self.data['starter_active'][eng_i] = (now - self._starter_active_ts[eng_i] < 0.25)
-                    
-                    elif idx == 14: 
-                        self.data['gear_pos'] = vals[1]   
-                        self.data['park_brake'] = vals[2] 
-                    elif idx == 13: 
-                        self.data['stab_raw'] = vals[1] 
-                        self.data['stab_pos'] = vals[1] * 5.488 
-                        self.data['flaps'] = vals[4] 
-                        self.data['slats'] = vals[6] 
-                        self.data['sbrk'] = vals[7]  
-                    elif idx == 74: self.data['elev_pos'] = vals[1] 
-                    elif idx == 63: 
-                        self.data['fuel_weight'] = vals[3] * 0.453592
-                        self.data['total_fuel_kg'] = self.data['fuel_weight']
-                        
-                        self.data['total_weight'] = vals[6] * 0.453592
-                        self.data['cg_raw'] = vals[8]
-                        self.data['cg_mac'] = self.data['cg_raw'] * CG_SLOPE + CG_INTERCEPT
-                        
-                    elif idx == 3: 
-                        self.data['ias_kt'] = vals[1]
-                        self.data['tas_kt'] = vals[3]  
-                        self.data['gs_kt']  = vals[4] 
-
-                    elif idx == 4: 
-                        self.data['vvi'] = vals[3]
-
-                    elif idx == 152: # Wind
-                        self.data['wind_spd'] = vals[6]
-                        self.data['wind_dir'] = vals[7]
-                        
-                    elif idx == 20: # Lat, Lon, Alt
-                        self.data['lat'] = vals[1]    
-                        self.data['lon'] = vals[2]    
-                        self.data['alt_msl_ft'] = vals[6] 
-                        
-                    elif idx == 17: # Pitch, Roll, Heading
-                        self.data['pitch'] = vals[1]
-                        self.data['roll'] = vals[2]
-                        self.data['hdg'] = vals[5]    
-
-            except BlockingIOError:
-                time.sleep(0.02)
-            
-            if time.time() - last_time > 1.0:
-                self.data['connected'] = False
-        
-    def get_row(self, row_idx):
-        return self.raw_rows.get(row_idx, [0.0] * 8)
-        
+        try:
+            while self.running:
+                # Sleep until a datagram arrives, stop() is called, or the link times out
+                timeout = None
+                if self.data['connected']:
+                    timeout = max(0.0, last_time + LINK_TIMEOUT_SEC - time.time())
+
+                for key, _ in self.selector.select(timeout):
+                    if key.fileobj is not self.sock: continue
+                    count = self._drain()
+                    if not count: continue
+                    now = time.time()
+                    if not self.ingest_batch(count, now): continue
+                    last_time = now
+
+                    # Let packets queue up between decodes so cost doesn't scale with send rate
+                    rest = self.batch_interval - (time.time() - now)
+                    if rest > 0 and self.running:
+                        select.select([self._wake_r], [], [], rest)
+
+                if self.data['connected'] and time.time() - last_time > LINK_TIMEOUT_SEC:
+                    self.data['connected'] = False
+                    self._publish(time.time())
+        finally:
+            self.selector.close()
+            self._wake_r.close()
+
     def stop(self):
         self.running = False
-        self.sock.close()
\ No newline at end of file
+        try: self._wake_w.send(b'\x00')
+        except OSError: pass
+        self._wake_w.close()
+        if self.sock is not None: self.sock.close()
@@ -0,0 +1,103 @@
+import math
+
+# --- DERIVED PARAMETERS ---
+# name -> (inputs, function). Inputs are other derived names or leaves pushed with
+# set()/set_frame()/set_state(). Evaluated lazily on first read and cached until an input changes.
+def _endurance_str(endurance_hr):
+    if endurance_hr <= 0.0: return "--:--"
+    hrs = int(endurance_hr)
+    return f"{min(hrs, 99):02d}:{int((endurance_hr - hrs) * 60):02d}"
+
+def _wind_correction(inbound_course, leg_time_min, tas, wind_spd, wind_dir):
+    """(WCA deg, outbound time sec) for a hold: crosswind from the inbound course, timed leg."""
+    rad_diff = math.radians(wind_dir - inbound_course)
+    x_wind = wind_spd * math.sin(rad_diff)
+    try: wca = math.degrees(math.asin(min(1.0, max(-1.0, x_wind / tas))))
+    except (ValueError, ZeroDivisionError): wca = 0.0
+
+    headwind = wind_spd * math.cos(rad_diff)
+    gs_out, gs_in = tas + headwind, tas - headwind
+    outbound = (leg_time_min * 60 * gs_in) / gs_out if gs_out > 10 else leg_time_min * 60
+    return wca, outbound
+
+DERIVED = {
+    # PROG page: fuel state (fuel_kg / ff_kg_hr / gs_kt / time_to_dest / fin_reserve from the FMSState)
+    'endurance_hr':     (('fuel_kg', 'ff_kg_hr'), lambda fuel, ff: fuel / ff if ff > 0.5 else 0.0),
+    'endurance_str':    (('endurance_hr',), _endurance_str),
+    'range_nm':         (('endurance_hr', 'gs_kt'), lambda hr, gs: hr * gs),
+    'trip_burn_kg':     (('time_to_dest', 'ff_kg_hr'), lambda sec, ff: sec / 3600.0 * ff),
+    'efob_kg':          (('fuel_kg', 'trip_burn_kg'), lambda fuel, burn: fuel - burn),
+    'abv_rsv_kg':       (('efob_kg', 'fin_reserve'), lambda efob, rsv: efob - rsv),
+    # HOLD page (hold_* leaves from HoldPage, the rest from the telemetry frame)
+    'hold_wind_corr':   (('hold_inbound_course', 'hold_leg_time_min', 'hold_tas', 'wind_spd', 'wind_dir'), _wind_correction),
+}
+
+# Telemetry channels copied from each new frame by set_frame()
+FRAME_INPUTS = ('wind_spd', 'wind_dir')
+# FMSState fields copied from each new FMS tick by set_state()
+STATE_INPUTS = ('fuel_kg', 'ff_kg_hr', 'gs_kt', 'time_to_dest', 'fin_reserve')
+
+_MISSING = object()
+
+class DerivedParams:
+    """
+    Dependency-tracked cache shared by all pages (fms.derived). set() only
+    invalidates when a value actually changes, so a paused sim or an idle FMS
+    costs one comparison per input and no recomputation.
+    """
+    def __init__(self, table=DERIVED):
+        self.table = table
+        self.inputs = {}
+        self.cache = {}
+        self.computes = 0
+        self._frame_seq = None
+        self._state_seq = None
+
+        # input -> derived values that read it directly
+        self.dependents = {}
+        for name, (deps, _) in table.items():
+            for dep in deps:
+                self.dependents.setdefault(dep, []).append(name)
+
+    def set(self, name, value):
+        if self.inputs.get(name, _MISSING) == value: return
+        self.inputs[name] = value
+        self._invalidate(name)
+
+    def update(self, **values):
+        inputs = self.inputs
+        for name, value in values.items():
+            if inputs.get(name, _MISSING) != value:
+                inputs[name] = value
+                self._invalidate(name)
+
+    def set_frame(self, frame):
+        """Pushes FRAME_INPUTS from a TelemetryFrame; skipped if the frame hasn't changed."""
+        seq = getattr(frame, 'seq', None)
+        if seq is not None and seq == self._frame_seq: return
+        self._frame_seq = seq
+        self.update(**{name: frame.get(name, 0.0) for name in FRAME_INPUTS})
+
+    def set_state(self, state):
+        """Pushes STATE_INPUTS from the published FMSState; skipped if no new tick. Call from the render thread."""
+        if state.seq == self._state_seq: return
+        self._state_seq = state.seq
+        self.update(**{name: getattr(state, name) for name in STATE_INPUTS})
+
+    def _invalidate(self, name):
+        for dep in self.dependents.get(name, ()):
+            if self.cache.pop(dep, _MISSING) is not _MISSING:
+                self._invalidate(dep)
+
+    def __getitem__(self, name):
+        val = self.cache.get(name, _MISSING)
+        if val is not _MISSING: return val
+        if name not in self.table: return self.inputs[name]
+        deps, fn = self.table[name]
+        val = self.cache[name] = fn(*[self[d] for d in deps])
+        self.computes += 1
+        return val
+
+    def get(self, name, default=None):
+        try: return self[name]
+        except KeyError: return default
@@ -1,6 +1,7 @@
 import pygame
 import time
 from config import *
+from events import EVENT_SHOW_SEC
 
 class EICAS:
     def __init__(self, shared_fms):
@@ -226,6 +227,27 @@ class EICAS:
             self.screen.blit(msg, (panel_x_start, cas_y))
             cas_y += 18
 
+        # Latched packet-rate events (events.py), shown for EVENT_SHOW_SEC of wall time (expire after link loss too)
+        now = time.time()
+        for i in range(3):
+            t_exc = data['n1_exc_time'][i]
+            if t_exc and now - t_exc < EVENT_SHOW_SEC:
+                msg = self.font_status.render(f"N1 EXCEED {i+1}  {data['n1_exc_peak'][i]:.1f}", True, C_AMBER)
+                self.screen.blit(msg, (panel_x_start, cas_y))
+                cas_y += 18
+            t_start = data['start_time'][i]
+            if t_start and now - t_start < EVENT_SHOW_SEC:
+                peak = data['start_egt_peak'][i]
+                msg = self.font_status.render(f"START {i+1} PK EGT {peak:.0f}", True, C_AMBER if peak > LIMIT_EGT_MAX else C_WHITE)
+                self.screen.blit(msg, (panel_x_start, cas_y))
+                cas_y += 18
+        t_ldg = data['ldg_time']
+        if t_ldg and now - t_ldg < EVENT_SHOW_SEC:
+            vs = data['ldg_vs_fpm']
+            vs_col = C_RED if vs < -600 else (C_AMBER if vs < -360 else C_GREEN)
+            self.screen.blit(self.font_status.render(f"TOUCHDOWN {vs:.0f} FPM", True, vs_col), (panel_x_start, cas_y))
+            cas_y += 18
+
         # --- 2. GEAR & ELV CONFIG ---
         gear_center_x = panel_x_start + 40
         gear_center_y = 155 + Y_OFF
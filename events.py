@@ -0,0 +1,115 @@
+from config import *
+from channels import slot
+
+# --- DETECTOR TUNING ---
+TD_ARM_AGL_FT = 50.0    # touchdown detector arms above this height
+TD_GATE_AGL_FT = 15.0   # and watches for the vertical speed break below it
+TD_BREAK_FPM = -30.0    # descent stopping (vvi rising through this) = ground contact
+TD_SETTLE_SEC = 3.0     # no new break for this long after one -> landing final, disarm
+
+START_N2_DONE = 45.0    # % N2: start sequence complete (row 42, only if the user enables it)
+START_CUTOUT_SEC = 1.0  # starter off this long: start complete (row 33, in the documented setup)
+START_MAX_SEC = 120.0   # abandoned start: stop tracking after this long
+
+TRANSIT_EPS = 1e-4      # gear/flap ratio change per sample that counts as moving
+TRANSIT_SETTLE_SEC = 0.5 # a surface unchanged this long is at rest (repeated sim frames)
+
+EVENT_SHOW_SEC = 120.0  # EICAS shows a latched event for this long
+
+# --- BUFFER SLOTS ---
+_AGL, _VVI = slot('alt_agl_ft'), slot('vvi')
+_N1, _N2, _EGT = slot('n1'), slot('n2'), slot('egt')
+_STARTER = slot('starter_active')
+_GEAR, _FLAPS = slot('gear_pos'), slot('flaps')
+_LDG_VS, _LDG_TIME = slot('ldg_vs_fpm'), slot('ldg_time')
+_START_PEAK, _START_TIME = slot('start_egt_peak'), slot('start_time')
+_EXC_PEAK, _EXC_TIME, _EXC_SEC = slot('n1_exc_peak'), slot('n1_exc_time'), slot('n1_exc_sec')
+_GEAR_TIME, _GEAR_DIR = slot('gear_move_time'), slot('gear_move_dir')
+_FLAP_TIME, _FLAP_DIR = slot('flap_move_time'), slot('flap_move_dir')
+
+class EventDetectors:
+    """
+    Stateful detectors run by the compiled layout decoder once per decoded
+    batch, right after the row that lists them under "detect" in
+    telemetry_schema.json. They see the newest packet's values and compare
+    them with their own state from the previous batch, so coalescing keeps
+    its cost (at the 10 ms batch interval that is still >= 100 Hz). Each
+    latches its result into event channels, so the peaks travel with the
+    published frames (thread, asyncio and process links alike). Times are
+    batch receive times.
+    """
+    def __init__(self):
+        self._td_armed, self._td_latched, self._prev_vvi = False, 0.0, 0.0
+        self._start_ts, self._cutout_ts = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        self._exceed_ts = [0.0, 0.0, 0.0]
+        self._prev_pos, self._last_move = [None, None], [0.0, 0.0] # gear, flaps
+
+    def detect_touchdown(self, buf, now):
+        # --- LANDING RATE: last vvi before the descent breaks near the ground ---
+        agl, vvi = buf[_AGL], buf[_VVI]
+        if agl > TD_ARM_AGL_FT:
+            self._td_armed, self._td_latched = True, 0.0
+        elif self._td_armed and agl < TD_GATE_AGL_FT:
+            if vvi > TD_BREAK_FPM and self._prev_vvi <= TD_BREAK_FPM:
+                # A float followed by a second contact re-latches
+                buf[_LDG_VS], buf[_LDG_TIME] = self._prev_vvi, now
+                self._td_latched = now
+            elif self._td_latched and now - self._td_latched > TD_SETTLE_SEC:
+                self._td_armed = False
+        self._prev_vvi = vvi
+
+    def detect_start_egt(self, buf, now):
+        # --- PEAK EGT PER ENGINE START: starter engaged -> starter cut out (or N2 reaches START_N2_DONE) ---
+        for eng_i in range(3):
+            ts = self._start_ts[eng_i]
+            starter = buf[_STARTER + eng_i]
+            if ts < 0.0: # ended on N2 with the starter still engaged: re-arm once it is released
+                if not starter: self._start_ts[eng_i] = 0.0
+                continue
+            if not ts:
+                if not starter: continue
+                ts = self._start_ts[eng_i] = now
+                self._cutout_ts[eng_i] = 0.0
+                buf[_START_TIME + eng_i], buf[_START_PEAK + eng_i] = now, 0.0
+            egt = buf[_EGT + eng_i]
+            if egt > buf[_START_PEAK + eng_i]: buf[_START_PEAK + eng_i] = egt
+            # Starter gaps shorter than START_CUTOUT_SEC (slow UDP rates) do not end the start
+            if starter: self._cutout_ts[eng_i] = 0.0
+            elif not self._cutout_ts[eng_i]: self._cutout_ts[eng_i] = now
+            cutout = self._cutout_ts[eng_i]
+            if (cutout and now - cutout >= START_CUTOUT_SEC) or buf[_N2 + eng_i] >= START_N2_DONE \
+                    or now - ts > START_MAX_SEC:
+                self._start_ts[eng_i] = -1.0 if starter else 0.0
+
+    def detect_n1_exceed(self, buf, now):
+        # --- N1 ABOVE LIMIT_N1_MAX: start time, peak and duration of the last exceedance ---
+        for eng_i in range(3):
+            n1 = buf[_N1 + eng_i]
+            ts = self._exceed_ts[eng_i]
+            if n1 > LIMIT_N1_MAX:
+                if not ts:
+                    ts = self._exceed_ts[eng_i] = now
+                    buf[_EXC_TIME + eng_i], buf[_EXC_PEAK + eng_i] = now, n1
+                elif n1 > buf[_EXC_PEAK + eng_i]:
+                    buf[_EXC_PEAK + eng_i] = n1
+                buf[_EXC_SEC + eng_i] = now - ts
+            elif ts:
+                self._exceed_ts[eng_i] = 0.0
+
+    def _transit(self, i, val, now):
+        """+1/-1 when surface i starts moving up/down after being still for TRANSIT_SETTLE_SEC, else 0."""
+        prev = self._prev_pos[i]
+        self._prev_pos[i] = val
+        if prev is None or abs(val - prev) <= TRANSIT_EPS: return 0.0
+        still = now - self._last_move[i] > TRANSIT_SETTLE_SEC
+        self._last_move[i] = now
+        if not still: return 0.0
+        return 1.0 if val > prev else -1.0
+
+    def detect_gear_transit(self, buf, now):
+        direction = self._transit(0, buf[_GEAR], now)
+        if direction: buf[_GEAR_TIME], buf[_GEAR_DIR] = now, direction
+
+    def detect_flap_transit(self, buf, now):
+        direction = self._transit(1, buf[_FLAPS], now)
+        if direction: buf[_FLAP_TIME], buf[_FLAP_DIR] = now, direction
@@ -1,17 +1,24 @@
 import threading
-import requests
-import json
 import os
-import math
 import time
+from array import array
+from collections import namedtuple
+from itertools import accumulate
 from config import *
+from derived import DerivedParams
+from totalizer import FuelTotalizer
+from geodesy import haversine_nm, bearing_deg, PointSet, KDTree
+from ofp_cache import OFPCache
+from ofp_loader import Deferred, load_ofp, load_ofp_file
+from simbrief import SimBriefClient
+from jobs import JobWorker
 
 # --- CONSTANTS ---
-EARTH_NM = 3440.065
 KMH_PER_KNOT = 1.852
 MIN_GS_FOR_CALC = 50.0
 BARO_ALERT_CLEAR_SEC = 60.0
 DESCENT_GRADIENT_FT_NM = globals().get("DESCENT_GRADIENT_FT_NM", 318.0) 
+FMS_RATE_HZ = globals().get("FMS_RATE_HZ", 8.0)
 
 # --- ADDITIONAL PARAMETERS ---
 def safe_float(val, default=0.0):
@@ -22,62 +29,331 @@ def safe_int(val, default=0):
     try: return int(val)
     except: return int(default)
 
-def haversine_nm(lat1, lon1, lat2, lon2):
-    try:
-        if None in [lat1, lon1, lat2, lon2] or (abs(lat1) < 0.1 and abs(lon1) < 0.1): return 999.0
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        dphi, dlambda = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-        return EARTH_NM * (2.0 * math.atan2(math.sqrt(a), math.sqrt(max(0.0, 1.0 - a))))
-    except: return 999.0
-
-def calculate_bearing(lat1, lon1, lat2, lon2):
-    try:
-        lat1_r, lon1_r = math.radians(lat1), math.radians(lon1)
-        lat2_r, lon2_r = math.radians(lat2), math.radians(lon2)
-        y = math.sin(lon2_r - lon1_r) * math.cos(lat2_r)
-        x = math.cos(lat1_r)*math.sin(lat2_r) - math.sin(lat1_r)*math.cos(lat2_r)*math.cos(lon2_r - lon1_r)
-        return (math.degrees(math.atan2(y, x)) + 360.0) % 360.0
-    except: return 0.0 
+def fmt_ete(seconds):
+    if seconds < 0: return "00:00"
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    if h > 99: return "99:59"
+    return f"{h:02d}:{m:02d}"
 
 # --- FLIGHT DATA IMPORT ---
+# Per-leg fields, stored column-wise in FlightPlan
+LEG_FLOAT_COLS = ('lat', 'lon', 'plan_alt', 'msa', 'plan_spd_kmh', 'plan_mach',
+                  'leg_dist_static', 'dist_to_go', 'target_alt')
+LEG_INT_COLS = ('leg_course', 'bearing', 'target_vs_fpm')
+LEG_TEXT_COLS = ('ident', 'type', 'stage', 'frequency')
+
 class FlightLeg:
-    def __init__(self, fix_data):
-        self.ident = fix_data.get('ident', 'WPT')
-        self.type = fix_data.get('type', 'wpt')
-        self.lat = safe_float(fix_data.get('pos_lat'))
-        self.lon = safe_float(fix_data.get('pos_long'))
-        self.plan_alt = safe_float(fix_data.get('altitude_feet'))
-        self.msa = safe_float(fix_data.get('mora'))
-        self.stage = fix_data.get('stage', '')
-        self.frequency = fix_data.get('frequency', '') 
-
-        raw_ias = safe_float(fix_data.get('ind_airspeed'))
-        self.plan_spd_kmh = int(raw_ias * KMH_PER_KNOT) if raw_ias > 0 else 0
-        self.plan_mach = safe_float(fix_data.get('mach'))
-
-        self.leg_course = 0
-        self.leg_dist_static = 0.0
-        self.dist_to_go = 0.0
-        self.bearing = 0
-        self.eta_str = "--:--"
-        self.target_alt = 0
-        self.target_vs_fpm = 0
+    """View of one FlightPlan leg: attribute reads and writes go to the plan's columns."""
+    __slots__ = ('plan', 'idx')
+
+    def __init__(self, plan, idx):
+        self.plan, self.idx = plan, idx
+
+def _leg_column(name):
+    def fget(leg): return getattr(leg.plan, name)[leg.idx]
+    def fset(leg, val): getattr(leg.plan, name)[leg.idx] = val
+    return property(fget, fset)
+
+for _name in LEG_FLOAT_COLS + LEG_INT_COLS + LEG_TEXT_COLS: setattr(FlightLeg, _name, _leg_column(_name))
+
+class FlightPlan:
+    """
+    Route as a struct of arrays built from the SimBrief navlog: one array('d') /
+    array('l') per numeric field and a list per text field, so plan.lat,
+    plan.leg_dist_static, ... can be scanned directly. plan[i] is a FlightLeg
+    view, so pages keep using leg.ident, leg.plan_alt, leg.dist_to_go.
+    """
+    def __init__(self, navlog=()):
+        def col(key, default=0.0): return [safe_float(f.get(key), default) for f in navlog]
+        n = len(navlog)
+        self.ident = [f.get('ident', 'WPT') for f in navlog]
+        self.type = [f.get('type', 'wpt') for f in navlog]
+        self.stage = [f.get('stage', '') for f in navlog]
+        self.frequency = [f.get('frequency', '') for f in navlog]
+
+        self.lat, self.lon = array('d', col('pos_lat')), array('d', col('pos_long'))
+        self.plan_alt, self.msa = array('d', col('altitude_feet')), array('d', col('mora'))
+        self.plan_spd_kmh = array('d', (int(v * KMH_PER_KNOT) if v > 0 else 0 for v in col('ind_airspeed')))
+        self.plan_mach = array('d', col('mach'))
+
+        self.leg_dist_static = array('d', bytes(8 * n))
+        self.leg_course = array('l', [0]) * n
+        lat, lon = self.lat, self.lon
+        for i in range(1, n):
+            self.leg_course[i] = int(bearing_deg(lat[i-1], lon[i-1], lat[i], lon[i]))
+            self.leg_dist_static[i] = haversine_nm(lat[i-1], lon[i-1], lat[i], lon[i])
+
+        # Live LNAV/VNAV values, written by FMSCore.update
+        self.dist_to_go = array('d', self.leg_dist_static)
+        self.target_alt = array('d', bytes(8 * n))
+        self.bearing = array('l', [0]) * n
+        self.target_vs_fpm = array('l', [0]) * n
+
+        self._range = range(n)
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, idx):
+        return FlightLeg(self, self._range[idx]) # views are made on access; range checks and wraps idx
+
+    def __iter__(self):
+        return (FlightLeg(self, i) for i in self._range)
+
+def clean_notams(raw_input):
+    """NOTAM display lines from an OFP 'notam' member (list, single dict or ofp_loader.Deferred)."""
+    if isinstance(raw_input, Deferred):
+        raw_input = raw_input.load()
+
+    if isinstance(raw_input, dict):
+        raw_input = [raw_input]
+    
+    if not raw_input: 
+        return []
+    
+    cleaned = []
+    if not isinstance(raw_input, list):
+        raw_input = [raw_input]
+
+    for n in raw_input:
+        if isinstance(n, dict):
+            nid = n.get('notam_id', '??')
+            text = n.get('notam_text', '')
+            cleaned.append(f"{nid}: {text}".replace('\n', ' '))
+        elif isinstance(n, str):
+            cleaned.append(n.replace('\n', ' '))
+        else:
+            cleaned.append(str(n))
+    return cleaned
+
+def ofp_id(data):
+    """(request_id, time_generated) from the OFP's params: equal ids are the same OFP. None if absent."""
+    p = data.get('params') or {}
+    rid, gen = p.get('request_id'), p.get('time_generated')
+    return (str(rid), str(gen)) if rid or gen else None
+
+# --- PARSED OFP ---
+class OFPPlan:
+    """
+    Everything the MFD uses from one SimBrief OFP: route (FlightPlan + leg
+    tables + spatial indexes), airports, weights, fuel and NOTAMs. Built
+    completely without the FMS lock, then installed by FMSCore._install with a
+    single reference swap. Only the FMS touches it afterwards (live leg
+    columns, user constraints and the leg tables they feed).
+    """
+    def __init__(self, data=None):
+        self.origin, self.dest = "----", "----"
+        self.origin_elev, self.dest_elev = 0, 0
+        self.cruise_alt = 0
+        self.std_unix, self.tobt_str = 0, "--:--Z"
+        self.origin_trans_alt, self.dest_trans_level = 18000, 18000
+        self.dest_metar = "NO DATA"
+        self._notam_src, self._notams = ([], []), None
+        self.origin_info, self.dest_info = {}, {}
+        self.perf_impacts = {}
+        self.weights = {}
+        self.fuel_plan = {}
+        self.time_plan = {}
+        self.crz_data = {}
+        self.fin_reserve = 0.0
+        self.ofp_id = None
+        self._set_legs(FlightPlan())
+        if data is not None: self._parse(data)
+
+    def _set_legs(self, legs):
+        self.legs = legs
+        self.build_leg_tables()
+        # Fix coordinates with precomputed trig (geodesy.PointSet), a k-d tree for nearest-fix queries
+        # and the legs carrying a navaid frequency (NAV RAD, route order)
+        self.fixes = PointSet(legs.lat, legs.lon)
+        self.navaid_idx = [i for i, freq in enumerate(legs.frequency) if freq]
+        self.fix_index = KDTree(self.fixes)
+        # fix key -> leg indices, to carry the active leg and user constraints over to a re-parsed OFP
+        self.fix_pos = {}
+        for i in range(len(legs)): self.fix_pos.setdefault(self.fix_key(i), []).append(i)
+
+    def build_leg_tables(self):
+        """
+        Leg tables: cumulative route distance to each leg (prefix sums over
+        leg_dist_static) and the next descent constraint at or after each leg.
+        Rebuild after a constraint changes (under the FMS lock once installed).
+        """
+        legs = self.legs
+        self.cum_dist = list(accumulate(legs.leg_dist_static))
+        self.total_dist_static = self.cum_dist[-1] if self.cum_dist else 0.0
+
+        plan_alts = legs.plan_alt
+        nxt, j = [0] * len(plan_alts), -1
+        for i in range(len(plan_alts) - 1, -1, -1):
+            plan_alt = plan_alts[i]
+            if (self.cruise_alt - plan_alt > 500) and (plan_alt > self.dest_elev + 100): j = i
+            nxt[i] = j
+        self.next_des_cstr = nxt
+
+    def fix_key(self, idx):
+        legs = self.legs
+        return (legs.ident[idx], round(legs.lat[idx], 4), round(legs.lon[idx], 4))
+
+    def find_fix(self, key, near=0):
+        """Index of the leg matching key (the occurrence closest to near), else -1."""
+        found = self.fix_pos.get(key)
+        if not found: return -1
+        return min(found, key=lambda i: abs(i - near))
+
+    def apply_constraints(self, cstr):
+        """Copies user constraints ({fix key: {column: value}}) onto matching legs and rebuilds the leg tables."""
+        legs = self.legs
+        for key, cols in cstr.items():
+            for i in self.fix_pos.get(key, ()):
+                for name, val in cols.items(): getattr(legs, name)[i] = val
+        self.build_leg_tables()
+
+    @property
+    def origin_notams(self):
+        return self._notam_lists()[0]
+
+    @property
+    def dest_notams(self):
+        return self._notam_lists()[1]
+
+    def _notam_lists(self):
+        # Built once, on the first read (the NOTAM tab); a racing second build yields equal lists
+        if self._notams is None: self._notams = tuple(clean_notams(src) for src in self._notam_src)
+        return self._notams
+
+    def _parse(self, data):
+        self.ofp_id = ofp_id(data)
+        self.origin = data.get('origin', {}).get('icao_code', '----')
+        self.dest = data.get('destination', {}).get('icao_code', '----')
+        self.cruise_alt = safe_int(data.get('general', {}).get('initial_altitude', 0))
+        
+        times_data = data.get('times', {})
+        try:
+            self.std_unix = int(times_data.get('sched_out', 0))
+            if self.std_unix > 0:
+                time_struct = time.gmtime(self.std_unix)
+                self.tobt_str = time.strftime("%H:%MZ", time_struct)
+            else:
+                self.tobt_str = "--:--Z"
+        except (ValueError, TypeError, ImportError):
+            self.tobt_str = "--:--Z"
+
+        navlog_raw = data.get('navlog', {}).get('fix', [])
+        
+        orig_data = data.get('origin', {})
+        mora_val = safe_int(navlog_raw[0].get('mora', 0)) if navlog_raw else 0
+
+        atis_data = orig_data.get('atis') or {} 
+        self.origin_info = {
+            'elev': safe_int(orig_data.get('elevation', 0)),
+            'mora': mora_val * 100 if mora_val < 300 else mora_val, 
+            'rwy': orig_data.get('plan_rwy', '--'),
+            'atis': atis_data.get('message', 'NO ATIS DATA').replace('\n', ' ') if isinstance(atis_data, dict) else "N/A",
+            'atis_letter': atis_data.get('letter', 'N/A') if isinstance(atis_data, dict) else "-",
+            'trans_alt': safe_int(orig_data.get('trans_alt', 18000))
+        }
+        self.origin_elev = self.origin_info['elev']
+        self.origin_trans_alt = self.origin_info['trans_alt']
+
+        dest_data = data.get('destination', {})
+        self.dest_info = {
+            'elev': safe_int(dest_data.get('elevation', 0)),
+            'mora': safe_int(navlog_raw[-1].get('mora', 0)) if navlog_raw else 0,
+            'rwy': dest_data.get('plan_rwy', '--'),
+            'metar': data.get('weather', {}).get('dest_metar', 'N/A'),
+            'trans_level': safe_int(dest_data.get('trans_level', 18000))
+        }
+        self.dest_elev = self.dest_info['elev']
+        self.dest_metar = self.dest_info['metar']
+        self.dest_trans_level = self.dest_info['trans_level']
+
+        # NOTAMs are cleaned (and, from ofp_loader, decoded) on first read: see origin_notams
+        self._notam_src, self._notams = (orig_data.get('notam', []), dest_data.get('notam', [])), None
+
+        w = data.get('weights', {})
+        f = data.get('fuel', {})
+        self.weights = {
+            'tow': safe_int(w.get('est_tow')), 
+            'zfw': safe_int(w.get('est_zfw')), 
+            'payload': safe_int(w.get('payload')), 
+            'pax': safe_int(w.get('pax_count')),
+            'cargo': safe_int(w.get('cargo', 0)), 
+            'block_fuel': safe_int(f.get('plan_ramp', 0))
+        }
+        
+        gen = data.get('general', {})
+        self.crz_data = {
+            'init_alt': safe_int(gen.get('initial_altitude', 0)), 
+            'avg_wind_dir': gen.get('avg_wind_dir', '000'),
+            'avg_wind_spd': gen.get('avg_wind_spd', '00'),
+            'avg_isa': gen.get('avg_temp_dev', '0')
+        }
+
+        self.perf_impacts = data.get('impacts', {})
+
+        self.fuel_plan = {
+            'taxi': safe_int(f.get('taxi', 0)),
+            'reserve': safe_int(f.get('reserve', 0)),
+            'plan_ldg': safe_int(f.get('plan_landing', 0))
+        }
+        self.fin_reserve = safe_float(f.get('reserve', 0))
+
+        self._set_legs(FlightPlan(navlog_raw))
+
+# FMSCore attributes read through to the installed OFPPlan
+PLAN_FIELDS = ('legs', 'origin', 'dest', 'origin_elev', 'dest_elev', 'cruise_alt', 'std_unix', 'tobt_str',
+               'origin_trans_alt', 'dest_trans_level', 'dest_metar', 'dest_notams', 'origin_notams',
+               'origin_info', 'dest_info', 'perf_impacts', 'weights', 'fuel_plan', 'time_plan', 'crz_data',
+               'fin_reserve', 'cum_dist', 'total_dist_static', 'next_des_cstr',
+               'fixes', 'navaid_idx', 'fix_index')
+
+# --- FMS RESULTS ---
+class FMSState(namedtuple('FMSState', 'seq plan_id plan legs cum_dist active_idx phase crz_warn baro_alert '
+                          'dist_to_go bearing target_alt target_vs_fpm dist_to_dest dist_to_td progress_pct '
+                          'time_to_dest fuel_pred_dest vnav_deviation acceleration ete_gs '
+                          'fuel_kg ff_kg_hr gs_kt fin_reserve')):
+    """
+    Immutable result of one FMS tick, published by a single reference swap
+    (fms.state). Pages grab it once per frame and read it without the lock, so
+    active_idx, the active leg's dist_to_go/bearing/target_alt/target_vs_fpm and
+    the route totals always come from the same tick. plan is the OFPPlan that legs
+    belongs to; plan_id changes with every installed OFP, so a leg index picked
+    from one state can be checked against it.
+    """
+    __slots__ = ()
+
+    def dist_to_leg(self, idx):
+        """Along-route distance from the aircraft to leg idx (idx >= active_idx), O(1)."""
+        act = self.active_idx
+        if not 0 <= act <= idx < len(self.legs): return 0.0
+        return self.dist_to_go + self.cum_dist[idx] - self.cum_dist[act]
+
+    def leg_ete(self, idx):
+        """Seconds to leg idx at the tick's ground speed."""
+        return self.dist_to_leg(idx) / self.ete_gs * 3600.0
+
+    def leg_ete_str(self, idx):
+        """ETE to leg idx as HH:MM; formatted on demand for the rows a page shows."""
+        return fmt_ete(self.leg_ete(idx))
 
 # --- FMS FUNCTIONS ---
 class FMSCore:
     def __init__(self):
         self.lock = threading.Lock()
-        self.legs = []
-        self.origin, self.dest = "----", "----"
-        self.origin_elev, self.dest_elev = 0, 0
+        self.plan = OFPPlan() # route, airports, weights, NOTAMs: swapped whole by _install
+        self.user_cstr = {}   # fix key -> {column: value} entered on the NAV page, kept across OFP reloads
+        self.ofp_cache = OFPCache()
+        self.simbrief = SimBriefClient(on_status=self._set_status)
+        self.jobs = JobWorker(name="FMS-IO") # OFP loads, one at a time (fetch_simbrief)
         self.is_loaded = False
         self.status_msg = "NO F-PLN"
         self.active_idx = 0
         self.position_initialized = False
 
         self.dist_to_td, self.dist_to_dest = 9999.0, 0.0
-        self.total_dist_static, self.progress_pct = 0.0, 0.0
+        self.progress_pct = 0.0
+        self.ete_gs = MIN_GS_FOR_CALC # GS used by the last update, for FMSState.leg_ete()
         
         self.last_lat = 0.0
         self.last_lon = 0.0
@@ -90,164 +366,166 @@ class FMSCore:
         self.baro_alert, self.baro_alert_start_time, self.last_alt = "", 0.0, 0.0
 
         self.fuel_pred_dest, self.time_to_dest, self.vnav_deviation = 0.0, 0.0, 0.0
-        self.cached_fuel, self.cached_flow, self.fin_reserve = 0.0, 0.0, 0.0
-
-        self.dest_metar, self.dest_notams, self.origin_notams = "NO DATA", [], []
-        self.origin_info, self.dest_info = {}, {}
-        
-        self.perf_impacts = {}
-        self.weights = {}
-        self.fuel_plan = {}
-        self.time_plan = {}
-        self.crz_data = {}
-
-        self.origin_trans_alt, self.dest_trans_level = 18000, 18000
-        self.cruise_alt = 0
-
-    def _fmt_ete(self, seconds):
-        if seconds < 0: return "00:00"
-        m, s = divmod(int(seconds), 60)
-        h, m = divmod(m, 60)
-        if h > 99: return "99:59"
-        return f"{h:02d}:{m:02d}"  
+        self.cached_fuel, self.cached_flow = 0.0, 0.0
+
+        # Derived values shared by all pages (PROG fuel state, HOLD wind correction)
+        self.derived = DerivedParams()
+        self.derived.update(fuel_kg=0.0, ff_kg_hr=0.0, gs_kt=0.0, time_to_dest=0.0, fin_reserve=0.0,
+                            wind_spd=0.0, wind_dir=0.0)
+        self.fuel_used = FuelTotalizer()
+
+        # Fixed-rate scheduler (start/stop): the render loop feeds frames, the FMS thread publishes self.state
+        self._frame = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.tick_sec, self.tick_max_sec = 0.0, 0.0 # last / worst FMS tick duration
+        self.state_seq = 0
+        self.plan_id = 0 # bumped by _install: leg indices from an older FMSState are stale
+        self._publish()
+
+    def _publish(self):
+        """Builds and installs the next FMSState. Call under lock at the end of every change."""
+        legs, i = self.legs, self.active_idx
+        if i < len(legs):
+            live = (legs.dist_to_go[i], legs.bearing[i], legs.target_alt[i], legs.target_vs_fpm[i])
+        else: live = (0.0, 0, 0.0, 0)
+        self.state_seq += 1
+        self.state = FMSState(self.state_seq, self.plan_id, self.plan, legs, self.cum_dist, i, self.phase, self.crz_warn, self.baro_alert,
+                              *live, self.dist_to_dest, self.dist_to_td, self.progress_pct,
+                              self.time_to_dest, self.fuel_pred_dest, self.vnav_deviation, self.acceleration, self.ete_gs,
+                              self.cached_fuel, self.cached_flow, self.current_gs, self.fin_reserve)
+
+    # --- FIXED-RATE SCHEDULER ---
+    def start(self, rate_hz=FMS_RATE_HZ):
+        """Runs LNAV/VNAV in its own thread at rate_hz on the latest frame passed to feed()."""
+        if self._thread: return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(1.0 / rate_hz,), name="FMS", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.jobs.stop()
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def feed(self, frame):
+        """Latest TelemetryFrame for the FMS thread; a reference store, never blocks the render loop."""
+        self._frame = frame
+
+    def _run(self, period):
+        next_t = time.monotonic()
+        while not self._stop.wait(max(0.0, next_t - time.monotonic())):
+            t0 = time.monotonic()
+            next_t = max(next_t + period, t0) # fixed rate; after an overrun, skip missed ticks
+            frame = self._frame
+            if frame is None: continue
+            try: self.tick(frame)
+            except Exception as e: print(f"[FMS] tick failed: {e}")
+            self.tick_sec = time.monotonic() - t0
+            if self.tick_sec > self.tick_max_sec: self.tick_max_sec = self.tick_sec
+
+    def tick(self, frame):
+        """One FMS step from a telemetry frame (no-op until the position is valid)."""
+        lat = frame.get('lat', 0)
+        if abs(lat) > 0.1:
+            self.update(lat, frame.get('lon', 0), frame.get('alt_msl_ft', 0), frame.get('gs_kt', 0),
+                        frame.get('total_fuel_kg', 0), frame.get('total_ff_kg_hr', 0), frame.get('baro', 29.92), time.time())
+
+    def dist_to_leg(self, idx):
+        """Along-route distance from the aircraft to leg idx (idx >= active_idx), O(1)."""
+        act = self.active_idx
+        if not 0 <= act <= idx < len(self.legs): return 0.0
+        return self.legs.dist_to_go[act] + self.cum_dist[idx] - self.cum_dist[act]
 
     def fetch_simbrief(self, force_download=False):
-        t = threading.Thread(target=self._fetch_logic, args=(force_download,))
-        t.daemon = True; t.start()
+        """
+        Queues an OFP load on the FMS job worker and returns the jobs.Job
+        (progress, state). Repeated taps while one is pending or running
+        coalesce into it; a different request supersedes it.
+        """
+        return self.jobs.submit('ofp', self._fetch_logic, force_download)
+
+    @property
+    def fetch_progress(self):
+        """(message, 0..1) of the running / queued OFP load, else None."""
+        job = self.jobs.find('ofp')
+        return (job.message, job.progress) if job is not None else None
+
+    def _fetch_logic(self, force_download, job=None):
+        def step(progress, msg):
+            # True once the job is superseded: stop there, leave files and the installed plan alone
+            if job is None: return False
+            job.report(progress, msg)
+            return job.cancelled
 
-    def _fetch_logic(self, force_download):
         with self.lock: self.status_msg = "LOADING..."
-        data = None
+        data, validators = None, None # validators: adopted by the SimBrief client only once the OFP is installed
+        t0 = time.perf_counter()
         if (not force_download) and os.path.exists(LOCAL_FILE_PATH):
+            step(0.1, "CACHE")
+            plan = self.ofp_cache.load(LOCAL_FILE_PATH)
+            if plan is not None:
+                if step(0.9, "INSTALL"): return
+                self._install(plan)
+                print(f"[FMS] OFP loaded from cache in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+                return
             try:
-                with open(LOCAL_FILE_PATH, 'r', encoding='utf-8') as f: data = json.load(f)
+                data = load_ofp_file(LOCAL_FILE_PATH)
             except: pass
         if data is None:
-            try:
-                r = requests.get(f"{SIMBRIEF_API_URL}?username={SIMBRIEF_USERNAME}&json=1", timeout=15)
-                if r.status_code == 200:
-                    data = r.json()
-                    with open(LOCAL_FILE_PATH, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
-                else: 
-                    with self.lock: self.status_msg = f"HTTP {r.status_code}"; return
-            except: 
-                with self.lock: self.status_msg = "NET ERROR"; return
-        if data: self._parse_ofp(data)
+            if step(0.2, "DOWNLOAD"): return
+            status, raw, validators = self.simbrief.fetch(conditional=self.is_loaded, sleep=job.sleep if job else None)
+            if status == "CANCELLED": return
+            if status == "UNCHANGED": return self._ofp_unchanged(t0)
+            if raw is None: return self._set_status(status)
+            if step(0.6, "PARSE"): return
+            try: data = load_ofp(raw.decode('utf-8'))
+            except ValueError: return self._set_status("BAD OFP")
+            oid = ofp_id(data)
+            if self.is_loaded and oid is not None and oid == self.plan.ofp_id:
+                self.simbrief.commit(validators) # the installed plan is this OFP
+                return self._ofp_unchanged(t0)
+            if step(0.65, "SAVE"): return
+            # keep the OFP as served (compact); only the sections OFPPlan reads were decoded
+            with open(LOCAL_FILE_PATH, 'wb') as f: f.write(raw)
+        if data:
+            step(0.7, "PARSE")
+            plan = OFPPlan(data)
+            self.ofp_cache.save(plan, LOCAL_FILE_PATH)
+            if step(0.9, "INSTALL"): return
+            self._install(plan)
+            if validators: self.simbrief.commit(validators)
+            print(f"[FMS] OFP loaded and parsed in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    def _set_status(self, msg):
+        with self.lock: self.status_msg = msg
+
+    def _ofp_unchanged(self, t0):
+        """Refresh found the loaded OFP current (304 or same request_id / time_generated): nothing re-parsed."""
+        self._set_status("LOADED")
+        print(f"[FMS] OFP unchanged, checked in {(time.perf_counter() - t0) * 1e3:.1f} ms")
 
     def _parse_ofp(self, data):
+        self._install(OFPPlan(data))
+
+    def _install(self, plan):
+        """
+        Makes plan the active OFP. All O(legs) work (user constraints, leg tables)
+        happens before the lock; under it only the active leg is looked up again
+        and the reference is swapped, so an FMS tick never waits on a parse.
+        """
+        cstr = dict(self.user_cstr)
+        if cstr: plan.apply_constraints(cstr)
         with self.lock:
-            self.legs = []
-            self.origin = data.get('origin', {}).get('icao_code', '----')
-            self.dest = data.get('destination', {}).get('icao_code', '----')
-            self.cruise_alt = safe_int(data.get('general', {}).get('initial_altitude', 0))
-            
-            times_data = data.get('times', {})
-            try:
-                self.std_unix = int(times_data.get('sched_out', 0))
-                if self.std_unix > 0:
-                    import time
-                    time_struct = time.gmtime(self.std_unix)
-                    self.tobt_str = time.strftime("%H:%MZ", time_struct)
-                else:
-                    self.tobt_str = "--:--Z"
-            except (ValueError, TypeError, ImportError):
-                self.tobt_str = "--:--Z"
-
-            navlog_raw = data.get('navlog', {}).get('fix', [])
-            
-            orig_data = data.get('origin', {})
-            mora_val = safe_int(navlog_raw[0].get('mora', 0)) if navlog_raw else 0
-
-            atis_data = orig_data.get('atis') or {} 
-            self.origin_info = {
-                'elev': safe_int(orig_data.get('elevation', 0)),
-                'mora': mora_val * 100 if mora_val < 300 else mora_val, 
-                'rwy': orig_data.get('plan_rwy', '--'),
-                'atis': atis_data.get('message', 'NO ATIS DATA').replace('\n', ' ') if isinstance(atis_data, dict) else "N/A",
-                'atis_letter': atis_data.get('letter', 'N/A') if isinstance(atis_data, dict) else "-",
-                'trans_alt': safe_int(orig_data.get('trans_alt', 18000))
-            }
-            self.origin_elev = self.origin_info['elev']
-            self.origin_trans_alt = self.origin_info['trans_alt']
-
-            dest_data = data.get('destination', {})
-            self.dest_info = {
-                'elev': safe_int(dest_data.get('elevation', 0)),
-                'mora': safe_int(navlog_raw[-1].get('mora', 0)) if navlog_raw else 0,
-                'rwy': dest_data.get('plan_rwy', '--'),
-                'metar': data.get('weather', {}).get('dest_metar', 'N/A'),
-                'trans_level': safe_int(dest_data.get('trans_level', 18000))
-            }
-            self.dest_elev = self.dest_info['elev']
-            self.dest_metar = self.dest_info['metar']
-            self.dest_trans_level = self.dest_info['trans_level']
-
-            
-            def parse_safe_notams(raw_input):
-                if isinstance(raw_input, dict):
-                    raw_input = [raw_input]
-                
-                if not raw_input: 
-                    return []
-                
-                cleaned = []
-                if not isinstance(raw_input, list):
-                    raw_input = [raw_input]
-
-                for n in raw_input:
-                    if isinstance(n, dict):
-                        nid = n.get('notam_id', '??')
-                        text = n.get('notam_text', '')
-                        cleaned.append(f"{nid}: {text}".replace('\n', ' '))
-                    elif isinstance(n, str):
-                        cleaned.append(n.replace('\n', ' '))
-                    else:
-                        cleaned.append(str(n))
-                return cleaned
-
-            self.origin_notams = parse_safe_notams(orig_data.get('notam', []))
-            self.dest_notams = parse_safe_notams(dest_data.get('notam', []))
-
-            w = data.get('weights', {})
-            f = data.get('fuel', {})
-            self.weights = {
-                'tow': safe_int(w.get('est_tow')), 
-                'zfw': safe_int(w.get('est_zfw')), 
-                'payload': safe_int(w.get('payload')), 
-                'pax': safe_int(w.get('pax_count')),
-                'cargo': safe_int(w.get('cargo', 0)), 
-                'block_fuel': safe_int(f.get('plan_ramp', 0))
-            }
-            
-            gen = data.get('general', {})
-            self.crz_data = {
-                'init_alt': safe_int(gen.get('initial_altitude', 0)), 
-                'avg_wind_dir': gen.get('avg_wind_dir', '000'),
-                'avg_wind_spd': gen.get('avg_wind_spd', '00'),
-                'avg_isa': gen.get('avg_temp_dev', '0')
-            }
-
-            self.perf_impacts = data.get('impacts', {})
-
-            self.fuel_plan = {
-                'taxi': safe_int(f.get('taxi', 0)),
-                'reserve': safe_int(f.get('reserve', 0)),
-                'plan_ldg': safe_int(f.get('plan_landing', 0))
-            }
-            self.fin_reserve = safe_float(f.get('reserve', 0))
-
-            total_d, prev_leg = 0.0, None
-            for f_node in navlog_raw:
-                leg = FlightLeg(f_node)
-                if prev_leg:
-                    leg.leg_course = int(calculate_bearing(prev_leg.lat, prev_leg.lon, leg.lat, leg.lon))
-                    leg.leg_dist_static = haversine_nm(prev_leg.lat, prev_leg.lon, leg.lat, leg.lon)
-                    total_d += leg.leg_dist_static
-                self.legs.append(leg); prev_leg = leg
-            
-            self.total_dist_static = total_d
+            if self.user_cstr != cstr: plan.apply_constraints(self.user_cstr) # edited meanwhile
+            old, act = self.plan, self.active_idx
+            idx = plan.find_fix(old.fix_key(act), act) if act < len(old.legs) else -1
+            self.plan, self.plan_id = plan, self.plan_id + 1
+            if idx >= 0: self.active_idx = idx # same fix in the new route: keep flying it
+            else: self.active_idx, self.position_initialized = 0, False # resume from the nearest fix
             self.is_loaded = True; self.status_msg = "LOADED"
-            self.position_initialized = False
+            self._publish()
 
     def update(self, lat, lon, alt_ft, gs_kt, fuel_kg, ff_kg_hr, baro, time_now):
         if not self.is_loaded or not self.legs: return
@@ -267,45 +545,32 @@ class FMSCore:
 
             # LNAV WAYPOINT PROGRESS
 
-            if self.active_idx < len(self.legs):
-                target = self.legs[self.active_idx]
-                dist = haversine_nm(lat, lon, target.lat, target.lon)
-                target.dist_to_go, target.bearing = dist, int(calculate_bearing(lat, lon, target.lat, target.lon))
-                if target.plan_alt > 0:
-                    target.target_alt = target.plan_alt
-                else: target.target_alt = self.cruise_alt if self.cruise_alt > 0 else self.dest_elev
+            plan = self.legs # columns; self.legs[i] is a view for pages
+            if self.active_idx < len(plan):
+                i = self.active_idx
+                t_lat, t_lon = plan.lat[i], plan.lon[i]
+                dist = haversine_nm(lat, lon, t_lat, t_lon)
+                plan.dist_to_go[i], plan.bearing[i] = dist, int(bearing_deg(lat, lon, t_lat, t_lon))
+                if plan.plan_alt[i] > 0:
+                    plan.target_alt[i] = plan.plan_alt[i]
+                else: plan.target_alt[i] = self.cruise_alt if self.cruise_alt > 0 else self.dest_elev
 
                 # A. NORMAL
-                if dist < 2.0 and self.active_idx < len(self.legs) - 1:
+                if dist < 2.0 and i < len(plan) - 1:
                     self.active_idx += 1
                 # B. OVERFLY
-                elif self.active_idx < len(self.legs) - 1:
-                    next_wpt = self.legs[self.active_idx + 1]
-                    d_next = haversine_nm(lat, lon, next_wpt.lat, next_wpt.lon)
+                elif i < len(plan) - 1:
+                    d_next = haversine_nm(lat, lon, plan.lat[i + 1], plan.lon[i + 1])
                     if d_next < dist and dist > 5.0 and d_next < 20.0:
-                         print(f"[FMS] Auto-Sequence: Passed {target.ident} (Overshoot protection)")
+                         print(f"[FMS] Auto-Sequence: Passed {plan.ident[i]} (Overshoot protection)")
                          self.active_idx += 1
 
-            # CALCULATE ETE
+            # CALCULATE ETE (per-leg ETE on demand: FMSState.leg_ete() / leg_ete_str())
+
+            cum_dist = self.dist_to_leg(len(self.legs) - 1)
+            cum_time = (cum_dist / calc_gs) * 3600.0
+            self.ete_gs = calc_gs
 
-            cum_time = 0.0
-            cum_dist = 0.0 
-            
-            if self.active_idx < len(self.legs):
-                act = self.legs[self.active_idx]
-                cum_dist = act.dist_to_go 
-                dt_leg = (act.dist_to_go / calc_gs) * 3600.0
-                cum_time = dt_leg
-                act.eta_str = self._fmt_ete(cum_time)
-                
-                for i in range(self.active_idx + 1, len(self.legs)):
-                    leg = self.legs[i]
-                    cum_dist += leg.leg_dist_static
-                    l_dt = (leg.leg_dist_static / calc_gs) * 3600.0
-                    cum_time += l_dt
-                    leg.eta_str = self._fmt_ete(cum_time)
-                    leg.dist_to_go = leg.leg_dist_static 
-            
             self.dist_to_dest = cum_dist
             self.time_to_dest = cum_time 
             
@@ -314,6 +579,7 @@ class FMSCore:
             else: 
                 self.fuel_pred_dest = fuel_kg
             
+
             if self.total_dist_static > 0: 
                 self.progress_pct = max(0.0, min(100.0, (1.0 - cum_dist/self.total_dist_static)*100.0))
 
@@ -347,47 +613,43 @@ class FMSCore:
 
             #  VNAV CALCULATION
 
-            if self.active_idx < len(self.legs):
-                act_leg = self.legs[self.active_idx]
+            if self.active_idx < len(plan):
+                i = self.active_idx
                 
                 # --- CLB ---
                 if self.phase == "TO/CLB" or self.phase == "CLB":
-                    if act_leg.plan_alt > 100:
-                        target_alt_val = act_leg.plan_alt
+                    if plan.plan_alt[i] > 100:
+                        target_alt_val = plan.plan_alt[i]
                     else:
                         target_alt_val = self.cruise_alt
                     
-                    act_leg.target_alt = target_alt_val
+                    plan.target_alt[i] = target_alt_val
                     
-                    dist_to_calc = act_leg.dist_to_go
+                    dist_to_calc = plan.dist_to_go[i]
                     self.vnav_deviation = 0.0 
                     
                     if dist_to_calc > 0.5 and gs_kt > 50:
                         time_to_target = (dist_to_calc / calc_gs) * 60.0
                         height_diff = target_alt_val - alt_ft
                         # IF CLIMB FASTER THAN PLANNED
-                        act_leg.target_vs_fpm = int(height_diff / time_to_target) if height_diff > 0 else 0
+                        plan.target_vs_fpm[i] = int(height_diff / time_to_target) if height_diff > 0 else 0
                     else: 
-                        act_leg.target_vs_fpm = 0
+                        plan.target_vs_fpm[i] = 0
 
                 # --- DES ---
                 elif self.phase == "DES":
                     # DEFAULT TO DEST ELEV
                     target_alt_val = self.dest_elev 
                     
-                    dist_to_calc = act_leg.dist_to_go
-                    
-                    for i in range(self.active_idx, len(self.legs)):
-                        leg = self.legs[i]
-                        
-                        if (self.cruise_alt - leg.plan_alt > 500) and (leg.plan_alt > self.dest_elev + 100):
-                            target_alt_val = leg.plan_alt
-                            break
-
-                        if i + 1 < len(self.legs):
-                            dist_to_calc += self.legs[i+1].leg_dist_static
+                    # NEXT DESCENT CONSTRAINT, ELSE THE LAST LEG
+                    cstr_idx = self.next_des_cstr[i]
+                    if cstr_idx >= 0:
+                        target_alt_val = plan.plan_alt[cstr_idx]
+                        dist_to_calc = self.dist_to_leg(cstr_idx)
+                    else:
+                        dist_to_calc = self.dist_to_leg(len(plan) - 1)
                     
-                    act_leg.target_alt = target_alt_val
+                    plan.target_alt[i] = target_alt_val
                     
                     # --- VDEV and VS TGT ---
                     ideal_alt = target_alt_val + (dist_to_calc * 318.0)
@@ -397,15 +659,17 @@ class FMSCore:
                         time_to_target = (dist_to_calc / calc_gs) * 60.0
                         height_diff = target_alt_val - alt_ft
                         req_vs = int(height_diff / time_to_target)
-                        act_leg.target_vs_fpm = max(min(req_vs, 0), -4000)
+                        plan.target_vs_fpm[i] = max(min(req_vs, 0), -4000)
                     else: 
-                        act_leg.target_vs_fpm = 0
+                        plan.target_vs_fpm[i] = 0
+
+            self._publish()
 
     def _sync_position(self, lat, lon):
         if not self.legs: return
         
         # FIND NEAREST WPT TO RESUME
-        best_idx = min(range(len(self.legs)), key=lambda i: haversine_nm(lat, lon, self.legs[i].lat, self.legs[i].lon))
+        best_idx = self.fix_index.nearest(lat, lon)[0]
         
         last_leg_idx = len(self.legs) - 1
 
@@ -425,8 +689,8 @@ class FMSCore:
         dist_curr = haversine_nm(lat, lon, curr.lat, curr.lon)
         dist_next = haversine_nm(lat, lon, next_pt.lat, next_pt.lon)
 
-        course_leg = calculate_bearing(curr.lat, curr.lon, next_pt.lat, next_pt.lon)
-        bearing_to_plane = calculate_bearing(curr.lat, curr.lon, lat, lon)
+        course_leg = bearing_deg(curr.lat, curr.lon, next_pt.lat, next_pt.lon)
+        bearing_to_plane = bearing_deg(curr.lat, curr.lon, lat, lon)
         diff = abs(course_leg - bearing_to_plane)
         if diff > 180: diff = 360 - diff
 
@@ -453,15 +717,28 @@ class FMSCore:
     def _fmt_time(self, ts):
         return time.strftime("%H:%M", time.localtime(ts))
 
-    def set_direct_to(self, leg_index):
+    def set_direct_to(self, leg_index, plan_id=None):
+        """Flies direct to leg_index; False (nothing changed) if plan_id is no longer the installed OFP."""
         with self.lock:
+            if plan_id is not None and plan_id != self.plan_id: return False
             if 0 <= leg_index < len(self.legs): self.active_idx = leg_index
+            self._publish()
+            return True
 
-    def modify_leg_constraint(self, leg_index, spd=None, alt=None, is_mach=False, is_metric=False):
+    def modify_leg_constraint(self, leg_index, spd=None, alt=None, is_mach=False, is_metric=False, plan_id=None):
         with self.lock:
+            if plan_id is not None and plan_id != self.plan_id: return False
             if 0 <= leg_index < len(self.legs):
-                leg = self.legs[leg_index]
+                leg, cols = self.legs[leg_index], {}
                 if spd is not None:
-                    leg.plan_mach = spd if is_mach else 0.0
-                    leg.plan_spd_kmh = spd * 1225 if is_mach else spd
-                if alt is not None: leg.plan_alt = alt / 0.3048 if is_metric else alt
\ No newline at end of file
+                    cols['plan_mach'] = leg.plan_mach = spd if is_mach else 0.0
+                    cols['plan_spd_kmh'] = leg.plan_spd_kmh = spd * 1225 if is_mach else spd
+                if alt is not None:
+                    cols['plan_alt'] = leg.plan_alt = alt / 0.3048 if is_metric else alt
+                    self.plan.build_leg_tables()
+                key = self.plan.fix_key(leg_index)
+                self.user_cstr[key] = {**self.user_cstr.get(key, {}), **cols}
+                self._publish()
+            return True
+
+for _name in PLAN_FIELDS: setattr(FMSCore, _name, property(lambda self, _n=_name: getattr(self.plan, _n)))
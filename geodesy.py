@@ -0,0 +1,167 @@
+import math
+from array import array
+
+# --- GREAT CIRCLE ON A SPHERICAL EARTH ---
+EARTH_NM = 3440.065
+
+_sin, _cos, _atan2, _sqrt, _radians = math.sin, math.cos, math.atan2, math.sqrt, math.radians
+_DEG = 180.0 / math.pi
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Distance in NM; 999.0 if point 1 is unset (0/0) or an input is None/bad."""
+    try:
+        if abs(lat1) < 0.1 and abs(lon1) < 0.1: return 999.0
+        sp = _sin(_radians(lat2 - lat1) * 0.5)
+        sl = _sin(_radians(lon2 - lon1) * 0.5)
+        a = sp * sp + _cos(_radians(lat1)) * _cos(_radians(lat2)) * sl * sl
+        return EARTH_NM * 2.0 * _atan2(_sqrt(a), _sqrt(max(0.0, 1.0 - a)))
+    except (TypeError, ValueError): return 999.0
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    """Initial true bearing from point 1 to point 2, 0-360; 0.0 on bad input."""
+    try:
+        phi1, phi2 = _radians(lat1), _radians(lat2)
+        dlam = _radians(lon2 - lon1)
+        c2 = _cos(phi2)
+        return (_atan2(_sin(dlam) * c2, _cos(phi1) * _sin(phi2) - _sin(phi1) * c2 * _cos(dlam)) * _DEG) % 360.0
+    except (TypeError, ValueError): return 0.0
+
+class PointSet:
+    """
+    Fixed set of points (e.g. flight-plan fixes) with their trig precomputed once:
+    sin/cos of lat and lon and the unit vector. One-to-N distance and bearing then
+    cost a few multiplies plus one asin/atan2 per point, with no per-point
+    radians()/sin()/cos() calls.
+    """
+    __slots__ = ('lat', 'lon', 'sin_lat', 'cos_lat', 'sin_lon', 'cos_lon', 'x', 'y', 'z')
+
+    def __init__(self, lats, lons):
+        self.lat, self.lon = array('d', lats), array('d', lons)
+        rlat = [math.radians(v) for v in self.lat]
+        rlon = [math.radians(v) for v in self.lon]
+        self.sin_lat = array('d', map(math.sin, rlat))
+        self.cos_lat = array('d', map(math.cos, rlat))
+        self.sin_lon = array('d', map(math.sin, rlon))
+        self.cos_lon = array('d', map(math.cos, rlon))
+        self.x = array('d', (c * o for c, o in zip(self.cos_lat, self.cos_lon)))
+        self.y = array('d', (c * s for c, s in zip(self.cos_lat, self.sin_lon)))
+        self.z = array('d', self.sin_lat)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _columns(self, idx, *cols):
+        """Columns restricted to idx (None = all points, no copy)."""
+        if idx is None: return cols
+        return [[c[i] for i in idx] for c in cols]
+
+    def _chord2(self, lat, lon, idx):
+        """Squared chord lengths (unit sphere) from (lat, lon) to points idx."""
+        rlat, rlon = math.radians(lat), math.radians(lon)
+        c = math.cos(rlat)
+        x0, y0, z0 = c * math.cos(rlon), c * math.sin(rlon), math.sin(rlat)
+        xs, ys, zs = self._columns(idx, self.x, self.y, self.z)
+        return [(x - x0) * (x - x0) + (y - y0) * (y - y0) + (z - z0) * (z - z0) for x, y, z in zip(xs, ys, zs)]
+
+    def distances_nm(self, lat, lon, idx=None):
+        """Distances from (lat, lon) to points idx (default: all), in NM."""
+        asin, sqrt, k = math.asin, math.sqrt, 2.0 * EARTH_NM
+        # chord <= 2 on the unit sphere; clamp only guards rounding at the antipode
+        return [k * asin(h if h < 1.0 else 1.0) for h in [sqrt(c2) * 0.5 for c2 in self._chord2(lat, lon, idx)]]
+
+    def bearings_deg(self, lat, lon, idx=None):
+        """Initial true bearings from (lat, lon) to points idx (default: all)."""
+        rlat, rlon = math.radians(lat), math.radians(lon)
+        s1, c1 = math.sin(rlat), math.cos(rlat)
+        so, co = math.sin(rlon), math.cos(rlon)
+        atan2, k = math.atan2, 180.0 / math.pi
+        # sin/cos of (lon - lon0) by the difference identities: no trig per point but atan2
+        return [(atan2((sn * co - cn * so) * cl, c1 * sl - s1 * cl * (cn * co + sn * so)) * k) % 360.0
+                for sl, cl, sn, cn in zip(*self._columns(idx, self.sin_lat, self.cos_lat, self.sin_lon, self.cos_lon))]
+
+    def nearest(self, lat, lon, idx=None):
+        """(index, distance NM) of the point closest to (lat, lon); (-1, 999.0) if empty."""
+        c2 = self._chord2(lat, lon, idx)
+        if not c2: return -1, 999.0
+        best_c2 = min(c2)
+        pos = c2.index(best_c2)
+        best = pos if idx is None else idx[pos]
+        return best, 2.0 * EARTH_NM * math.asin(min(1.0, math.sqrt(best_c2) * 0.5))
+
+# --- SPATIAL INDEX ---
+KD_LEAF = 8 # ranges this small are scanned linearly
+
+class KDTree:
+    """
+    Static k-d tree over the unit vectors of a PointSet (optionally a subset idx).
+    Chord length is monotonic in great-circle distance, so 3-D Euclidean search
+    on the sphere answers nearest-fix and within-radius queries exactly, visiting
+    O(log n) nodes instead of every fix. Implicit layout: the node of a range
+    [lo, hi) is its middle slot, children are the two halves; no node objects.
+    """
+    __slots__ = ('points', 'order', 'axis', 'split')
+
+    def __init__(self, points, idx=None):
+        self.points = points
+        order = list(range(len(points)) if idx is None else idx)
+        cols = (points.x, points.y, points.z)
+        self.axis = array('b', bytes(len(order)))
+        self.split = array('d', bytes(8 * len(order)))
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= KD_LEAF: continue
+            part = order[lo:hi]
+            # split on the widest axis at the median
+            ax = max(range(3), key=lambda a: max(cols[a][i] for i in part) - min(cols[a][i] for i in part))
+            col = cols[ax]
+            part.sort(key=col.__getitem__)
+            order[lo:hi] = part
+            mid = (lo + hi) >> 1
+            self.axis[mid], self.split[mid] = ax, col[order[mid]]
+            stack.append((lo, mid)); stack.append((mid + 1, hi))
+        self.order = array('l', order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _search(self, lat, lon, r2):
+        """Yields (chord^2, index) of candidate points; r2 is read back from a 1-item list (shrinks for nearest)."""
+        rlat, rlon = math.radians(lat), math.radians(lon)
+        c = math.cos(rlat)
+        q = (c * math.cos(rlon), c * math.sin(rlon), math.sin(rlat))
+        x0, y0, z0 = q
+        px, py, pz = self.points.x, self.points.y, self.points.z
+        order, axis, split = self.order, self.axis, self.split
+        stack = [(0, len(order), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound > r2[0]: continue
+            if hi - lo <= KD_LEAF:
+                for k in range(lo, hi):
+                    i = order[k]
+                    dx, dy, dz = px[i] - x0, py[i] - y0, pz[i] - z0
+                    yield dx * dx + dy * dy + dz * dz, i
+                continue
+            mid = (lo + hi) >> 1
+            i = order[mid]
+            dx, dy, dz = px[i] - x0, py[i] - y0, pz[i] - z0
+            yield dx * dx + dy * dy + dz * dz, i
+            diff = q[axis[mid]] - split[mid]
+            if diff < 0.0: near, far = (lo, mid), (mid + 1, hi)
+            else: near, far = (mid + 1, hi), (lo, mid)
+            stack.append((*far, diff * diff)); stack.append((*near, 0.0))
+
+    def nearest(self, lat, lon):
+        """(index, distance NM) of the closest point; (-1, 999.0) if empty. Same result as PointSet.nearest."""
+        best, r2 = -1, [math.inf]
+        for d2, i in self._search(lat, lon, r2):
+            if d2 < r2[0] or (d2 == r2[0] and i < best): best, r2[0] = i, d2
+        if best < 0: return -1, 999.0
+        return best, 2.0 * EARTH_NM * math.asin(min(1.0, math.sqrt(r2[0]) * 0.5))
+
+    def within(self, lat, lon, radius_nm):
+        """Indices of the points within radius_nm of (lat, lon), in ascending (route) order."""
+        chord = 2.0 * math.sin(min(math.pi, radius_nm / EARTH_NM) * 0.5)
+        r2 = [chord * chord]
+        return sorted(i for d2, i in self._search(lat, lon, r2) if d2 <= r2[0])
@@ -1,34 +1,12 @@
 import pygame
 import math
 from config import *
+from geodesy import haversine_nm, bearing_deg
 
 def normalize_angle(angle):
     """Normalize angle to 0-360 degrees."""
     return angle % 360
 
-def get_bearing(lat1, lon1, lat2, lon2):
-    """
-    Calculate True Bearing from point 1 (lat1, lon1) to point 2 (lat2, lon2).
-    Returns degrees (0-360).
-    """
-    try:
-        lat1_r, lon1_r = math.radians(lat1), math.radians(lon1)
-        lat2_r, lon2_r = math.radians(lat2), math.radians(lon2)
-        y = math.sin(lon2_r - lon1_r) * math.cos(lat2_r)
-        x = math.cos(lat1_r)*math.sin(lat2_r) - math.sin(lat1_r)*math.cos(lat2_r)*math.cos(lon2_r - lon1_r)
-        return (math.degrees(math.atan2(y, x)) + 360.0) % 360.0
-    except: return 0.0
-
-def haversine_nm(lat1, lon1, lat2, lon2):
-    """Calculate distance in Nautical Miles (NM) between two points."""
-    R = 3440.065 
-    try:
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        dphi, dlam = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlam/2)**2
-        return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1-a)))
-    except: return 0.0
-
 class HoldPage:
     def __init__(self, shared_fms, data_link):
         self.fms = shared_fms
@@ -67,77 +45,60 @@ class HoldPage:
 
         self.initialized = False
 
-    def update(self, screen):
+    def update(self, screen, data):
+        st = self.fms.state # active index and legs from one FMS tick, even across an OFP install
+
         # 1. Initialization Sync
-        if not self.initialized and self.fms.is_loaded and self.fms.legs:
-            self._sync_to_active_leg()
+        if not self.initialized and self.fms.is_loaded and st.legs:
+            self._sync_to_active_leg(st)
             self.initialized = True
             
         # 2. Fetch Data
-        ac_lat = self.data_link.data.get('lat', 0.0)
-        ac_lon = self.data_link.data.get('lon', 0.0)
-        ac_hdg = self.data_link.data.get('hdg', 0.0)
-        tas = max(100, self.data_link.data.get('tas_kt', 200.0))
-        gs  = max(50,  self.data_link.data.get('gs_kt', 200.0))
-        wind_spd = self.data_link.data.get('wind_spd', 0.0)
-        wind_dir = self.data_link.data.get('wind_dir', 0.0)
+        ac_lat = data.get('lat', 0.0)
+        ac_lon = data.get('lon', 0.0)
+        ac_hdg = data.get('hdg', 0.0)
+        tas = max(100, data.get('tas_kt', 200.0))
         
         # 3. Fix Data
         fix_lat, fix_lon, fix_ident = 0.0, 0.0, "NO FIX"
-        target_idx = self.fms.active_idx if self.hold_fix_idx == -1 else self.hold_fix_idx
+        target_idx = st.active_idx if self.hold_fix_idx == -1 else self.hold_fix_idx
+        fix = st.legs[target_idx] if 0 <= target_idx < len(st.legs) else None
         
-        if self.fms.legs and 0 <= target_idx < len(self.fms.legs):
-            leg = self.fms.legs[target_idx]
-            fix_lat, fix_lon, fix_ident = leg.lat, leg.lon, leg.ident
+        if fix is not None:
+            fix_lat, fix_lon, fix_ident = fix.lat, fix.lon, fix.ident
             
         # 4. Calculations
         dist_to_fix = haversine_nm(ac_lat, ac_lon, fix_lat, fix_lon)
-        bearing_fix_to_ac = get_bearing(fix_lat, fix_lon, ac_lat, ac_lon)
+        bearing_fix_to_ac = bearing_deg(fix_lat, fix_lon, ac_lat, ac_lon)
         
-        self._calc_wind_correction(tas, gs, wind_spd, wind_dir)
-        self._calc_entry_sector(ac_hdg)
+        self._calc_wind_correction(tas)
+        self._calc_entry_sector(ac_lat, ac_lon, fix)
 
         # 5. Drawing
         self._draw_left_panel(screen)
         self._draw_map(screen, ac_lat, ac_lon, ac_hdg, bearing_fix_to_ac, dist_to_fix, tas, fix_ident)
 
-    def _sync_to_active_leg(self):
+    def _sync_to_active_leg(self, st):
         """Syncs the inbound course to the FMS active leg on startup."""
-        idx = self.fms.active_idx
-        if self.fms.legs and 0 <= idx < len(self.fms.legs):
-            self.inbound_course = self.fms.legs[idx].leg_course
+        idx = st.active_idx
+        if 0 <= idx < len(st.legs):
+            self.inbound_course = st.legs[idx].leg_course
             self.hold_fix_idx = -1 
 
-    def _calc_wind_correction(self, tas, gs, wind_spd, wind_dir):
-        """Calculates Wind Correction Angle (WCA) and adjusted Outbound Time."""
-        rad_diff = math.radians(wind_dir - self.inbound_course)
-        x_wind = wind_spd * math.sin(rad_diff)
-        try:
-            wca_rad = math.asin(min(1.0, max(-1.0, x_wind / tas)))
-            self.wind_corr_angle = math.degrees(wca_rad)
-        except: self.wind_corr_angle = 0.0
-        
-        headwind = wind_spd * math.cos(rad_diff)
-        gs_out = tas + headwind 
-        gs_in = tas - headwind
-        if gs_out > 10:
-            self.outbound_time = (self.leg_time_min * 60 * gs_in) / gs_out
-        else:
-            self.outbound_time = self.leg_time_min * 60
+    def _calc_wind_correction(self, tas):
+        """WCA and adjusted Outbound Time from fms.derived (recomputed only when wind, TAS or the hold changes)."""
+        derived = self.fms.derived
+        derived.update(hold_inbound_course=self.inbound_course, hold_leg_time_min=self.leg_time_min, hold_tas=tas)
+        self.wind_corr_angle, self.outbound_time = derived['hold_wind_corr']
 
-    def _calc_entry_sector(self, hdg):
+    def _calc_entry_sector(self, ac_lat, ac_lon, fix):
         """Determines the standard ICAO entry sector (Direct, Parallel, Teardrop)."""
         
         # 1. Calculate aircraft bearing relative to Fix
-        ac_lat = self.data_link.data.get('lat', 0.0)
-        ac_lon = self.data_link.data.get('lon', 0.0)
-        target_idx = self.fms.active_idx if self.hold_fix_idx == -1 else self.hold_fix_idx
-        
-        if not self.fms.legs or target_idx >= len(self.fms.legs):
+        if fix is None:
             return
 
-        fix = self.fms.legs[target_idx]
-        bearing_fix_to_ac = get_bearing(fix.lat, fix.lon, ac_lat, ac_lon)
+        bearing_fix_to_ac = bearing_deg(fix.lat, fix.lon, ac_lat, ac_lon)
 
         # 2. Calculate angle difference relative to the INBOUND COURSE
         # ICAO Definition: Parallel/Teardrop are sectors on either side of the Inbound track.
@@ -184,15 +145,17 @@ class HoldPage:
             if self.leg_time_min > 3.0: self.leg_time_min = 0.5
             
         elif self.rect_fix_prev.collidepoint(pos):
-            if self.hold_fix_idx == -1: self.hold_fix_idx = self.fms.active_idx
+            st = self.fms.state
+            if self.hold_fix_idx == -1: self.hold_fix_idx = st.active_idx
             self.hold_fix_idx = max(0, self.hold_fix_idx - 1)
-            if 0 <= self.hold_fix_idx < len(self.fms.legs):
-                self.inbound_course = self.fms.legs[self.hold_fix_idx].leg_course
+            if 0 <= self.hold_fix_idx < len(st.legs):
+                self.inbound_course = st.legs[self.hold_fix_idx].leg_course
         elif self.rect_fix_next.collidepoint(pos):
-            if self.hold_fix_idx == -1: self.hold_fix_idx = self.fms.active_idx
-            self.hold_fix_idx = min(len(self.fms.legs)-1, self.hold_fix_idx + 1)
-            if 0 <= self.hold_fix_idx < len(self.fms.legs):
-                self.inbound_course = self.fms.legs[self.hold_fix_idx].leg_course
+            st = self.fms.state
+            if self.hold_fix_idx == -1: self.hold_fix_idx = st.active_idx
+            self.hold_fix_idx = min(len(st.legs)-1, self.hold_fix_idx + 1)
+            if 0 <= self.hold_fix_idx < len(st.legs):
+                self.inbound_course = st.legs[self.hold_fix_idx].leg_course
 
     def _draw_left_panel(self, screen):
         # 1. INBOUND CRS 
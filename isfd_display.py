@@ -53,6 +53,7 @@ class ISFDDisplay:
         alt = data.get('alt_msl_ft', 0.0)
         hdg = data.get('hdg', 0.0)
         vvi = data.get('vvi', 0.0) 
+        st = self.fms.state if self.fms else None # one FMS tick for the whole page
 
         # 2. Clear Background
         pygame.draw.rect(self.screen, C_BLACK, (0, 0, SCREEN_W, BUTTON_Y))
@@ -64,8 +65,8 @@ class ISFDDisplay:
         self._draw_aircraft_symbol()
 
         # 5. Draw Tapes
-        self._draw_airspeed_tape(ias)
-        self._draw_altitude_tape(alt, vvi) 
+        self._draw_airspeed_tape(ias, st)
+        self._draw_altitude_tape(alt, vvi, st) 
 
         # 6. Draw Heading
         self._draw_heading_box(hdg)
@@ -96,7 +97,7 @@ class ISFDDisplay:
         pygame.draw.rect(self.screen, C_BLACK, (cx-7, cy-7, 14, 14))
         pygame.draw.rect(self.screen, C_AMBER, (cx-5, cy-5, 10, 10))
 
-    def _draw_airspeed_tape(self, ias):
+    def _draw_airspeed_tape(self, ias, st):
         x_base = 0
         tape_bg_rect = pygame.Rect(x_base, 0, self.tape_w, BUTTON_Y)
         pygame.draw.rect(self.screen, (15, 15, 15), tape_bg_rect) 
@@ -113,8 +114,8 @@ class ISFDDisplay:
                 self.screen.blit(txt, (10, y - 8))
         
         # --- Speed Trend Vector ---
-        if self.fms and abs(self.fms.acceleration) > 0.5: 
-            trend_kts = self.fms.acceleration * 10.0 
+        if st and abs(st.acceleration) > 0.5: 
+            trend_kts = st.acceleration * 10.0 
             trend_kts = max(-40, min(40, trend_kts))
             
             line_len = trend_kts * scale_factor
@@ -131,7 +132,7 @@ class ISFDDisplay:
         cur_ias = self.font_std.render(f"{ias:.0f}", True, C_WHITE)
         self.screen.blit(cur_ias, cur_ias.get_rect(center=(self.tape_w/2, BUTTON_Y/2)))
 
-    def _draw_altitude_tape(self, alt, vvi):
+    def _draw_altitude_tape(self, alt, vvi, st):
         x_base = SCREEN_W - self.tape_w
         tape_bg_rect = pygame.Rect(x_base, 0, self.tape_w, BUTTON_Y)
         pygame.draw.rect(self.screen, (15, 15, 15), tape_bg_rect)
@@ -160,8 +161,8 @@ class ISFDDisplay:
             pygame.draw.line(self.screen, C_MAGENTA, (start_x, start_y), (start_x, end_y), 4)
         
         # --- VDEV Indicator (VNAV Path Deviation) ---
-        if self.fms and self.fms.phase in ['CRZ', 'DES']:
-            dev = getattr(self.fms, 'vnav_deviation', 0.0)
+        if st and st.phase in ['CRZ', 'DES']:
+            dev = st.vnav_deviation
             
             center_y = BUTTON_Y / 2
             vdev_x = x_base - 12
@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+
+# --- BACKGROUND JOBS ---
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "QUEUED", "RUNNING", "DONE", "CANCELLED", "FAILED"
+
+class Job:
+    """
+    One submitted call, run as fn(*args, job=job) on the worker thread. The
+    function reports progress (0..1 and a short message) and checks
+    job.cancelled at its checkpoints; job.sleep() is a wait that ends early
+    on cancel.
+    """
+    __slots__ = ('key', 'fn', 'args', 'state', 'progress', 'message', 'result', 'error', '_cancel', '_done')
+
+    def __init__(self, key, fn, args):
+        self.key, self.fn, self.args = key, fn, args
+        self.state, self.progress, self.message = QUEUED, 0.0, ""
+        self.result = self.error = None
+        self._cancel, self._done = threading.Event(), threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, progress, message=""):
+        self.progress, self.message = progress, message
+
+    def sleep(self, sec):
+        """Waits sec seconds; True if the job was cancelled meanwhile."""
+        return self._cancel.wait(sec)
+
+    def wait(self, timeout=None):
+        """Blocks until the job has finished (any end state); False on timeout."""
+        return self._done.wait(timeout)
+
+class JobWorker:
+    """
+    Single background thread running jobs one at a time, in submission
+    order, so jobs never race each other. Submitting a key that is already
+    queued or running with the same args returns that job: repeated requests
+    coalesce. With different args the older job is superseded. If queued it
+    is dropped; if running it is flagged and stops at its next checkpoint.
+    submit() only takes a short lock, so it is safe from the render loop.
+    """
+    def __init__(self, name="jobs"):
+        self.name = name
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.queue = deque()
+        self.current = None
+        self._thread = None
+        self._stop = None
+
+    def submit(self, key, fn, *args):
+        with self.lock:
+            for job in (self.current, *self.queue):
+                if job is None or job.key != key or job.cancelled: continue
+                if job.args == args: return job
+                job.cancel()
+                if job is not self.current: self._finish(job, CANCELLED); self.queue.remove(job)
+            job = Job(key, fn, args)
+            self.queue.append(job)
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name=self.name, daemon=True)
+                self._thread.start()
+            self.wake.notify()
+            return job
+
+    def find(self, key):
+        """The running or queued (not cancelled) job for key, else None."""
+        with self.lock:
+            for job in (self.current, *self.queue):
+                if job is not None and job.key == key and not job.cancelled: return job
+        return None
+
+    def stop(self, timeout=1.0):
+        """Cancels all jobs and ends the thread (a later submit starts a new one)."""
+        with self.lock:
+            if self._thread is None: return
+            thread, self._thread = self._thread, None
+            self._stop.set()
+            for job in self.queue: job.cancel(); self._finish(job, CANCELLED)
+            self.queue.clear()
+            if self.current: self.current.cancel()
+            self.wake.notify()
+        thread.join(timeout)
+
+    def _finish(self, job, state):
+        job.state = state
+        job._done.set()
+
+    def _run(self, stop):
+        while True:
+            with self.lock:
+                while not self.queue and not stop.is_set(): self.wake.wait()
+                if stop.is_set(): return
+                job = self.current = self.queue.popleft()
+                job.state = RUNNING
+            try:
+                job.result = job.fn(*job.args, job=job)
+                state = CANCELLED if job.cancelled else DONE
+            except Exception as e:
+                job.error, state = e, FAILED
+                print(f"[JOBS] {job.key} failed: {e}")
+            with self.lock:
+                if self.current is job: self.current = None
+                self._finish(job, state)
@@ -1,10 +1,11 @@
 import pygame
-import time
 import os
 import sys
 import tkinter as tk
 from tkinter import messagebox
 from data_link import DataLink
+from async_link import AsyncDataLink
+from process_link import ProcessDataLink
 from eicas import EICAS
 from isfd_display import ISFDDisplay
 from nav_display import NavDisplay
@@ -51,13 +52,16 @@ def main():
     clock = pygame.time.Clock()
 
     # Start Data Link
-    link = DataLink()
+    if DATA_LINK_MODE == "async": link = AsyncDataLink()
+    elif DATA_LINK_MODE == "process": link = ProcessDataLink()
+    else: link = DataLink()
     link.start()
 
     # Initialize FMS
     print("Initializing FMS Core...")
     shared_fms = FMSCore()
     shared_fms.fetch_simbrief() 
+    shared_fms.start() # LNAV/VNAV at FMS_RATE_HZ, off the render loop
 
     print("Showing UDP Instructions...")
     show_udp_instructions()
@@ -74,8 +78,6 @@ def main():
 
     try:
         while True:
-            current_time = time.time()
-
             # --- A. Event Handling ---
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -115,29 +117,13 @@ def main():
                         page_nav.handle_keydown(event)
 
             # --- B. Data Update ---
-            data = link.data
-            data['active_page'] = current_page
-            
-            lat = data.get('lat', 0)
-            if abs(lat) > 0.1:
-                # 1. Critical Data
-                total_fuel = data.get('total_fuel_kg', 0)
-                total_ff = data.get('total_ff_kg_hr', 0) 
-                
-                # 2. Baro Setting
-                baro_in_hg = data.get('baro', 29.92) 
-
-                # 3. Update FMS
-                shared_fms.update(
-                    lat, 
-                    data.get('lon', 0), 
-                    data.get('alt_msl_ft', 0), 
-                    data.get('gs_kt', 0), 
-                    total_fuel,      
-                    total_ff,        
-                    baro_in_hg,      
-                    current_time     
-                )
+            # One immutable snapshot per frame: every page sees the same packet batch
+            link.pump()
+            data = link.snapshot()
+            shared_fms.derived.set_frame(data)
+            shared_fms.fuel_used.update(data)
+            shared_fms.feed(data)
+            shared_fms.derived.set_state(shared_fms.state)
 
             # --- C. Rendering Logic ---
             if current_page == "ENG":
@@ -158,6 +144,8 @@ def main():
     except KeyboardInterrupt:
         print("\nShutting down system...")
     finally:
+        shared_fms.fuel_used.save()
+        shared_fms.stop()
         link.stop()
         pygame.quit()
 
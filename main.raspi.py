@@ -3,6 +3,8 @@ import time
 import os
 import sys
 from data_link import DataLink
+from async_link import AsyncDataLink
+from process_link import ProcessDataLink
 from eicas import EICAS
 from isfd_display import ISFDDisplay
 from nav_display import NavDisplay
@@ -53,11 +55,14 @@ def main():
     last_net_check = 0
     net_status_text = "Checking..."
 
-    link = DataLink()
+    if DATA_LINK_MODE == "async": link = AsyncDataLink()
+    elif DATA_LINK_MODE == "process": link = ProcessDataLink()
+    else: link = DataLink()
     link.start()
     print("Initializing FMS Core...")
     shared_fms = FMSCore()
     shared_fms.fetch_simbrief() 
+    shared_fms.start() # LNAV/VNAV at FMS_RATE_HZ, off the render loop
 
     page_eicas = EICAS(shared_fms)
     page_isfd = ISFDDisplay(shared_fms)
@@ -94,18 +99,24 @@ def main():
                     if show_power_menu:
                         if rect_restart_app.collidepoint(x, y):
                             print("SYSTEM: Restarting App...")
+                            shared_fms.fuel_used.save()
+                            shared_fms.stop()
                             link.stop()
                             pygame.quit()
                             os.execv(sys.executable, ['python3'] + sys.argv)
                         
                         elif rect_reboot_sys.collidepoint(x, y):
                             print("SYSTEM: Rebooting...")
+                            shared_fms.fuel_used.save()
+                            shared_fms.stop()
                             link.stop()
                             pygame.quit()
                             os.system("sudo reboot")
                         
                         elif rect_shutdown.collidepoint(x, y):
                             print("SYSTEM: Shutting Down...")
+                            shared_fms.fuel_used.save()
+                            shared_fms.stop()
                             link.stop()
                             pygame.quit()
                             os.system("sudo poweroff")
@@ -152,25 +163,12 @@ def main():
                     show_power_menu = True
                     is_adv_pressed = False 
 
-            data = link.data
-            data['active_page'] = current_page
-            
-            lat = data.get('lat', 0)
-            if abs(lat) > 0.1:
-                total_fuel = data.get('total_fuel_kg', 0)
-                total_ff = data.get('total_ff_kg_hr', 0) 
-                baro_in_hg = data.get('baro', 29.92) 
-
-                shared_fms.update(
-                    lat, 
-                    data.get('lon', 0), 
-                    data.get('alt_msl_ft', 0), 
-                    data.get('gs_kt', 0), 
-                    total_fuel,      
-                    total_ff,        
-                    baro_in_hg,      
-                    current_time     
-                )
+            link.pump()
+            data = link.snapshot()
+            shared_fms.derived.set_frame(data)
+            shared_fms.fuel_used.update(data)
+            shared_fms.feed(data)
+            shared_fms.derived.set_state(shared_fms.state)
 
             if show_power_menu:
                 screen.fill((20, 20, 20)) 
@@ -217,6 +215,8 @@ def main():
     except KeyboardInterrupt:
         print("\nShutting down system...")
     finally:
+        shared_fms.fuel_used.save()
+        shared_fms.stop()
         link.stop()
         pygame.quit()
 
@@ -26,6 +26,8 @@ class NavDisplay:
         self.use_metric = SHOW_METRIC_ALT 
         self.ui_state = STATE_NORMAL
         self.selected_leg_idx = -1  
+        self.selected_leg = None     # leg view taken from the FMSState the pick was made on
+        self.selected_plan_id = -1   # OFP it belongs to; popups close if another OFP is installed
         
         # INTERACTION STATE 
         self.press_start_time = 0
@@ -76,11 +78,11 @@ class NavDisplay:
         if self.ui_state == STATE_NORMAL and self.is_holding:
             if time.time() - self.press_start_time > self.LONG_PRESS_THRESHOLD:
                 self.is_holding = False 
+                st = self.fms.state
                 
                 # Case 1: Active Panel Long Press (-1)
                 if self.pressed_row_idx == -1:
-                    self.selected_leg_idx = self.fms.active_idx
-                    leg = self.fms.legs[self.selected_leg_idx]
+                    leg = self._select_leg(st, st.active_idx)
                     
                     # Pre-fill buffer with current altitude
                     if self.use_metric:
@@ -94,13 +96,17 @@ class NavDisplay:
                 
                 # Case 2: List Row Long Press (0+)
                 else:
-                    base_idx = self.fms.active_idx + 1
+                    base_idx = st.active_idx + 1
                     real_idx = base_idx + self.scroll_offset + self.pressed_row_idx
                     
-                    if real_idx < len(self.fms.legs):
-                        self.selected_leg_idx = real_idx
+                    if real_idx < len(st.legs):
+                        self._select_leg(st, real_idx)
                         self.ui_state = STATE_MENU 
         
+        # POPUP ON A REPLACED OFP: the picked index means another fix now
+        if self.ui_state != STATE_NORMAL and self.fms.state.plan_id != self.selected_plan_id:
+            self.ui_state = STATE_NORMAL
+
         self._draw_normal_view(screen, link_data)
         
         if self.ui_state != STATE_NORMAL:
@@ -116,6 +122,10 @@ class NavDisplay:
             elif self.ui_state in [STATE_INPUT_SPD, STATE_INPUT_ALT]:
                 self._draw_popup_input(screen)
 
+    def _select_leg(self, st, idx):
+        self.selected_leg_idx, self.selected_leg, self.selected_plan_id = idx, st.legs[idx], st.plan_id
+        return self.selected_leg
+
     def handle_keydown(self, event):
         if self.ui_state not in [STATE_INPUT_SPD, STATE_INPUT_ALT]:
             return
@@ -154,32 +164,36 @@ class NavDisplay:
         
         screen.fill(C_BLACK)
         
-        self.draw_header_strip(screen, link_data)
+        # One FMS result for the whole page (published by the FMS thread, read without the lock)
+        st = self.fms.state
+        self.draw_header_strip(screen, link_data, st)
         
         if not self.fms.is_loaded:
             s = self.font_m.render(self.fms.status_msg, True, C_AMBER)
             screen.blit(s, (SCREEN_W//2 - s.get_width()//2, 100))
             return
 
-        self.draw_active_panel(screen, gs, is_data_valid)
-        self.draw_next_list(screen)
+        self.draw_active_panel(screen, gs, is_data_valid, st)
+        self.draw_next_list(screen, st)
 
-    def draw_header_strip(self, screen, data):
+    def draw_header_strip(self, screen, data, st):
         pygame.draw.rect(screen, (20,20,20), (0,0, SCREEN_W, 30))
         route = f"{self.fms.origin}>{self.fms.dest}"
         s_route = self.font_s.render(route, True, C_CYAN)
         screen.blit(s_route, (5, 5))
         
         refresh_x = 5 + s_route.get_width() + 10
-        s_refresh = self.font_s.render("refresh", True, C_GREEN_NAV)
+        busy = self.fms.fetch_progress # (stage, 0..1) while an OFP load is queued / running
+        if busy is None: s_refresh = self.font_s.render("refresh", True, C_GREEN_NAV)
+        else: s_refresh = self.font_s.render(f"{(busy[0] or 'queued').lower()} {int(busy[1] * 100)}%", True, C_AMBER)
         self.btn_refresh_rect = s_refresh.get_rect(topleft=(refresh_x, 5))
         self.btn_refresh_rect.inflate_ip(10, 10) 
         screen.blit(s_refresh, (refresh_x, 5))
         
-        phase_txt = self.fms.phase
+        phase_txt = st.phase
         phase_color = C_GREEN_NAV
-        if self.fms.crz_warn:
-            phase_txt = self.fms.crz_warn
+        if st.crz_warn:
+            phase_txt = st.crz_warn
             phase_color = C_AMBER
         s_phase = self.font_s.render(phase_txt, True, phase_color)
         screen.blit(s_phase, (SCREEN_W//2 - s_phase.get_width()//2, 5))
@@ -192,14 +206,14 @@ class NavDisplay:
         bar_bg_rect = pygame.Rect(0, 27, SCREEN_W, 3)
         pygame.draw.rect(screen, (50, 50, 50), bar_bg_rect) 
         
-        if self.fms.progress_pct > 0:
-            fill_width = int(SCREEN_W * (self.fms.progress_pct / 100.0))
+        if st.progress_pct > 0:
+            fill_width = int(SCREEN_W * (st.progress_pct / 100.0))
             fill_width = min(fill_width, SCREEN_W)
             pygame.draw.rect(screen, C_GREEN_NAV, (0, 27, fill_width, 3))
 
-    def draw_active_panel(self, screen, gs_kt, is_valid):
-        if self.fms.active_idx >= len(self.fms.legs): return
-        leg = self.fms.legs[self.fms.active_idx]
+    def draw_active_panel(self, screen, gs_kt, is_valid, st):
+        if st.active_idx >= len(st.legs): return
+        leg = st.legs[st.active_idx]
         
         panel_rect = pygame.Rect(0, 30, SCREEN_W, 110)
         pygame.draw.rect(screen, (30,30,40), panel_rect)
@@ -215,8 +229,8 @@ class NavDisplay:
         s_ident = self.font_l.render(leg.ident, True, C_MAGENTA)
         screen.blit(s_ident, (10, 55))
 
-        if self.fms.phase in ["CRZ", "DES"]:
-            td = self.fms.dist_to_td
+        if st.phase in ["CRZ", "DES"]:
+            td = st.dist_to_td
             td_x, td_y = 10, 90 
             if td < 0:
                 self._draw_kv(screen, "VNAV STATUS", "DES PATH", td_x, td_y, C_MAGENTA)
@@ -226,8 +240,8 @@ class NavDisplay:
 
         col1_x, col2_x, col3_x = 140, 240, 364 
         if is_valid:
-            dist_str = f"{leg.dist_to_go * 1.852:.1f}KM" if SHOW_METRIC_DIST else f"{leg.dist_to_go:.1f}NM"
-            brg_str = f"{leg.bearing:03d}°"
+            dist_str = f"{st.dist_to_go * 1.852:.1f}KM" if SHOW_METRIC_DIST else f"{st.dist_to_go:.1f}NM"
+            brg_str = f"{st.bearing:03d}°"
         else:
             dist_str, brg_str = "N/A", "---"
         
@@ -236,7 +250,7 @@ class NavDisplay:
 
         if not is_valid: eta_val = "NO DATA"
         elif gs_kt < 100: eta_val = "CHECK SPD"
-        else: eta_val = leg.eta_str
+        else: eta_val = st.leg_ete_str(st.active_idx)
         eta_col = C_AMBER if "CHECK" in eta_val else (C_GRAY_LIGHT if "NO" in eta_val else C_WHITE)
         self._draw_kv(screen, "ETE", eta_val, col2_x, 45, eta_col)
 
@@ -244,19 +258,19 @@ class NavDisplay:
         screen.blit(s_alt_lbl, (col2_x, 90))
         
         if self.use_metric:
-            val_str = f"{int(leg.target_alt * 0.3048)} M"
+            val_str = f"{int(st.target_alt * 0.3048)} M"
         else:
-            val_str = f"{int(leg.target_alt)} FT"
+            val_str = f"{int(st.target_alt)} FT"
             
         s_alt_val = self.font_mono.render(val_str, True, C_CYAN)
         screen.blit(s_alt_val, (col2_x, 90 + 15))
         self.rect_alt_toggle = pygame.Rect(col2_x, 90, max(s_alt_lbl.get_width(), s_alt_val.get_width()), 35)
 
-        phase = self.fms.phase
+        phase = st.phase
         if (not is_valid) or (phase in ["GND", "TO", "TO/CLB"]):
              self._draw_kv(screen, "TGT V/S", "---", col3_x, 60, C_GRAY_DARK, size="L")
         else:
-            vs_fpm = leg.target_vs_fpm 
+            vs_fpm = st.target_vs_fpm 
             vs_ms = vs_fpm / 196.85
             if abs(vs_ms) > 0.5:
                 prefix = "+" if vs_ms > 0 else ""
@@ -277,7 +291,7 @@ class NavDisplay:
         s_val = font.render(value, True, color)
         screen.blit(s_val, (x, y + 15))
 
-    def draw_next_list(self, screen):
+    def draw_next_list(self, screen, st):
         start_y = 150
         row_h = 30
         self.list_click_rects = [] 
@@ -290,15 +304,15 @@ class NavDisplay:
             
         start_y += 20
         
-        base_idx = self.fms.active_idx + 1
+        base_idx = st.active_idx + 1
         display_start_idx = base_idx + self.scroll_offset
-        total_remaining = len(self.fms.legs) - base_idx
+        total_remaining = len(st.legs) - base_idx
         
         for i in range(self.max_rows): 
             idx = display_start_idx + i
-            if idx >= len(self.fms.legs): break
+            if idx >= len(st.legs): break
             
-            leg = self.fms.legs[idx]
+            leg = st.legs[idx]
             y = start_y + i * row_h
             
             rect = pygame.Rect(0, y, SCREEN_W - 60, row_h)
@@ -345,7 +359,7 @@ class NavDisplay:
         pygame.draw.polygon(screen, dn_color, [(cx_dn, cy_dn + 10), (cx_dn - 10, cy_dn - 10), (cx_dn + 10, cy_dn - 10)])
 
     def _draw_popup_menu(self, screen):
-        leg = self.fms.legs[self.selected_leg_idx]
+        leg = self.selected_leg
         title = self.font_m.render(f"WPT: {leg.ident}", True, C_CYAN)
         screen.blit(title, (SCREEN_W//2 - title.get_width()//2, 40))
         
@@ -363,7 +377,7 @@ class NavDisplay:
         screen.blit(hint, (SCREEN_W//2 - hint.get_width()//2, SCREEN_H - 30))
 
     def _draw_popup_confirm(self, screen):
-        leg = self.fms.legs[self.selected_leg_idx]
+        leg = self.selected_leg
         title = self.font_m.render("DIRECT TO", True, C_AMBER)
         screen.blit(title, (SCREEN_W//2 - title.get_width()//2, 60))
         msg1 = self.font_s.render(f"FLY DIRECT TO {leg.ident}?", True, C_WHITE)
@@ -420,7 +434,7 @@ class NavDisplay:
 
             # 2. ACTIVE PANEL CLICK (NEW)
             if self.rect_active_panel.collidepoint(x, y):
-                 if self.fms.active_idx < len(self.fms.legs):
+                 if self.fms.state.active_idx < len(self.fms.state.legs):
                     self.is_holding = True
                     self.press_start_time = time.time()
                     self.pressed_row_idx = -1
@@ -428,7 +442,8 @@ class NavDisplay:
 
             # 3. BUTTONS
             if self.btn_up_rect.collidepoint(pos):
-                 total_remaining = len(self.fms.legs) - (self.fms.active_idx + 1)
+                 st = self.fms.state
+                 total_remaining = len(st.legs) - (st.active_idx + 1)
                  if (self.scroll_offset + self.max_rows) < total_remaining: self.scroll_offset += 1
             elif self.btn_dn_rect.collidepoint(pos):
                 self.scroll_offset = max(0, self.scroll_offset - 1)
@@ -444,7 +459,7 @@ class NavDisplay:
             if self.rect_menu_dct.collidepoint(pos): self.ui_state = STATE_CONFIRM_DCT
             elif self.rect_menu_spd.collidepoint(pos):
                 self.ui_state = STATE_INPUT_SPD
-                leg = self.fms.legs[self.selected_leg_idx]
+                leg = self.selected_leg
                 if leg.plan_mach > 0.1:
                     self.input_is_metric = True 
                     self.input_buffer = f".{int(leg.plan_mach*100)}"
@@ -453,7 +468,7 @@ class NavDisplay:
                     self.input_buffer = str(int(leg.plan_spd_kmh))
             elif self.rect_menu_alt.collidepoint(pos):
                 self.ui_state = STATE_INPUT_ALT
-                leg = self.fms.legs[self.selected_leg_idx]
+                leg = self.selected_leg
                 if self.use_metric:
                     self.input_is_metric = True 
                     self.input_buffer = str(int(leg.plan_alt * 0.3048))
@@ -466,7 +481,8 @@ class NavDisplay:
 
         if self.ui_state == STATE_CONFIRM_DCT:
             if self.rect_confirm_yes.collidepoint(pos):
-                self.fms.set_direct_to(self.selected_leg_idx)
+                if not self.fms.set_direct_to(self.selected_leg_idx, plan_id=self.selected_plan_id):
+                    print("[NAV] OFP changed, DIRECT TO cancelled")
                 self.ui_state = STATE_NORMAL
                 self.scroll_offset = 0 
             elif self.rect_confirm_no.collidepoint(pos):
@@ -496,9 +512,13 @@ class NavDisplay:
             if self.ui_state == STATE_INPUT_SPD:
                 is_mach = self.input_is_metric
                 if is_mach and val > 2.0: val = val / 100.0
-                self.fms.modify_leg_constraint(self.selected_leg_idx, spd=val, is_mach=is_mach)
+                ok = self.fms.modify_leg_constraint(self.selected_leg_idx, spd=val, is_mach=is_mach,
+                                                    plan_id=self.selected_plan_id)
             elif self.ui_state == STATE_INPUT_ALT:
-                self.fms.modify_leg_constraint(self.selected_leg_idx, alt=val, is_metric=self.input_is_metric)
+                ok = self.fms.modify_leg_constraint(self.selected_leg_idx, alt=val, is_metric=self.input_is_metric,
+                                                    plan_id=self.selected_plan_id)
+            else: return
+            if not ok: print("[NAV] OFP changed, constraint not applied")
         except ValueError:
             print("Invalid Input")
 
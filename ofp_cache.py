@@ -0,0 +1,68 @@
+import hashlib
+import os
+import pickle
+from config import *
+
+CACHE_VERSION = 4 # bump when OFPPlan / FlightPlan / geodesy layouts change
+
+def digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+class OFPCache:
+    """
+    Parsed OFPPlan (leg columns, leg tables, spatial indexes, info dicts,
+    OFP id, and the NOTAM members still as undecoded ofp_loader.Deferred
+    JSON text) pickled next to the source OFP, so a restart skips
+    json.load and the parse. The header records the source's content hash
+    and its mtime/size: an unchanged mtime/size is trusted as is, anything
+    else is re-hashed and only a different hash forces a full parse.
+    """
+    def __init__(self, path=OFP_CACHE_PATH):
+        self.path = path
+
+    def load(self, src_path, raw=None):
+        """
+        The cached OFPPlan for src_path, or None (missing, stale or unreadable
+        cache). An unreadable cache (truncated, or pickled before a class was
+        renamed or moved) is deleted; the next save writes a fresh one.
+        """
+        try:
+            st = os.stat(src_path)
+            with open(self.path, 'rb') as f:
+                header = pickle.load(f)
+                if header.get('version') != CACHE_VERSION: return None
+                if (header['mtime_ns'], header['size']) != (st.st_mtime_ns, st.st_size):
+                    # touched or copied: still valid if the content is the same
+                    if raw is None:
+                        with open(src_path, 'rb') as src: raw = src.read()
+                    if digest(raw) != header['digest']: return None
+                    payload = f.read()
+                    self._write(dict(header, mtime_ns=st.st_mtime_ns, size=st.st_size), payload)
+                    return pickle.loads(payload)
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, KeyError, IndexError, AttributeError, ImportError, ValueError, TypeError,
+                pickle.UnpicklingError) as e:
+            print(f"OFPCache: ignoring {self.path}: {e!r}")
+            try: os.remove(self.path)
+            except OSError: pass
+            return None
+
+    def save(self, plan, src_path, raw=None):
+        """Caches a freshly parsed plan (before user constraints are applied) for src_path."""
+        try:
+            st = os.stat(src_path)
+            if raw is None:
+                with open(src_path, 'rb') as src: raw = src.read()
+            header = {'version': CACHE_VERSION, 'digest': digest(raw), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+            self._write(header, pickle.dumps(plan, pickle.HIGHEST_PROTOCOL))
+        except (OSError, pickle.PicklingError) as e:
+            print(f"OFPCache: save failed: {e}")
+
+    def _write(self, header, payload):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+            f.write(payload)
+        os.replace(tmp, self.path)
@@ -0,0 +1,80 @@
+import json
+import re
+from json.decoder import scanstring
+
+# --- SELECTIVE OFP LOADING ---
+# What OFPPlan reads from a SimBrief OFP. Per member of an object: DECODE keeps it,
+# DEFER keeps only its JSON text (Deferred, decoded on first use), SKIP drops it; a
+# nested dict selects inside that member. '*' is the action for members not listed.
+# Unused sections (text, images, files, prefile, tlr, ...) are never kept, so the
+# loaded OFP is the navlog plus a few small dicts.
+DECODE, DEFER, SKIP = 'decode', 'defer', 'skip'
+
+_AIRPORT = {'*': DECODE, 'notam': DEFER} # NOTAM text: decoded when the NOTAM tab first opens
+OFP_SPEC = {
+    '*': SKIP,
+    'params': DECODE, 'general': DECODE, 'times': DECODE, 'navlog': DECODE,
+    'weights': DECODE, 'fuel': DECODE, 'impacts': DECODE, 'weather': DECODE,
+    'origin': _AIRPORT, 'destination': _AIRPORT,
+}
+
+_WS = re.compile(r'[ \t\n\r]*')
+_decode = json.JSONDecoder().raw_decode
+
+class Deferred:
+    """JSON text of a member the loader did not decode; load() decodes it on demand."""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def load(self):
+        return json.loads(self.text)
+
+def _skip(text, pos):
+    """End of the JSON value starting at pos. The value is decoded by the C scanner and
+    dropped at once: measurably faster than stepping over it in Python, and it is
+    never held alongside the rest of the OFP."""
+    return _decode(text, pos)[1]
+
+def _next(text, pos):
+    """Position of the next non-whitespace character; ValueError at the end of a truncated OFP."""
+    pos = _WS.match(text, pos).end()
+    if pos >= len(text): raise ValueError("truncated OFP")
+    return pos
+
+def _select(text, pos, spec):
+    """(dict, end) for the object starting at pos, members decoded / deferred / skipped per spec."""
+    out, default = {}, spec.get('*', SKIP)
+    pos = _next(text, pos + 1)
+    if text[pos] == '}': return out, pos + 1
+    while True:
+        if text[pos] != '"': raise ValueError(f"expected a member name at {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _next(text, pos)
+        if text[pos] != ':': raise ValueError(f"expected ':' at {pos}")
+        pos = _next(text, pos + 1)
+        how = spec.get(key, default)
+        if how == SKIP:
+            pos = _skip(text, pos)
+        elif how == DEFER:
+            end = _skip(text, pos)
+            out[key], pos = Deferred(text[pos:end]), end
+        elif isinstance(how, dict) and text[pos] == '{':
+            out[key], pos = _select(text, pos, how)
+        else:
+            out[key], pos = _decode(text, pos)
+        pos = _next(text, pos)
+        c = text[pos]
+        if c == '}': return out, pos + 1
+        if c != ',': raise ValueError(f"expected ',' or '}}' at {pos}")
+        pos = _next(text, pos + 1)
+
+def load_ofp(text, spec=OFP_SPEC):
+    """The parts of a SimBrief JSON OFP that OFPPlan uses (ValueError on malformed JSON)."""
+    pos = _WS.match(text, 0).end()
+    if text[pos:pos + 1] != '{': raise ValueError("OFP is not a JSON object")
+    return _select(text, pos, spec)[0]
+
+def load_ofp_file(path, spec=OFP_SPEC):
+    with open(path, 'r', encoding='utf-8') as f: return load_ofp(f.read(), spec)
@@ -0,0 +1,162 @@
+import multiprocessing
+import time
+from array import array
+from multiprocessing import shared_memory
+from config import *
+from channels import STORE_SIZE, TelemetryFrame
+from data_link import DataLink
+
+# --- SHARED RING LAYOUT ---
+# int64 header | int64 seq per slot | float64 timestamp per slot | RING_SLOTS frames of STORE_SIZE doubles
+# A slot is rewritten every RING_SLOTS publishes, i.e. no sooner than
+# RING_SLOTS * BATCH_INTERVAL_SEC (160 ms). Readers copy a slot out (snapshot()) and never keep views into it.
+#
+# Ordering: the writer's slot stores and the reader's copy both happen under one shared
+# multiprocessing.Lock (a POSIX semaphore). Its acquire/release are full memory barriers,
+# which ARM needs: without them another core may see the new seq before the slot data.
+RING_SLOTS = 16
+SNAPSHOT_LOCK_SEC = 0.005 # snapshot() keeps the previous frame rather than wait longer for the writer
+HDR_LATEST, HDR_PACKETS, HDR_BATCHES, HDR_PORT = 0, 1, 2, 3
+HEADER_WORDS = 4
+SEQ_OFFSET = HEADER_WORDS * 8
+TS_OFFSET = SEQ_OFFSET + RING_SLOTS * 8
+FRAMES_OFFSET = TS_OFFSET + RING_SLOTS * 8
+FRAME_BYTES = STORE_SIZE * 8
+RING_BYTES = FRAMES_OFFSET + RING_SLOTS * FRAME_BYTES
+
+WRITING = -1 # slot seq while the ingest process is copying into it
+
+class RingView:
+    """Typed views over the shared ring (same layout on both sides)."""
+    def __init__(self, shm):
+        self.shm = shm
+        buf = shm.buf
+        self.header = buf[:SEQ_OFFSET].cast('q')
+        self.seqs = buf[SEQ_OFFSET:TS_OFFSET].cast('q')
+        self.stamps = buf[TS_OFFSET:FRAMES_OFFSET].cast('d')
+        self.slots = [buf[FRAMES_OFFSET + i * FRAME_BYTES : FRAMES_OFFSET + (i + 1) * FRAME_BYTES].cast('d')
+                      for i in range(RING_SLOTS)]
+
+    def release(self):
+        for v in self.slots: v.release()
+        for v in (self.header, self.seqs, self.stamps): v.release()
+
+class RingDataLink(DataLink):
+    """DataLink running in the ingest process; publishes into the shared ring instead of frames."""
+    def __init__(self, ring, lock, ip, port):
+        super().__init__(ip, port)
+        self.ring, self.lock = ring, lock
+        ring.header[HDR_PORT] = self.sock.getsockname()[1]
+
+    def _publish(self, now):
+        ring = self.ring
+        seq = ring.header[HDR_LATEST] + 1
+        i = seq % RING_SLOTS
+        with self.lock:
+            ring.seqs[i] = WRITING
+            ring.slots[i][:] = self.data._view
+            ring.stamps[i] = now
+            ring.seqs[i] = seq
+            ring.header[HDR_PACKETS] = self.packets_received
+            ring.header[HDR_BATCHES] = self.batches_decoded
+            ring.header[HDR_LATEST] = seq
+
+def _ingest_main(shm_name, lock, ip, port, stop_event):
+    # Children share the parent's resource tracker, so attaching adds no second owner
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = RingView(shm)
+    link = RingDataLink(ring, lock, ip, port)
+    link.start()
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        link.stop(); link.join(2.0)
+        ring.release(); shm.close()
+
+class ProcessDataLink:
+    """
+    DataLink in a separate process (own GIL, own core). Decoded frames land in a
+    shared_memory ring; snapshot() copies the newest slot (one ~17 KB memcpy,
+    no pickling) into a private read-only TelemetryFrame, so a frame stays
+    intact however long it is held. Same surface as DataLink
+    (data, snapshot(), get_row(), stop()); after stop() snapshot() keeps
+    returning the last frame. Row health stays in the ingest process, so
+    health is None here and the DIAG page says the mode is unsupported.
+    """
+    def __init__(self, ip=UDP_IP, port=UDP_PORT):
+        self.addr = (ip, port)
+        self.shm = shared_memory.SharedMemory(create=True, size=RING_BYTES)
+        self.ring = RingView(self.shm)
+        self.health = None
+        self.lock = multiprocessing.Lock()
+        self._stop_event = multiprocessing.Event()
+        self.proc = multiprocessing.Process(target=_ingest_main, daemon=True,
+                                            args=(self.shm.name, self.lock, ip, port, self._stop_event))
+        self._frame = TelemetryFrame(array('d', bytes(FRAME_BYTES)), 0, 0.0)
+        self._final = None # counters and port kept after stop() unmaps the ring
+
+    def start(self, timeout=5.0):
+        self.proc.start()
+        t_end = time.time() + timeout
+        while not self.ring.header[HDR_PORT] and self.proc.is_alive() and time.time() < t_end:
+            time.sleep(0.01)
+        print(f"ProcessDataLink: INGEST PID {self.proc.pid} ON PORT {self.ring.header[HDR_PORT]}")
+
+    @property
+    def port(self):
+        return self._final[2] if self._final else self.ring.header[HDR_PORT]
+
+    @property
+    def packets_received(self):
+        return self._final[0] if self._final else self.ring.header[HDR_PACKETS]
+
+    @property
+    def batches_decoded(self):
+        return self._final[1] if self._final else self.ring.header[HDR_BATCHES]
+
+    def snapshot(self):
+        """Newest complete frame, copied out of the ring (the writer can never touch it afterwards)."""
+        if self._final: return self._frame # stopped: the ring is unmapped
+        ring = self.ring
+        if ring.header[HDR_LATEST] == self._frame.seq: return self._frame
+        if not self.lock.acquire(timeout=SNAPSHOT_LOCK_SEC): return self._frame
+        try:
+            seq = ring.header[HDR_LATEST]
+            i = seq % RING_SLOTS
+            if ring.seqs[i] != seq: return self._frame # torn publish (writer died mid-copy)
+            buf = array('d', bytes(FRAME_BYTES))
+            memoryview(buf)[:] = ring.slots[i]
+            self._frame = TelemetryFrame(buf, seq, ring.stamps[i])
+        finally:
+            self.lock.release()
+        return self._frame
+
+    @property
+    def frame(self): return self.snapshot()
+
+    @property
+    def data(self): return self.snapshot()
+
+    def get_row(self, row_idx):
+        return self.snapshot().get_row(row_idx)
+
+    def pump(self):
+        """Called once per render frame; the ingest process needs nothing."""
+
+    def stop(self):
+        self._stop_event.set()
+        if self.proc.is_alive(): self.proc.join(2.0)
+        if self.proc.is_alive(): self.proc.terminate()
+        if self._final: return
+        self._final = (self.packets_received, self.batches_decoded, self.port)
+        try:
+            self.ring.release()
+            self.shm.close()
+        except BufferError: # a view is still exported; the mapping goes with the process
+            pass
+        self.shm.unlink()
+
+    def join(self, timeout=None):
+        """DataLink compatibility: stop() already waits for the ingest process."""
@@ -0,0 +1,216 @@
+"""
+Telemetry recorder and replay.
+
+Records the raw X-Plane DATA datagrams received by DataLink into an indexed
+binary file, and replays them into the normal decode/publish path via mmap.
+
+Usage:
+    python recorder.py record <file> [seconds]     (listens on UDP_PORT)
+    python recorder.py info <file>
+    python recorder.py replay <file> [speed]       (speed 0 = as fast as possible)
+"""
+import mmap
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from array import array
+from data_link import DataLink, PACKET_MAX
+
+# --- FILE FORMAT ---
+# [file header] [record header + datagram]... [index: u64 record offsets] [footer]
+# The index/footer are written on close; an unclosed file is re-indexed by scanning.
+FILE_MAGIC = b'TU154TLM'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<8sHxxxxxxd')  # magic, version, start time
+RECORD_HEADER = struct.Struct('<dH')        # receive timestamp, datagram length
+INDEX_MAGIC = b'TLMINDEX'
+FOOTER = struct.Struct('<QQ8s')             # index offset, record count, magic
+
+class TelemetryRecorder:
+    """Appends timestamped raw datagrams to a recording. Attach with link.recorder = rec."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = array('Q')
+        self.f = open(path, 'wb')
+        self.f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, time.time()))
+        self.pos = FILE_HEADER.size
+
+    def write(self, packet, now):
+        n = len(packet)
+        if n > PACKET_MAX: return
+        with self.lock:
+            if self.f is None: return
+            self.f.write(RECORD_HEADER.pack(now, n))
+            self.f.write(packet)
+            self.offsets.append(self.pos)
+            self.pos += RECORD_HEADER.size + n
+
+    def write_batch(self, slots, lengths, count, now):
+        for i in range(count):
+            self.write(slots[i][:lengths[i]], now)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        with self.lock:
+            if self.f is None: return
+            self.f.write(self.offsets.tobytes())
+            self.f.write(FOOTER.pack(self.pos, len(self.offsets), INDEX_MAGIC))
+            self.f.close()
+            self.f = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+class TelemetryReader:
+    """
+    Memory-mapped view of a recording. reader[i] -> (timestamp, start, end),
+    where mm[start:end] is the datagram; nothing is copied until decoded.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.offsets = None
+        self.f = open(path, 'rb')
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.start_time = FILE_HEADER.unpack_from(self.mm, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a telemetry recording")
+        self.offsets = self._load_index()
+
+    def _load_index(self):
+        size = len(self.mm)
+        if size >= FILE_HEADER.size + FOOTER.size:
+            index_off, count, magic = FOOTER.unpack_from(self.mm, size - FOOTER.size)
+            if magic == INDEX_MAGIC and index_off + count * 8 == size - FOOTER.size:
+                return memoryview(self.mm)[index_off:index_off + count * 8].cast('Q')
+
+        # No footer (recorder not closed): scan records up to the last complete one
+        offsets, pos = array('Q'), FILE_HEADER.size
+        while pos + RECORD_HEADER.size <= size:
+            _, n = RECORD_HEADER.unpack_from(self.mm, pos)
+            if n > PACKET_MAX or pos + RECORD_HEADER.size + n > size: break
+            offsets.append(pos)
+            pos += RECORD_HEADER.size + n
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        pos = self.offsets[i]
+        ts, n = RECORD_HEADER.unpack_from(self.mm, pos)
+        start = pos + RECORD_HEADER.size
+        return ts, start, start + n
+
+    def __iter__(self):
+        for i in range(len(self.offsets)): yield self[i]
+
+    @property
+    def duration(self):
+        if not len(self): return 0.0
+        return self[len(self) - 1][0] - self[0][0]
+
+    def close(self):
+        if isinstance(self.offsets, memoryview): self.offsets.release()
+        self.mm.close()
+        self.f.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+class ReplayLink(DataLink):
+    """
+    DataLink fed from a recording instead of UDP. Same surface (data, frame,
+    snapshot(), get_row(), stop()), so it drops into main.py or a benchmark.
+    speed: 1.0 real time, N for N x, 0 for as fast as possible.
+    Decoder and frames see the recorded timestamps, so runs are deterministic.
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__(port=None)
+        self.reader = TelemetryReader(path)
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+
+    def feed(self, i):
+        """Decodes and publishes record i. Returns its recorded timestamp."""
+        ts, start, end = self.reader[i]
+        self.packets_received += 1
+        self.health.observe(self.reader.mm, start, end, ts)
+        if self.decoder.decode(self.reader.mm, ts, start, end):
+            self.batches_decoded += 1
+            self.data['connected'] = True
+            self._publish(ts)
+        self.position = i + 1
+        return ts
+
+    def run(self):
+        print(f"ReplayLink: REPLAYING {self.reader.path} ({len(self.reader)} packets, x{self.speed or 'max'})")
+        try:
+            while self.running and len(self.reader):
+                t0_rec, t0_wall = self.reader[0][0], time.time()
+                for i in range(len(self.reader)):
+                    if not self.running: break
+                    if self.speed > 0:
+                        rest = t0_wall + (self.reader[i][0] - t0_rec) / self.speed - time.time()
+                        # Wait on the wake-up socket so stop() interrupts long gaps
+                        if rest > 0: select.select([self._wake_r], [], [], rest)
+                        if not self.running: break
+                    self.feed(i)
+                if not self.loop: break
+            self.data['connected'] = False
+            self._publish(self.frame.timestamp)
+        finally:
+            self.selector.close()
+            self._wake_r.close()
+            self.reader.close()
+
+# --- CLI ---
+def _record(path, seconds=None):
+    link = DataLink()
+    link.recorder = TelemetryRecorder(path)
+    link.start()
+    t0 = time.time()
+    try:
+        while seconds is None or time.time() - t0 < seconds:
+            time.sleep(1.0)
+            print(f"\r{len(link.recorder)} packets, {link.recorder.pos / 1024:.0f} KiB", end="", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        link.stop(); link.join(2.0)
+        link.recorder.close()
+    print(f"\nSaved {path}")
+
+def _info(path):
+    with TelemetryReader(path) as r:
+        size = os.path.getsize(path)
+        rows = {}
+        for _, start, end in r:
+            for pos in range(start + 5, end - 35, 36):
+                idx = struct.unpack_from('<i', r.mm, pos)[0]
+                rows[idx] = rows.get(idx, 0) + 1
+        rate = len(r) / r.duration if r.duration > 0 else 0.0
+        print(f"{path}: {len(r)} packets, {r.duration:.1f} s, {rate:.1f} pkt/s, {size / 1024:.0f} KiB")
+        print("rows: " + ", ".join(f"{k}({v})" for k, v in sorted(rows.items())))
+
+def _replay(path, speed=1.0):
+    link = ReplayLink(path, speed)
+    t0 = time.perf_counter()
+    link.start(); link.join()
+    dt = time.perf_counter() - t0
+    print(f"{link.packets_received} packets in {dt:.2f} s ({link.packets_received / dt:.0f} pkt/s), "
+          f"{link.frame.seq} frames published")
+
+if __name__ == "__main__":
+    cmds = {'record': _record, 'info': _info, 'replay': _replay}
+    if len(sys.argv) < 3 or sys.argv[1] not in cmds:
+        print(__doc__)
+        sys.exit(1)
+    cmds[sys.argv[1]](sys.argv[2], *[float(a) for a in sys.argv[3:]])
@@ -136,9 +136,9 @@ class RSIPage:
         self.font_freq = pygame.font.SysFont("consolas", 18, bold=True)
 
     # AUTO CALCULATE RADIAL TO STATION
-    def _get_raw_radial_dme(self):
-        hdg_mag = self.data_link.data.get('hdg', 0)
-        row99 = self.data_link.get_row(99)
+    def _get_raw_radial_dme(self, data):
+        hdg_mag = data.get('hdg', 0)
+        row99 = data.get_row(99)
         
         # USE ADF-STYLE RADIAL CALCULATION
         rel_bearing = row99[3] 
@@ -153,7 +153,7 @@ class RSIPage:
         
         return radial, dme_dist, True
 
-    def update(self, screen):
+    def update(self, screen, data):
         # UI UPDATE
         self.input_in.update()
         self.input_out.update()
@@ -165,14 +165,14 @@ class RSIPage:
         pygame.draw.line(screen, C_GRAY_DARK, (self.split_line_x, 40), (self.split_line_x, 280), 2)
         
         # FETCH NAV 1 FREQ
-        row97 = self.data_link.get_row(97)
+        row97 = data.get_row(97)
         current_nav_freq = row97[0] / 100.0
         
         # FETCH NAV1 CRS
-        row98 = self.data_link.get_row(98)
+        row98 = data.get_row(98)
         current_obs = int(row98[0])
         
-        real_radial, real_dme, has_signal = self._get_raw_radial_dme()
+        real_radial, real_dme, has_signal = self._get_raw_radial_dme(data)
         self._draw_rsi_disc(screen, real_radial, real_dme, current_obs)
         self._draw_top_info(screen, current_obs, real_radial, real_dme, current_nav_freq)
 
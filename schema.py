@@ -0,0 +1,81 @@
+import json
+import os
+from collections import namedtuple
+import config
+from config import *
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), TELEMETRY_SCHEMA)
+ROW_COLUMNS = 8
+ENGINE_COUNT = 3
+
+# One decoded value: channel[index] = column * scale + offset (index > 0 only for engines)
+FieldSpec = namedtuple('FieldSpec', 'channel index col scale offset')
+DerivedSpec = namedtuple('DerivedSpec', 'channel expr')
+
+class RowSpec:
+    __slots__ = ('idx', 'name', 'fields', 'derived', 'handler', 'detect', 'every_sample')
+
+    def __init__(self, idx, name, fields, derived, handler, detect, every_sample):
+        self.idx, self.name = idx, name
+        self.fields, self.derived = fields, derived
+        self.handler, self.detect = handler, detect
+        self.every_sample = every_sample
+
+class TelemetrySchema:
+    """Parsed telemetry_schema.json: rows, constants and the channels they write."""
+    def __init__(self, path=SCHEMA_FILE):
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f: doc = json.load(f)
+        self.constants = {k: float(v) for k, v in doc.get('constants', {}).items()}
+        self.rows = {}
+        self.engine_channels = set()
+        for key, entry in doc.get('rows', {}).items():
+            idx = int(key)
+            self.rows[idx] = self._parse_row(idx, entry)
+
+    def _error(self, idx, msg):
+        return ValueError(f"{self.path}: row {idx}: {msg}")
+
+    def _number(self, idx, value, default):
+        if value is None: return default
+        if isinstance(value, (int, float)): return float(value)
+        if value in self.constants: return self.constants[value]
+        if hasattr(config, value): return float(getattr(config, value))
+        raise self._error(idx, f"unknown constant '{value}'")
+
+    def _column(self, idx, col):
+        if not isinstance(col, int) or not 1 <= col <= ROW_COLUMNS:
+            raise self._error(idx, f"column {col!r} outside 1-{ROW_COLUMNS}")
+        return col
+
+    def _parse_row(self, idx, entry):
+        fields = []
+        for f in entry.get('fields', ()):
+            fields.append(FieldSpec(f['channel'], 0, self._column(idx, f['col']),
+                                    self._number(idx, f.get('scale'), 1.0), self._number(idx, f.get('offset'), 0.0)))
+        eng = entry.get('engines')
+        if eng:
+            cols = eng.get('cols', list(range(1, ENGINE_COUNT + 1)))
+            if len(cols) != ENGINE_COUNT: raise self._error(idx, f"engines needs {ENGINE_COUNT} columns")
+            scale, offset = self._number(idx, eng.get('scale'), 1.0), self._number(idx, eng.get('offset'), 0.0)
+            for eng_i, col in enumerate(cols):
+                fields.append(FieldSpec(eng['channel'], eng_i, self._column(idx, col), scale, offset))
+            self.engine_channels.add(eng['channel'])
+        derived = tuple(DerivedSpec(d['channel'], d['expr']) for d in entry.get('derived', ()))
+        return RowSpec(idx, entry.get('name', ''), tuple(fields), derived,
+                       entry.get('handler'), tuple(entry.get('detect', ())), bool(entry.get('every_sample')))
+
+    def channels(self):
+        """Every channel written by the schema, in file order."""
+        names = []
+        for spec in self.rows.values():
+            for name in [f.channel for f in spec.fields] + [d.channel for d in spec.derived]:
+                if name not in names: names.append(name)
+        return names
+
+    def extra_channels(self, known):
+        """(name, width) for schema channels missing from the built-in layout."""
+        return tuple((name, ENGINE_COUNT if name in self.engine_channels else 1)
+                     for name in self.channels() if name not in known)
+
+SCHEMA = TelemetrySchema()
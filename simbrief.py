@@ -0,0 +1,71 @@
+import random
+import time
+import requests
+from config import *
+
+# --- SIMBRIEF FETCH ---
+SIMBRIEF_TIMEOUT = globals().get("SIMBRIEF_TIMEOUT", (5.0, 15.0)) # connect, read (s)
+SIMBRIEF_RETRIES = globals().get("SIMBRIEF_RETRIES", 4)           # attempts per fetch
+SIMBRIEF_BACKOFF_SEC = globals().get("SIMBRIEF_BACKOFF_SEC", 1.0) # first retry delay, doubled per retry
+SIMBRIEF_BACKOFF_MAX_SEC = 8.0
+RETRY_STATUS = (429, 500, 502, 503, 504) # other HTTP errors (bad username, ...) are final
+
+class SimBriefClient:
+    """
+    Fetches the latest OFP over one keep-alive requests.Session, so refreshes
+    reuse the connection and TLS session. Responses are gzip-encoded, and
+    the ETag / Last-Modified of the last 200 make refetches conditional (304:
+    nothing downloaded). Validators are only adopted through commit(), once
+    the caller has installed that OFP. Network errors, 429 and 5xx are retried with
+    exponential backoff (jittered, capped) up to `retries` attempts; progress
+    goes to on_status(msg).
+    """
+    def __init__(self, username=SIMBRIEF_USERNAME, url=SIMBRIEF_API_URL, on_status=None,
+                 timeout=SIMBRIEF_TIMEOUT, retries=SIMBRIEF_RETRIES, backoff=SIMBRIEF_BACKOFF_SEC):
+        self.url, self.params = url, {'username': username, 'json': 1}
+        self.on_status = on_status
+        self.timeout, self.retries, self.backoff = timeout, max(1, int(retries)), backoff
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.etag = self.last_modified = None
+        self.attempts = 0 # used by the last fetch
+
+    def _status(self, msg):
+        if self.on_status: self.on_status(msg)
+
+    def commit(self, validators):
+        """Adopts the (ETag, Last-Modified) of a fetch whose OFP is now installed."""
+        self.etag, self.last_modified = validators
+
+    def forget(self):
+        """Drops the validators: the next fetch downloads the OFP whatever the server has."""
+        self.etag = self.last_modified = None
+
+    def fetch(self, conditional=True, sleep=None):
+        """
+        (status, body, validators): ("OK", bytes of the JSON OFP, (ETag,
+        Last-Modified)) to commit() once installed, ("UNCHANGED", None, None)
+        on 304, or ("HTTP <code>" / "NET ERROR", None, None) once retries are
+        exhausted. sleep(sec) waits out the backoff; a true return (e.g.
+        jobs.Job.sleep when cancelled) stops with ("CANCELLED", None, None).
+        """
+        headers = {}
+        if conditional and self.etag: headers['If-None-Match'] = self.etag
+        if conditional and self.last_modified: headers['If-Modified-Since'] = self.last_modified
+        delay, err = self.backoff, "NET ERROR"
+        for attempt in range(1, self.retries + 1):
+            self.attempts = attempt
+            self._status("LOADING..." if attempt == 1 else f"RETRY {attempt}/{self.retries}")
+            try:
+                r = self.session.get(self.url, params=self.params, headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                err = "NET ERROR"
+            else:
+                if r.status_code == 304: return "UNCHANGED", None, None
+                if r.status_code == 200: return "OK", r.content, (r.headers.get('ETag'), r.headers.get('Last-Modified'))
+                err = f"HTTP {r.status_code}"
+                if r.status_code not in RETRY_STATUS: return err, None, None
+            if attempt < self.retries:
+                if (sleep or time.sleep)(delay * random.uniform(0.5, 1.0)): return "CANCELLED", None, None
+                delay = min(delay * 2.0, SIMBRIEF_BACKOFF_MAX_SEC)
+        return err, None, None
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from config import *
+from channels import slot
+
+FUEL_USED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), FUEL_USED_FILE)
+
+FUEL_GAP_SEC = 2.0    # no integration across gaps longer than this (link lost, replay seek): 2 x LINK_TIMEOUT_SEC, so ~1 Hz output still integrates
+SAVE_INTERVAL_SEC = 30.0
+
+_FF, _USED = slot('ff'), slot('fuel_used_kg')
+
+class FuelIntegrator:
+    """
+    Ingest side: per-engine fuel used since the link started, integrated from
+    row 45 (ff, kg/h) with the trapezoidal rule over batch receive times, on
+    the newest ff of each decoded batch (row 45 is coalesced like any other).
+    Runs as the row's "detect" entry, so the result does not depend on FPS or page.
+    """
+    def __init__(self):
+        self._last_ts = 0.0
+        self._last_ff = [0.0, 0.0, 0.0]
+
+    def detect_fuel_used(self, buf, now):
+        dt = now - self._last_ts
+        integrate = self._last_ts and 0.0 < dt <= FUEL_GAP_SEC
+        for eng_i in range(3):
+            ff = buf[_FF + eng_i]
+            if integrate: buf[_USED + eng_i] += (self._last_ff[eng_i] + ff) * 0.5 * dt / 3600.0
+            self._last_ff[eng_i] = ff
+        if dt: self._last_ts = now
+
+class FuelTotalizer:
+    """
+    Reader side (owned by FMSCore): persisted, resettable totals on top of the
+    ingest integral. used = saved total from earlier runs + integral since start
+    - integral at the last reset. Works for every link type because only the
+    published fuel_used_kg channel is read.
+    """
+    def __init__(self, path=FUEL_USED_PATH):
+        self.path = path
+        self.base = [0.0, 0.0, 0.0]
+        self.mark = [0.0, 0.0, 0.0]
+        self.live = [0.0, 0.0, 0.0]
+        self._saved_at = time.time()
+        try:
+            with open(path, 'r') as f:
+                base = [float(v) for v in json.load(f).get('fuel_used_kg', self.base)]
+            if len(base) == 3: self.base = base
+            else: print(f"FuelTotalizer: ignoring {path}: {len(base)} engines")
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            pass
+
+    def update(self, frame):
+        self.live[:] = frame['fuel_used_kg']
+        if time.time() - self._saved_at > SAVE_INTERVAL_SEC: self.save()
+
+    def used(self):
+        return [self.base[i] + self.live[i] - self.mark[i] for i in range(3)]
+
+    def total(self):
+        return sum(self.used())
+
+    def reset(self):
+        self.base = [0.0, 0.0, 0.0]
+        self.mark = list(self.live)
+        self.save()
+
+    def save(self):
+        self._saved_at = time.time()
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({'fuel_used_kg': self.used()}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"FuelTotalizer: save failed: {e}")
@@ -0,0 +1,202 @@
+"""
+Synthetic X-Plane stand-in: sends DATA packets for every row the MFD uses,
+following a scripted flight profile, at a fixed packet rate.
+
+Usage: python xplane_sim.py [--profile flight] [--rate 20] [--duration 60]
+                            [--host 127.0.0.1] [--port UDP_PORT]
+"""
+import argparse
+import math
+import socket
+import struct
+import time
+from config import *
+from schema import SCHEMA
+
+# Rows listed in main.show_udp_instructions()
+SIM_ROWS = (3, 4, 13, 14, 17, 20, 27, 33, 41, 45, 47, 49, 63, 74, 97, 98, 99, 100, 152)
+
+# Unit factors the decoder divides back out (telemetry_schema.json)
+FF_CONVERSION_FACTOR = SCHEMA.constants['FF_CONVERSION_FACTOR']
+LB_TO_KG = SCHEMA.constants['LB_TO_KG']
+STAB_FACTOR = SCHEMA.constants['STAB_FACTOR']
+NM_PER_DEG = 60.0
+
+# --- FLIGHT PROFILES ---
+# Keyframes (t_sec, {param: value}); params are linearly interpolated, the last
+# keyframe holds. Params not given keep the DEFAULT_STATE value.
+DEFAULT_STATE = {
+    'ias': 0.0, 'alt': 1500.0, 'vvi': 0.0, 'pitch': 0.0, 'roll': 0.0, 'hdg': 90.0,
+    'n1': 0.0, 'egt': 20.0, 'ff': 0.0, 'oil': 0.0, 'starter': 0.0, 'rev': 0.0,
+    'gear': 1.0, 'park': 1.0, 'flaps': 0.0, 'slats': 0.0, 'sbrk': 0.0, 'trim': -0.2,
+    'fuel_kg': 30000.0, 'weight_kg': 95000.0, 'cg_raw': 0.0,
+    'wind_spd': 10.0, 'wind_dir': 270.0, 'dme': 25.0, 'rel_brg': 10.0,
+}
+
+PROFILES = {
+    # Cold and dark -> three engines started in sequence
+    'start': [
+        (0,   {}),
+        (5,   {'starter': 1.0}),
+        (25,  {'starter': 1.0, 'n1': 20.0, 'egt': 520.0, 'ff': 400.0, 'oil': 40.0}),
+        (30,  {'n1': 22.0, 'egt': 420.0, 'ff': 350.0, 'oil': 45.0}),
+        (60,  {'n1': 22.0, 'egt': 410.0, 'ff': 350.0, 'oil': 45.0}),
+    ],
+    # Takeoff roll, rotation, gear and flap retraction, climb
+    'takeoff': [
+        (0,   {'n1': 22.0, 'egt': 410.0, 'ff': 350.0, 'oil': 45.0, 'park': 0.0, 'flaps': 0.5, 'slats': 1.0}),
+        (5,   {'n1': 97.0, 'egt': 610.0, 'ff': 4200.0, 'oil': 55.0, 'park': 0.0, 'flaps': 0.5, 'slats': 1.0}),
+        (35,  {'ias': 150.0, 'n1': 97.0, 'egt': 615.0, 'ff': 4200.0, 'oil': 55.0, 'park': 0.0, 'flaps': 0.5, 'slats': 1.0}),
+        (40,  {'ias': 160.0, 'pitch': 12.0, 'vvi': 2000.0, 'alt': 1600.0, 'n1': 97.0, 'egt': 615.0, 'ff': 4200.0, 'oil': 55.0, 'park': 0.0, 'flaps': 0.5, 'slats': 1.0}),
+        (45,  {'ias': 170.0, 'pitch': 15.0, 'vvi': 2500.0, 'alt': 1800.0, 'gear': 0.0, 'n1': 95.0, 'egt': 600.0, 'ff': 4000.0, 'oil': 55.0, 'park': 0.0, 'flaps': 0.5, 'slats': 1.0}),
+        (120, {'ias': 250.0, 'pitch': 8.0, 'vvi': 2500.0, 'alt': 6000.0, 'gear': 0.0, 'n1': 92.0, 'egt': 580.0, 'ff': 3600.0, 'oil': 55.0, 'park': 0.0}),
+    ],
+    # Level cruise with light turbulence
+    'cruise': [
+        (0,   {'ias': 290.0, 'alt': 35000.0, 'gear': 0.0, 'park': 0.0, 'n1': 88.0, 'egt': 540.0, 'ff': 2700.0, 'oil': 50.0, 'wind_spd': 60.0}),
+        (600, {'ias': 290.0, 'alt': 35000.0, 'gear': 0.0, 'park': 0.0, 'n1': 88.0, 'egt': 540.0, 'ff': 2700.0, 'oil': 50.0, 'wind_spd': 60.0, 'hdg': 120.0}),
+    ],
+    # Descent, gear/flaps out, flare and touchdown, reversers
+    'approach': [
+        (0,   {'ias': 250.0, 'alt': 6000.0, 'vvi': -1500.0, 'gear': 0.0, 'park': 0.0, 'n1': 45.0, 'egt': 420.0, 'ff': 1200.0, 'oil': 48.0}),
+        (60,  {'ias': 180.0, 'alt': 3000.0, 'vvi': -1000.0, 'gear': 1.0, 'park': 0.0, 'flaps': 0.6, 'slats': 1.0, 'n1': 60.0, 'egt': 460.0, 'ff': 1800.0, 'oil': 50.0}),
+        (150, {'ias': 140.0, 'alt': 1550.0, 'vvi': -700.0, 'gear': 1.0, 'park': 0.0, 'flaps': 1.0, 'slats': 1.0, 'pitch': 3.0, 'n1': 60.0, 'egt': 460.0, 'ff': 1800.0, 'oil': 50.0, 'dme': 1.0}),
+        (155, {'ias': 135.0, 'alt': 1500.0, 'vvi': -150.0, 'gear': 1.0, 'park': 0.0, 'flaps': 1.0, 'slats': 1.0, 'pitch': 5.0, 'n1': 30.0, 'egt': 400.0, 'ff': 600.0, 'oil': 48.0, 'dme': 0.5}),
+        (158, {'ias': 120.0, 'alt': 1500.0, 'vvi': 0.0, 'gear': 1.0, 'park': 0.0, 'flaps': 1.0, 'slats': 1.0, 'sbrk': 1.0, 'rev': 1.0, 'n1': 80.0, 'egt': 520.0, 'ff': 3000.0, 'oil': 52.0}),
+        (180, {'ias': 30.0, 'alt': 1500.0, 'gear': 1.0, 'park': 0.0, 'flaps': 1.0, 'slats': 1.0, 'n1': 22.0, 'egt': 410.0, 'ff': 350.0, 'oil': 45.0}),
+    ],
+}
+PROFILES['flight'] = (
+    PROFILES['start'] +
+    [(t + 60, kf) for t, kf in PROFILES['takeoff']] +
+    [(t + 660, kf) for t, kf in PROFILES['cruise']] +    # ~3600 fpm climb in between
+    [(t + 2100, kf) for t, kf in PROFILES['approach']]   # ~1500 fpm descent in between
+)
+
+def _interp(frames, t):
+    """Profile state at time t (wraps around the profile length)."""
+    t = t % max(frames[-1][0], 1)
+    for k in range(len(frames) - 1):
+        t0, a = frames[k]
+        t1, b = frames[k + 1]
+        if t0 <= t < t1:
+            u = (t - t0) / (t1 - t0)
+            va, vb = dict(DEFAULT_STATE, **a), dict(DEFAULT_STATE, **b)
+            return {p: va[p] + (vb[p] - va[p]) * u for p in DEFAULT_STATE}
+    return dict(DEFAULT_STATE, **frames[-1][1])
+
+class FlightSimulator:
+    """Integrates position and fuel along a profile; rows(t) gives X-Plane rows."""
+    def __init__(self, profile='flight', lat=55.97, lon=37.41, seed=1):
+        self.frames = PROFILES[profile]
+        self.lat, self.lon = lat, lon
+        self.fuel_burnt = 0.0
+        self.last_t = 0.0
+        self.phase = seed * 0.37
+
+    def state(self, t):
+        s = _interp(self.frames, t)
+        dt = max(0.0, t - self.last_t)
+        self.last_t = t
+
+        # Light turbulence / sensor noise
+        wob = math.sin(t * 1.7 + self.phase)
+        s['roll'] += wob * 0.8
+        s['pitch'] += wob * 0.2
+        s['ias'] = max(0.0, s['ias'] + (wob * 1.5 if s['ias'] > 50 else 0.0))
+
+        # TAS/GS and position
+        s['tas'] = s['ias'] * (1.0 + s['alt'] / 1000.0 * 0.02)
+        s['gs'] = max(0.0, s['tas'] - s['wind_spd'] * math.cos(math.radians(s['wind_dir'] - s['hdg'])))
+        d_nm = s['gs'] * dt / 3600.0
+        self.lat += d_nm * math.cos(math.radians(s['hdg'])) / NM_PER_DEG
+        self.lon += d_nm * math.sin(math.radians(s['hdg'])) / (NM_PER_DEG * max(0.01, math.cos(math.radians(self.lat))))
+
+        # Fuel burn at the commanded flow (kg/hr per engine)
+        self.fuel_burnt += s['ff'] * 3 * dt / 3600.0
+        s['fuel_kg'] = max(0.0, s['fuel_kg'] - self.fuel_burnt)
+        s['weight_kg'] -= self.fuel_burnt
+        s['cg_raw'] = 0.05 - self.fuel_burnt / 1e6
+        return s
+
+    def rows(self, t):
+        s = self.state(t)
+        eng = lambda v: (v, v * 0.995, v * 1.005, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return {
+            3:   (s['ias'], s['ias'], s['tas'], s['gs'], 0.0, 0.0, 0.0, 0.0),
+            4:   (s['tas'] / 573.0, 0.0, s['vvi'], 0.0, 1.0, 0.0, 0.0, 0.0),
+            13:  (s['trim'] / STAB_FACTOR, 0.0, 0.0, s['flaps'], s['flaps'], s['slats'], s['sbrk'], 0.0),
+            14:  (s['gear'], s['park'], 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            17:  (s['pitch'], s['roll'], s['hdg'], s['hdg'], s['hdg'], 0.0, 0.0, 0.0),
+            20:  (self.lat, self.lon, s['alt'], s['alt'], 0.0, s['alt'], 0.0, 0.0),
+            27:  eng(s['rev']),
+            33:  eng(s['starter']),
+            41:  eng(s['n1']),
+            45:  eng(s['ff'] / FF_CONVERSION_FACTOR),
+            47:  eng(s['egt']),
+            49:  eng(s['oil']),
+            63:  (s['weight_kg'] / LB_TO_KG, 0.0, s['fuel_kg'] / LB_TO_KG, 0.0, 0.0, s['weight_kg'] / LB_TO_KG, 0.0, s['cg_raw']),
+            74:  (s['pitch'] * 0.02, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            97:  (11030.0, 0.0, 0.0, 0.0, 11510.0, 0.0, 0.0, 0.0),
+            98:  (s['hdg'], 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            99:  (0.0, 0.0, 0.0, s['rel_brg'], s['dme'], 0.0, 0.0, 0.0),
+            100: (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            152: (0.0, 0.0, 0.0, 0.0, 0.0, s['wind_spd'], s['wind_dir'], 0.0),
+        }
+
+ROW_PACK = struct.Struct('<i8f')
+MARKER_ROW, MARKER_COL = 20, 7 # unused column; carries the packet sequence number when marking
+
+def build_packet(rows, marker=None):
+    """DATA packet for {idx: 8 values}. marker (float32-exact int) goes into row 20 column 8."""
+    parts = [b'DATA\x00']
+    for idx, vals in rows.items():
+        if marker is not None and idx == MARKER_ROW:
+            vals = vals[:MARKER_COL] + (float(marker),)
+        parts.append(ROW_PACK.pack(idx, *vals))
+    return b''.join(parts)
+
+def send(addr, rate, duration, profile='flight', rows=SIM_ROWS, send_times=None):
+    """
+    Sends at a fixed rate on an absolute schedule (late packets go out back to back).
+    With send_times (a shared array), packet k carries marker k and its send
+    perf_counter() is stored in send_times[k]. Returns the number sent.
+    """
+    sim = FlightSimulator(profile)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    wanted = set(rows)
+    period = 1.0 / rate
+    total = int(rate * duration)
+    t0 = time.perf_counter()
+    sent = 0
+    try:
+        while sent < total:
+            due = t0 + sent * period
+            rest = due - time.perf_counter()
+            if rest > 0: time.sleep(rest)
+            pkt_rows = {idx: v for idx, v in sim.rows(sent * period).items() if idx in wanted}
+            if send_times is not None:
+                packet = build_packet(pkt_rows, sent)
+                send_times[sent] = time.perf_counter()
+            else:
+                packet = build_packet(pkt_rows)
+            tx.sendto(packet, addr)
+            sent += 1
+    finally:
+        tx.close()
+    return sent
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Synthetic X-Plane DATA sender")
+    ap.add_argument('--profile', default='flight', choices=sorted(PROFILES))
+    ap.add_argument('--rate', type=float, default=20.0, help="packets/s")
+    ap.add_argument('--duration', type=float, default=PROFILES['flight'][-1][0], help="seconds")
+    ap.add_argument('--host', default="127.0.0.1")
+    ap.add_argument('--port', type=int, default=UDP_PORT)
+    args = ap.parse_args()
+    print(f"Sending '{args.profile}' to {args.host}:{args.port} at {args.rate:g} pkt/s for {args.duration:g} s")
+    try:
+        n = send((args.host, args.port), args.rate, args.duration, args.profile)
+        print(f"{n} packets sent")
+    except KeyboardInterrupt:
+        pass